@@ -0,0 +1,367 @@
+"""
+Sponsor-level cash-flow projection for a whole member file.
+
+Plan finance does not need each member's schedule, only the population
+totals: what members pay in each month under no cap, cap only and cap plus
+the monthly payment plan, and how much the cap shifts onto the plan. This
+streams a cohort file (same formats as cohort.py) and reduces every chunk
+straight into per-group totals:
+
+- monthly and yearly member payments for each scenario
+- plan liability: spending above the cap that members no longer pay, by month
+- payment plan balance: what members on the plan still owe at the end of
+  each month (cap only minus cap plus smoothing, accumulated); this is the
+  cash the plan fronts and it is back to zero in December
+- histograms of each member's worst monthly bill, per scenario
+
+Groups are the persona by default, or the values of any input column
+(--group-by plan_id), or a single group with --group-by none.
+
+Amounts are accumulated as whole cents with the integer engine in cents.py,
+so totals are exact and a CashFlowAggregate can be merged with another in
+any order (shards, workers, nightly partitions) and give identical numbers.
+
+Example:
+    python aggregate.py members.csv --group-by persona --workers 4
+    python aggregate.py members.csv --json > cashflow.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from batch import batch_no_cap_cents, batch_with_smoothing_cents, batch_without_smoothing_cents
+from cohort import (
+    DEFAULT_CHUNK_SIZE,
+    FORMATS,
+    SCENARIOS,
+    SHARDS_PER_WORKER,
+    guess_format,
+    iter_records,
+    parse_member,
+    read_csv_header,
+    shard_ranges,
+)
+from logic import MONTHS_IN_YEAR
+
+DEFAULT_BIN_WIDTH = 50.0
+DEFAULT_BINS = 40
+
+# Label for members with a blank group value.
+BLANK_GROUP = "(none)"
+
+
+class _GroupTotals:
+    """
+    Running totals for one group, all in cents.
+    """
+
+    __slots__ = ("members", "monthly", "peak_hist")
+
+    def __init__(self, bins: int):
+        self.members = 0
+        # (scenario, month) payments
+        self.monthly = np.zeros((len(SCENARIOS), MONTHS_IN_YEAR), dtype=np.int64)
+        # (scenario, bin) counts of worst monthly bills; the last bin is open ended
+        self.peak_hist = np.zeros((len(SCENARIOS), bins + 1), dtype=np.int64)
+
+    def merge(self, other: "_GroupTotals") -> None:
+        self.members += other.members
+        self.monthly += other.monthly
+        self.peak_hist += other.peak_hist
+
+
+class CashFlowAggregate:
+    """
+    Mergeable per-group reduction of the three scenarios.
+
+    Feed it with add_chunk() (or add_file()), combine partial results with
+    merge(), and read the totals with report().
+    """
+
+    def __init__(
+        self,
+        group_by: str | None = "persona",
+        bin_width: float = DEFAULT_BIN_WIDTH,
+        bins: int = DEFAULT_BINS,
+    ):
+        self.bin_cents = round(bin_width * 100)
+        if self.bin_cents < 1 or bins < 1:
+            raise ValueError("bin_width must be at least 0.01 and bins at least 1")
+        self.group_by = group_by
+        self.bins = bins
+        self.groups: dict[str, _GroupTotals] = {}
+        # Whether any record added with add_file() had the group_by field, so
+        # a misspelled JSONL key is not mistaken for an all-blank column.
+        self.group_field_seen = False
+
+    def _group_value(self, fields: dict, member: tuple) -> str:
+        if self.group_by is None:
+            return "all"
+        if self.group_by == "persona":
+            value = member[3]
+        else:
+            value = fields.get(self.group_by)
+            if value is None:
+                value = ""
+            else:
+                self.group_field_seen = True
+                value = str(value).strip()
+        return value or BLANK_GROUP
+
+    def add_chunk(self, members: list[tuple[str, float, int, str]], groups: list[str]) -> None:
+        """
+        Add one chunk of parsed members (as from cohort.iter_member_chunks),
+        with the group name of each member.
+        """
+        n = len(members)
+        if n == 0:
+            return
+        annual = np.fromiter((m[1] for m in members), dtype=float, count=n)
+        start = np.fromiter((m[2] for m in members), dtype=np.int64, count=n)
+
+        schedules = (
+            batch_no_cap_cents(annual),
+            batch_without_smoothing_cents(annual),
+            batch_with_smoothing_cents(annual, start),
+        )
+
+        index = {}
+        codes = np.fromiter((index.setdefault(g, len(index)) for g in groups), dtype=np.intp, count=n)
+
+        monthly = np.zeros((len(index), len(SCENARIOS), MONTHS_IN_YEAR), dtype=np.int64)
+        peak_hist = np.zeros((len(index), len(SCENARIOS), self.bins + 1), dtype=np.int64)
+        for s, matrix in enumerate(schedules):
+            np.add.at(monthly[:, s], codes, matrix)
+            peak_bins = np.minimum(matrix.max(axis=1) // self.bin_cents, self.bins)
+            np.add.at(peak_hist[:, s], (codes, peak_bins), 1)
+        members_per_group = np.bincount(codes, minlength=len(index))
+
+        for name, code in index.items():
+            totals = self.groups.get(name)
+            if totals is None:
+                totals = self.groups[name] = _GroupTotals(self.bins)
+            totals.members += int(members_per_group[code])
+            totals.monthly += monthly[code]
+            totals.peak_hist += peak_hist[code]
+
+    def add_file(
+        self,
+        path: str,
+        fmt: str,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        start: int = 0,
+        end: int | None = None,
+    ) -> int:
+        """
+        Stream a member file (or the byte range start-end of it) into the
+        totals. Returns the number of members added.
+        """
+        count = 0
+        members, groups = [], []
+        for where, fields in iter_records(path, fmt, start, end):
+            member = parse_member(fields, where)
+            members.append(member)
+            groups.append(self._group_value(fields, member))
+            if len(members) >= chunk_size:
+                self.add_chunk(members, groups)
+                count += len(members)
+                members, groups = [], []
+        self.add_chunk(members, groups)
+        return count + len(members)
+
+    def merge(self, other: "CashFlowAggregate") -> "CashFlowAggregate":
+        """
+        Fold another partial aggregate (same grouping and bins) into this one.
+        """
+        if (other.group_by, other.bin_cents, other.bins) != (self.group_by, self.bin_cents, self.bins):
+            raise ValueError("can only merge aggregates with the same grouping and histogram bins")
+        for name, theirs in other.groups.items():
+            ours = self.groups.get(name)
+            if ours is None:
+                ours = self.groups[name] = _GroupTotals(self.bins)
+            ours.merge(theirs)
+        self.group_field_seen = self.group_field_seen or other.group_field_seen
+        return self
+
+    def total(self) -> _GroupTotals:
+        """
+        Totals over every group.
+        """
+        overall = _GroupTotals(self.bins)
+        for totals in self.groups.values():
+            overall.merge(totals)
+        return overall
+
+    def report(self) -> dict:
+        """
+        Plain dict of dollar amounts, per group (sorted by name) and overall.
+        """
+        edges = [self.bin_cents * i / 100 for i in range(self.bins + 1)]
+        return {
+            "group_by": self.group_by,
+            "peak_bins": edges,
+            "groups": {name: self._group_report(self.groups[name]) for name in sorted(self.groups)},
+            "total": self._group_report(self.total()),
+        }
+
+    @staticmethod
+    def _group_report(totals: _GroupTotals) -> dict:
+        no_cap, cap, smooth = totals.monthly
+        liability = no_cap - cap
+        plan_balance = np.cumsum(cap - smooth)
+
+        def dollars(cents) -> list[float]:
+            return (np.asarray(cents) / 100).tolist()
+
+        return {
+            "members": totals.members,
+            "monthly": {name: dollars(row) for name, row in zip(SCENARIOS, totals.monthly)},
+            "yearly": {name: int(row.sum()) / 100 for name, row in zip(SCENARIOS, totals.monthly)},
+            "plan_liability": int(liability.sum()) / 100,
+            "plan_liability_monthly": dollars(liability),
+            "plan_balance_monthly": dollars(plan_balance),
+            "peak_histogram": {name: row.tolist() for name, row in zip(SCENARIOS, totals.peak_hist)},
+        }
+
+
+def _aggregate_shard(path, fmt, group_by, bin_width, bins, chunk_size, start, end) -> CashFlowAggregate:
+    aggregate = CashFlowAggregate(group_by, bin_width, bins)
+    aggregate.add_file(path, fmt, chunk_size, start, end)
+    return aggregate
+
+
+def aggregate_file(
+    path: str,
+    fmt: str,
+    group_by: str | None = "persona",
+    workers: int = 1,
+    bin_width: float = DEFAULT_BIN_WIDTH,
+    bins: int = DEFAULT_BINS,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> CashFlowAggregate:
+    """
+    One pass over a member file. With workers > 1 the file is cut into
+    byte-range shards (as in cohort.py) and the partial aggregates merged.
+
+    Raises ValueError when grouping by a column no record has (checked up
+    front from the CSV header; for JSONL, once the file has been read).
+    """
+    by_field = group_by not in (None, "persona")
+    if fmt == "csv" and by_field and group_by not in read_csv_header(path):
+        raise ValueError(f"{path}: no column named {group_by!r} to group by")
+
+    aggregate = CashFlowAggregate(group_by, bin_width, bins)
+    if workers <= 1:
+        aggregate.add_file(path, fmt, chunk_size)
+    else:
+        ranges = shard_ranges(path, workers * SHARDS_PER_WORKER)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [
+                pool.submit(_aggregate_shard, path, fmt, group_by, bin_width, bins, chunk_size, start, end)
+                for start, end in ranges
+            ]
+            for future in futures:
+                aggregate.merge(future.result())
+
+    if by_field and aggregate.groups and not aggregate.group_field_seen:
+        raise ValueError(f"{path}: no record has a field named {group_by!r} to group by")
+    return aggregate
+
+
+def _print_report(report: dict) -> None:
+    rows = list(report["groups"].items())
+    if len(rows) > 1:
+        rows.append(("Total", report["total"]))
+
+    width = max(len("group"), *(len(name) for name, _ in rows))
+    print(
+        f"{'group':{width}s} {'members':>10} {'no cap':>16} {'cap only':>16} "
+        f"{'cap + plan':>16} {'plan liability':>16} {'max plan balance':>16}"
+    )
+    for name, group in rows:
+        yearly = group["yearly"]
+        print(
+            f"{name:{width}s} {group['members']:>10,} "
+            f"${yearly['no_cap']:>15,.2f} ${yearly['cap_no_smooth']:>15,.2f} "
+            f"${yearly['cap_smooth']:>15,.2f} ${group['plan_liability']:>15,.2f} "
+            f"${max(group['plan_balance_monthly']):>15,.2f}"
+        )
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Population cash-flow totals for a CSV or JSONL member file.")
+    parser.add_argument("input", help="CSV or JSONL file with id, annual_oop, start_month[, persona]")
+    parser.add_argument("--input-format", choices=FORMATS, help="default: from the file name")
+    parser.add_argument(
+        "--group-by",
+        default="persona",
+        help="input column to group by, or none for one group (default: persona)",
+    )
+    parser.add_argument(
+        "--bin-width",
+        type=float,
+        default=DEFAULT_BIN_WIDTH,
+        help=f"peak bill histogram bin width in dollars (default: {DEFAULT_BIN_WIDTH:g})",
+    )
+    parser.add_argument("--bins", type=int, default=DEFAULT_BINS, help=f"histogram bins (default: {DEFAULT_BINS})")
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=DEFAULT_CHUNK_SIZE,
+        help=f"members per batch (default: {DEFAULT_CHUNK_SIZE})",
+    )
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=1,
+        help="worker processes; 0 means one per CPU (default: 1)",
+    )
+    parser.add_argument("--json", action="store_true", help="print the full report (monthly, histograms) as JSON")
+    args = parser.parse_args(argv)
+
+    if args.chunk_size < 1:
+        print("error: --chunk-size must be at least 1", file=sys.stderr)
+        return 2
+    if args.workers < 0:
+        print("error: --workers must be 0 or more", file=sys.stderr)
+        return 2
+
+    workers = args.workers or os.cpu_count() or 1
+    group_by = None if args.group_by.lower() == "none" else args.group_by
+    in_fmt = args.input_format or guess_format(args.input)
+
+    started = time.perf_counter()
+    try:
+        aggregate = aggregate_file(
+            args.input, in_fmt, group_by, workers, args.bin_width, args.bins, args.chunk_size
+        )
+    except (OSError, ValueError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    seconds = time.perf_counter() - started
+
+    report = aggregate.report()
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        _print_report(report)
+
+    count = report["total"]["members"]
+    rate = count / seconds if seconds > 0 else 0.0
+    print(
+        f"Aggregated {count:,} members in {seconds:.2f}s "
+        f"with {workers} worker(s) ({rate:,.0f} members/s).",
+        file=sys.stderr,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
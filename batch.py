@@ -0,0 +1,350 @@
+"""
+Vectorized versions of the three scenario functions in logic.py.
+
+Each function takes arrays of annual out of pocket estimates (and start
+months for the smoothing path) and returns an (N, 12) matrix, one row per
+beneficiary. The arithmetic follows the scalar functions step by step, so
+every row is identical to what the scalar function returns for the same
+inputs, including the last-month rounding fix and the overshoot trim.
+"""
+
+import sys
+from itertools import accumulate
+
+import numpy as np
+
+import cents
+import logic
+from instrument import stage
+
+
+def _builtin_sum(matrix: np.ndarray) -> np.ndarray:
+    """
+    Row sums that reproduce Python's built-in sum() bit for bit.
+
+    sum() adds left to right starting from 0. From Python 3.12 on it also
+    carries a Neumaier compensation term for floats, so we do the same there.
+    NumPy's own sum uses pairwise summation and can differ in the last bit.
+    """
+    acc = np.zeros(matrix.shape[0])
+    if matrix.shape[1] == 0:
+        return acc
+
+    acc += matrix[:, 0]
+    if sys.version_info < (3, 12):
+        for j in range(1, matrix.shape[1]):
+            acc += matrix[:, j]
+        return acc
+
+    comp = np.zeros_like(acc)
+    for j in range(1, matrix.shape[1]):
+        x = matrix[:, j]
+        t = acc + x
+        comp += np.where(np.abs(acc) >= np.abs(x), (acc - t) + x, (x - t) + acc)
+        acc = t
+    return np.where((comp != 0) & np.isfinite(comp), acc + comp, acc)
+
+
+def _as_estimates(annual_oop_estimates) -> np.ndarray:
+    return np.atleast_1d(np.asarray(annual_oop_estimates, dtype=float))
+
+
+def _as_start_months(start_months, n: int) -> np.ndarray:
+    months = np.atleast_1d(np.asarray(start_months, dtype=np.int64))
+    return np.clip(np.broadcast_to(months, (n,)), 1, 12)
+
+
+def _as_weights(weights, n: int) -> np.ndarray:
+    """
+    (N, 12) weights: SPENDING_WEIGHTS when None, one row for everybody, or
+    one row per beneficiary.
+    """
+    rows = np.asarray(logic.SPENDING_WEIGHTS if weights is None else weights, dtype=float)
+    if rows.shape[-1] != logic.MONTHS_IN_YEAR or rows.ndim > 2:
+        raise ValueError(f"weights must have {logic.MONTHS_IN_YEAR} columns, got shape {rows.shape}")
+    return np.broadcast_to(rows, (n, logic.MONTHS_IN_YEAR))
+
+
+def normalized_weights() -> list[float]:
+    """
+    SPENDING_WEIGHTS with the last month absorbing rounding, as in
+    logic._build_spending, so the shares add up to exactly 1.0.
+    """
+    weights = list(logic.SPENDING_WEIGHTS)
+    weights[-1] += 1.0 - sum(weights)
+    return weights
+
+
+def cumulative_shares() -> np.ndarray:
+    """
+    Share of the yearly spend paid by the end of each month.
+    """
+    return np.array(list(accumulate(normalized_weights())))
+
+
+def build_spending_matrix(annual_oop_estimates, cap: float | None, weights=None) -> np.ndarray:
+    """
+    Batch version of logic._build_spending.
+
+    - annual_oop_estimates: array-like of N annual estimates
+    - cap: if not None, cap each total at this value. If None, do not cap.
+    - weights: 12 monthly shares for everybody, or an (N, 12) array with
+      each beneficiary's own profile. Defaults to SPENDING_WEIGHTS.
+
+    Returns an (N, 12) float matrix.
+    """
+    totals = np.maximum(_as_estimates(annual_oop_estimates), 0.0)
+
+    if cap is not None:
+        totals = np.minimum(totals, cap)
+
+    baseline = totals[:, None] * _as_weights(weights, totals.shape[0])
+
+    diff = totals - _builtin_sum(baseline)
+    baseline[:, -1] += diff
+
+    baseline[totals == 0] = 0.0
+    return baseline
+
+
+def batch_no_cap(annual_oop_estimates, weights=None) -> np.ndarray:
+    """
+    Scenario 1 for N beneficiaries: no cap at all.
+    """
+    return build_spending_matrix(annual_oop_estimates, cap=None, weights=weights)
+
+
+def batch_without_smoothing(annual_oop_estimates, weights=None) -> np.ndarray:
+    """
+    Scenario 2 for N beneficiaries: cap at CAP, no monthly payment plan.
+    """
+    return build_spending_matrix(annual_oop_estimates, cap=logic.CAP, weights=weights)
+
+
+def batch_with_smoothing(annual_oop_estimates, start_months, weights=None) -> np.ndarray:
+    """
+    Scenario 3 for N beneficiaries: cap at CAP, with monthly payment plan.
+
+    start_months may be a single month or one month per beneficiary.
+    Months outside 1-12 are clamped, like the scalar function does.
+    weights is as for build_spending_matrix.
+    """
+    baseline_cap = batch_without_smoothing(annual_oop_estimates, weights)
+    months = _as_start_months(start_months, baseline_cap.shape[0])
+    return _smooth_matrix(baseline_cap, _builtin_sum(baseline_cap), months)
+
+
+def _smooth_matrix(baseline_cap: np.ndarray, total_cap: np.ndarray, months: np.ndarray) -> np.ndarray:
+    """
+    Apply the smoothing rules to already capped baselines.
+
+    total_cap must be the _builtin_sum of baseline_cap and months clamped.
+    """
+    # Months before start_month keep the natural front-loaded amounts.
+    column = np.arange(logic.MONTHS_IN_YEAR)
+    before_start = column[None, :] < (months - 1)[:, None]
+    payments = np.where(before_start, baseline_cap, 0.0)
+
+    # The prefix is followed only by zeros, so this equals sum(baseline[:s-1]).
+    paid_so_far = _builtin_sum(payments)
+    remaining_balance = np.maximum(total_cap - paid_so_far, 0.0)
+    remaining_months = logic.MONTHS_IN_YEAR - (months - 1)
+
+    smoothing = (total_cap != 0) & (remaining_balance != 0)
+    smoothed_monthly = remaining_balance / remaining_months
+    payments = np.where(
+        smoothing[:, None] & ~before_start, smoothed_monthly[:, None], payments
+    )
+
+    total_paid = _builtin_sum(payments)
+    overshoot = smoothing & (total_paid > total_cap)
+    payments[overshoot, -1] -= total_paid[overshoot] - total_cap[overshoot]
+
+    payments[total_cap == 0] = 0.0
+    return payments
+
+
+def summarize_rows(matrix: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Per-row summary statistics, the same ones run_scenario reports.
+
+    Returns (totals, peaks, peak_months). peak_months is the first month
+    (1-12) holding the peak, or 1 when the peak is not positive.
+    """
+    totals = _builtin_sum(matrix)
+    peaks = matrix.max(axis=1)
+    peak_months = np.where(peaks > 0, matrix.argmax(axis=1) + 1, 1)
+    return totals, peaks, peak_months
+
+
+def batch_compute_scenarios(annual_oop_estimates, start_months, weights=None) -> tuple[dict, tuple]:
+    """
+    Batch version of logic.compute_scenarios.
+
+    Returns (summary, (no_cap, cap_no_smooth, cap_smooth)) where summary maps
+    each logic.ScenarioSummary field name to an array with one value per
+    beneficiary, and the three matrices are (N, 12). Values are identical to
+    the scalar kernel. Capped rows are only rebuilt for estimates above CAP,
+    and the smoothing path reuses the capped baseline and its totals.
+
+    weights is as for build_spending_matrix, so a cohort can mix profiles.
+    """
+    annual = _as_estimates(annual_oop_estimates)
+    months = _as_start_months(start_months, annual.shape[0])
+    weights = _as_weights(weights, annual.shape[0])
+
+    with stage("batch.baseline"):
+        no_cap = build_spending_matrix(annual, cap=None, weights=weights)
+        total_no_cap, max_no_cap, month_no_cap = summarize_rows(no_cap)
+
+    with stage("batch.cap"):
+        above_cap = np.maximum(annual, 0.0) > logic.CAP
+        cap_no_smooth = no_cap.copy()
+        total_cap, max_cap_no_smooth, month_cap_no_smooth = (
+            total_no_cap.copy(), max_no_cap.copy(), month_no_cap.copy()
+        )
+        if above_cap.any():
+            capped = build_spending_matrix(annual[above_cap], cap=logic.CAP, weights=weights[above_cap])
+            cap_no_smooth[above_cap] = capped
+            (
+                total_cap[above_cap],
+                max_cap_no_smooth[above_cap],
+                month_cap_no_smooth[above_cap],
+            ) = summarize_rows(capped)
+
+    with stage("batch.smoothing"):
+        cap_smooth = _smooth_matrix(cap_no_smooth, total_cap, months)
+        total_cap_smooth, max_cap_smooth, month_cap_smooth = summarize_rows(cap_smooth)
+
+    summary = {
+        "total_no_cap": total_no_cap,
+        "total_cap": total_cap,
+        "total_cap_smooth": total_cap_smooth,
+        "max_no_cap": max_no_cap,
+        "max_cap_no_smooth": max_cap_no_smooth,
+        "max_cap_smooth": max_cap_smooth,
+        "month_no_cap": month_no_cap,
+        "month_cap_no_smooth": month_cap_no_smooth,
+        "month_cap_smooth": month_cap_smooth,
+        "avoided": np.maximum(total_no_cap - total_cap, 0.0),
+    }
+    return summary, (no_cap, cap_no_smooth, cap_smooth)
+
+
+def batch_summarize_scenarios(annual_oop_estimates, start_months, weights=None) -> dict:
+    """
+    Summary arrays only; see batch_compute_scenarios.
+    """
+    return batch_compute_scenarios(annual_oop_estimates, start_months, weights)[0]
+
+
+def batch_with_smoothing_from_profile(annual_oop_estimates, start_months) -> np.ndarray:
+    """
+    Scenario 3 for N beneficiaries via the normalized profile table.
+
+    Each row is the capped total times the profile row for its start month.
+    Agrees with batch_with_smoothing up to float rounding and is much cheaper.
+    """
+    totals = np.minimum(np.maximum(_as_estimates(annual_oop_estimates), 0.0), logic.CAP)
+    months = _as_start_months(start_months, totals.shape[0])
+    table = np.asarray(logic.profile_table())
+    return totals[:, None] * table[months - 1]
+
+
+_INT64_LIMIT = 2.0 ** 63
+
+
+def _to_cents(annual_oop_estimates) -> np.ndarray:
+    estimates = _as_estimates(annual_oop_estimates)
+    with np.errstate(over="ignore"):
+        scaled = estimates * 100
+    finite = np.isfinite(scaled)
+    if not finite.all():
+        index = int(np.argmin(finite))
+        raise ValueError(
+            f"annual_oop estimate {index} must be a finite number of dollars, got {float(estimates[index])!r}"
+        )
+    fits = np.abs(scaled) < _INT64_LIMIT
+    if not fits.all():
+        index = int(np.argmin(fits))
+        raise ValueError(
+            f"annual_oop estimate {index} is too large to count in int64 cents, got {float(estimates[index])!r}"
+        )
+    return np.rint(scaled).astype(np.int64)
+
+
+def allocate_cents_matrix(total_cents: np.ndarray) -> np.ndarray:
+    """
+    Batch version of cents.allocate_cents: (N,) cents -> (N, 12) cents.
+    """
+    total_cents = np.maximum(np.asarray(total_cents, dtype=np.int64), 0)
+    plan = cents.allocation_plan()
+
+    # The residue table costs one direct allocation per residue, so it only
+    # pays off for batches at least a period long.
+    if plan.unit_total and plan.period <= min(cents.MAX_CACHED_PERIOD, total_cents.shape[0]):
+        # Allocate each residue once, then add whole periods (see cents._AllocationPlan).
+        periods, residues = np.divmod(total_cents, plan.period)
+        table = _allocate_cents_direct(np.arange(plan.period, dtype=np.int64), plan)
+        reduced = np.asarray(plan.reduced_units, dtype=np.int64)
+        return periods[:, None] * reduced[None, :] + table[residues]
+
+    return _allocate_cents_direct(total_cents, plan)
+
+
+def _allocate_cents_direct(total_cents: np.ndarray, plan) -> np.ndarray:
+    units = np.asarray(plan.units, dtype=np.int64)
+    unit_total = plan.unit_total
+
+    # total_cents * unit must fit in int64; rows that would not (totals
+    # around $1e11 and up) are allocated with Python ints instead.
+    huge = total_cents > (2 ** 63 - 1) // max(unit_total, 1)
+    if huge.any():
+        result = _allocate_cents_direct(np.where(huge, 0, total_cents), plan)
+        for i in np.flatnonzero(huge):
+            result[i] = plan.allocate_direct(int(total_cents[i]))
+        return result
+
+    amounts, remainders = np.divmod(total_cents[:, None] * units[None, :], unit_total)
+    short = total_cents - amounts.sum(axis=1)
+
+    # Rank months by remainder, largest first; the stable sort keeps the
+    # earliest month first on ties, like the scalar version.
+    order = np.argsort(-remainders, axis=1, kind="stable")
+    ranks = np.empty_like(order)
+    np.put_along_axis(ranks, order, np.arange(logic.MONTHS_IN_YEAR)[None, :], axis=1)
+    return amounts + (ranks < short[:, None])
+
+
+def batch_no_cap_cents(annual_oop_estimates) -> np.ndarray:
+    """
+    Scenario 1 in cents for N beneficiaries. Rows match cents.compute_monthly_no_cap_cents.
+    """
+    return allocate_cents_matrix(_to_cents(annual_oop_estimates))
+
+
+def batch_without_smoothing_cents(annual_oop_estimates) -> np.ndarray:
+    """
+    Scenario 2 in cents for N beneficiaries.
+    """
+    cap_cents = cents.to_cents(logic.CAP)
+    return allocate_cents_matrix(np.minimum(np.maximum(_to_cents(annual_oop_estimates), 0), cap_cents))
+
+
+def batch_with_smoothing_cents(annual_oop_estimates, start_months) -> np.ndarray:
+    """
+    Scenario 3 in cents for N beneficiaries.
+    """
+    baseline_cap = batch_without_smoothing_cents(annual_oop_estimates)
+    n = baseline_cap.shape[0]
+    k = _as_start_months(start_months, n)[:, None] - 1
+
+    column = np.arange(logic.MONTHS_IN_YEAR)[None, :]
+    before_start = column < k
+    prefix = np.where(before_start, baseline_cap, 0)
+
+    remaining_balance = baseline_cap.sum(axis=1) - prefix.sum(axis=1)
+    installment, extra = np.divmod(remaining_balance[:, None], logic.MONTHS_IN_YEAR - k)
+    smoothed = installment + (column - k < extra)
+
+    return np.where(before_start, prefix, smoothed)
@@ -0,0 +1,54 @@
+"""
+Per-call timing of the smoothing path: full rebuild vs profile table lookup.
+
+Run:
+    python bench_profile_table.py
+"""
+
+import random
+import timeit
+
+from logic import (
+    compute_monthly_with_smoothing,
+    compute_monthly_with_smoothing_from_profile,
+    profile_table,
+)
+
+CALLS = 200_000
+
+
+def main():
+    rng = random.Random(2025)
+    cases = [(rng.uniform(0, 8000), rng.randint(1, 12)) for _ in range(1000)]
+
+    # Build the table before timing so both paths are measured warm.
+    profile_table()
+
+    def run(func):
+        for annual, start in cases:
+            func(annual, start)
+
+    loops = CALLS // len(cases)
+    timings = {}
+    for label, func in [
+        ("compute_monthly_with_smoothing", compute_monthly_with_smoothing),
+        ("compute_monthly_with_smoothing_from_profile", compute_monthly_with_smoothing_from_profile),
+    ]:
+        best = min(timeit.repeat(lambda: run(func), number=loops, repeat=5))
+        timings[label] = best / (loops * len(cases)) * 1e9
+        print(f"{label:45s} {timings[label]:8.0f} ns/call")
+
+    worst = max(
+        abs(a - b)
+        for annual, start in cases
+        for a, b in zip(
+            compute_monthly_with_smoothing(annual, start),
+            compute_monthly_with_smoothing_from_profile(annual, start),
+        )
+    )
+    base, fast = timings.values()
+    print(f"Speedup: {base / fast:.1f}x, largest monthly difference: ${worst:.2e}")
+
+
+if __name__ == "__main__":
+    main()
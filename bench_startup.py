@@ -0,0 +1,63 @@
+"""
+Start-up cost of the command-line entry points.
+
+Each case is run as a fresh interpreter several times and the best wall time
+is reported, so the numbers are dominated by imports. The reference cases
+are a bare interpreter and `import matplotlib.pyplot`, which is what
+run_calculator.py and plot_example.py used to pay on every start.
+
+Run:
+    python bench_startup.py
+"""
+
+import os
+import subprocess
+import sys
+import time
+
+REPEAT = 10
+
+CASES = [
+    ("python (empty)", ["-c", "pass"]),
+    ("import logic", ["-c", "import logic"]),
+    ("cli.py single --format json", ["cli.py", "single", "3000", "--start-month", "5", "--format", "json"]),
+    ("import run_calculator", ["-c", "import run_calculator"]),
+    ("import plot_example", ["-c", "import plot_example"]),
+    ("import numpy (batch/sweep)", ["-c", "import numpy"]),
+    ("import matplotlib.pyplot", ["-c", "import matplotlib.pyplot"]),
+]
+
+
+def time_case(args: list[str]) -> float | None:
+    """
+    Best of REPEAT runs in seconds, or None if the command fails
+    (e.g. matplotlib is not installed).
+    """
+    here = os.path.dirname(os.path.abspath(__file__))
+    best = None
+    for _ in range(REPEAT):
+        started = time.perf_counter()
+        done = subprocess.run(
+            [sys.executable, *args], cwd=here, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        seconds = time.perf_counter() - started
+        if done.returncode != 0:
+            return None
+        best = seconds if best is None else min(best, seconds)
+    return best
+
+
+def main():
+    baseline = None
+    for label, args in CASES:
+        seconds = time_case(args)
+        if seconds is None:
+            print(f"{label:32s} {'failed (not installed?)':>12}")
+            continue
+        if baseline is None:
+            baseline = seconds
+        print(f"{label:32s} {seconds * 1000:8.1f} ms  (+{(seconds - baseline) * 1000:6.1f} ms over empty)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,393 @@
+"""
+Benchmark suite for the scalar, batch, rendering and streaming paths.
+
+Every case runs over a cohort of N members (default sizes 1, 1k, 100k and
+1M) built from a fixed seed, and records:
+
+- seconds for the whole cohort (best of a few runs unless one is slow)
+- per-member latency and throughput
+- peak memory allocated during one run (tracemalloc, measured in a
+  separate run so it does not slow down the timing)
+
+Python-loop paths (scalar functions, run_scenario, draw_chart, file
+streaming) stop at 100k members unless --all-sizes is given, since they
+scale linearly and 1M takes minutes. draw_chart runs on a recording canvas
+that only counts calls, so it works without a display.
+
+Results are written as JSON. With --compare, each case is checked against a
+saved baseline and anything slower (or using more memory) than the
+--threshold allows is reported as a regression; the exit status is then 1.
+
+Run:
+    python bench_suite.py -o baseline.json
+    python bench_suite.py --compare baseline.json --threshold 0.2
+    python bench_suite.py --sizes 1000,100000 --only batch
+"""
+
+import argparse
+import csv
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import timeit
+import tracemalloc
+
+import numpy as np
+
+import batch
+import cents
+import logic
+from scenario import run_scenario
+
+DEFAULT_SIZES = (1, 1_000, 100_000, 1_000_000)
+
+# Python-loop cases stop here unless --all-sizes is given.
+LOOP_MAX_SIZE = 100_000
+
+# Small sizes are looped until a measurement takes at least MIN_SECONDS;
+# the best of REPEAT measurements is kept unless one takes LONG_SECONDS.
+MIN_SECONDS = 0.2
+REPEAT = 3
+LONG_SECONDS = 2.0
+
+KINDS = ("scalar", "batch", "render", "stream")
+
+
+class RecordingCanvas:
+    """
+    Stand-in for tkinter.Canvas that counts calls instead of drawing.
+    """
+
+    def __init__(self, width: int = 700, height: int = 300):
+        self._size = {"width": width, "height": height}
+        self._next_id = 0
+        self._coords = {}
+        self.calls = 0
+
+    def __getitem__(self, key):
+        return self._size[key]
+
+    def _create(self, *coords, **options):
+        self.calls += 1
+        self._next_id += 1
+        self._coords[self._next_id] = list(coords)
+        return self._next_id
+
+    create_line = create_oval = create_rectangle = create_text = _create
+
+    def coords(self, item, *coords):
+        self.calls += 1
+        if coords:
+            self._coords[item] = list(coords)
+        return self._coords[item]
+
+    def itemconfigure(self, item, **options):
+        self.calls += 1
+
+    def delete(self, *items):
+        self.calls += 1
+
+
+def _make_inputs(size: int, seed: int = 2025) -> tuple[np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(seed)
+    annual = np.round(rng.lognormal(np.log(2500), 0.8, size), 2)
+    start = rng.integers(1, 13, size)
+    return annual, start
+
+
+def _loop(func, with_start: bool):
+    def run(annual, start):
+        if with_start:
+            for a, s in zip(annual, start):
+                func(a, s)
+        else:
+            for a in annual:
+                func(a)
+    return run
+
+
+def _draw_chart_case():
+    from gui_app import draw_chart
+
+    canvas = RecordingCanvas()
+
+    def run(annual, start):
+        for a, s in zip(annual, start):
+            months, series, _ = run_scenario(a, s, None)
+            draw_chart(canvas, months, series)
+    return run
+
+
+def _write_cohort_file(path: str, annual, start) -> None:
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f, lineterminator="\n")
+        writer.writerow(["id", "annual_oop", "start_month"])
+        writer.writerows((f"m{i}", a, s) for i, (a, s) in enumerate(zip(annual, start)))
+
+
+def _stream_case(kind: str):
+    def run(path):
+        if kind == "cohort":
+            from cohort import run_cohort
+
+            with open(os.devnull, "w") as out:
+                run_cohort(path, out, "csv", "csv")
+        else:
+            from aggregate import CashFlowAggregate
+
+            CashFlowAggregate().add_file(path, "csv")
+    return run
+
+
+def build_cases() -> list[dict]:
+    """
+    Every case: name, kind, the function to time, how it takes its inputs
+    ("lists" of Python floats/ints, "arrays", or a cohort "file"), and the
+    largest default size.
+    """
+    cases = [
+        ("_build_spending", "scalar", _loop(lambda a: logic._build_spending(a, logic.CAP), False)),
+        ("compute_monthly_no_cap", "scalar", _loop(logic.compute_monthly_no_cap, False)),
+        ("compute_monthly_without_smoothing", "scalar", _loop(logic.compute_monthly_without_smoothing, False)),
+        ("compute_monthly_with_smoothing", "scalar", _loop(logic.compute_monthly_with_smoothing, True)),
+        ("compute_scenarios", "scalar", _loop(logic.compute_scenarios, True)),
+        ("summarize_scenarios", "scalar", _loop(logic.summarize_scenarios, True)),
+        ("compute_monthly_no_cap_cents", "scalar", _loop(cents.compute_monthly_no_cap_cents, False)),
+        ("compute_monthly_without_smoothing_cents", "scalar", _loop(cents.compute_monthly_without_smoothing_cents, False)),
+        ("compute_monthly_with_smoothing_cents", "scalar", _loop(cents.compute_monthly_with_smoothing_cents, True)),
+        ("run_scenario", "render", _loop(lambda a, s: run_scenario(a, s, None), True)),
+    ]
+    result = [
+        {"name": name, "kind": kind, "run": run, "inputs": "lists", "max_size": LOOP_MAX_SIZE}
+        for name, kind, run in cases
+    ]
+
+    try:
+        draw = _draw_chart_case()
+    except ImportError:
+        draw = None  # no tkinter
+    if draw is not None:
+        result.append({
+            "name": "run_scenario + draw_chart", "kind": "render", "run": draw,
+            "inputs": "lists", "max_size": LOOP_MAX_SIZE,
+        })
+
+    for name, run in [
+        ("batch_no_cap", lambda a, s: batch.batch_no_cap(a)),
+        ("batch_without_smoothing", lambda a, s: batch.batch_without_smoothing(a)),
+        ("batch_with_smoothing", batch.batch_with_smoothing),
+        ("batch_with_smoothing_from_profile", batch.batch_with_smoothing_from_profile),
+        ("batch_compute_scenarios", batch.batch_compute_scenarios),
+        ("batch_with_smoothing_cents", batch.batch_with_smoothing_cents),
+    ]:
+        result.append({"name": name, "kind": "batch", "run": run, "inputs": "arrays", "max_size": None})
+
+    for name, run in [
+        ("cohort.run_cohort (csv)", _stream_case("cohort")),
+        ("aggregate.add_file (csv)", _stream_case("aggregate")),
+    ]:
+        result.append({"name": name, "kind": "stream", "run": run, "inputs": "file", "max_size": LOOP_MAX_SIZE})
+    return result
+
+
+def _measure(call) -> tuple[float, int, int]:
+    """
+    (best seconds per call, calls timed, peak traced bytes) for a
+    no-argument callable.
+
+    Fast calls are looped until one measurement takes MIN_SECONDS (as
+    timeit.autorange does) and the best of a few measurements is kept; calls
+    that take more than LONG_SECONDS are timed once.
+    """
+    call()  # warm up caches (profile table, allocation plan, imports)
+
+    timer = timeit.Timer(call)
+    number = 1
+    while True:
+        seconds = timer.timeit(number)
+        if seconds >= MIN_SECONDS or number >= 1_000_000:
+            break
+        number *= 10
+
+    best = seconds / number
+    timed = number
+    if seconds < LONG_SECONDS:
+        for seconds in timer.repeat(repeat=REPEAT - 1, number=number):
+            best = min(best, seconds / number)
+            timed += number
+
+    tracemalloc.start()
+    try:
+        call()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return best, timed, peak
+
+
+def run_suite(sizes, kinds=KINDS, all_sizes: bool = False, progress=None) -> dict:
+    """
+    Run every selected case at every size and return the report dict.
+    """
+    results = []
+    with tempfile.TemporaryDirectory(prefix="bench-") as tmp_dir:
+        for size in sizes:
+            annual, start = _make_inputs(size)
+            lists = (annual.tolist(), start.tolist())
+            cohort_path = None
+
+            for case in build_cases():
+                if case["kind"] not in kinds:
+                    continue
+                if case["max_size"] is not None and size > case["max_size"] and not all_sizes:
+                    continue
+
+                if case["inputs"] == "lists":
+                    call = lambda case=case: case["run"](*lists)
+                elif case["inputs"] == "arrays":
+                    call = lambda case=case: case["run"](annual, start)
+                else:
+                    if cohort_path is None:
+                        cohort_path = os.path.join(tmp_dir, f"members-{size}.csv")
+                        _write_cohort_file(cohort_path, *lists)
+                    call = lambda case=case, path=cohort_path: case["run"](path)
+
+                seconds, calls, peak = _measure(call)
+                entry = {
+                    "name": case["name"],
+                    "kind": case["kind"],
+                    "size": size,
+                    "seconds": seconds,
+                    "calls_timed": calls,
+                    "per_member_us": seconds / size * 1e6,
+                    "members_per_second": size / seconds if seconds > 0 else None,
+                    "peak_bytes": peak,
+                }
+                results.append(entry)
+                if progress is not None:
+                    progress(entry)
+
+    return {"meta": _meta(), "results": results}
+
+
+def _meta() -> dict:
+    return {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "model": logic.model_fingerprint(),
+    }
+
+
+def compare(report: dict, baseline: dict, threshold: float) -> list[dict]:
+    """
+    Cases that got slower or use more memory than (1 + threshold) times the
+    baseline. Cases missing from either side are ignored.
+    """
+    previous = {(r["name"], r["size"]): r for r in baseline["results"]}
+    regressions = []
+    for r in report["results"]:
+        old = previous.get((r["name"], r["size"]))
+        if old is None:
+            continue
+        for metric in ("seconds", "peak_bytes"):
+            if old[metric] > 0 and r[metric] > old[metric] * (1 + threshold):
+                regressions.append({
+                    "name": r["name"],
+                    "size": r["size"],
+                    "metric": metric,
+                    "baseline": old[metric],
+                    "current": r[metric],
+                    "ratio": r[metric] / old[metric],
+                })
+    return regressions
+
+
+def _print_entry(entry: dict) -> None:
+    print(
+        f"{entry['name']:40s} {entry['size']:>9,} "
+        f"{entry['seconds']:>10.4f}s {entry['per_member_us']:>10.2f} us "
+        f"{entry['members_per_second'] or 0:>13,.0f}/s {entry['peak_bytes'] / 1024 / 1024:>9.1f} MiB",
+        flush=True,
+    )
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the scalar, batch, rendering and streaming paths.")
+    parser.add_argument(
+        "--sizes",
+        default=",".join(str(s) for s in DEFAULT_SIZES),
+        help="comma separated cohort sizes (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--only",
+        default=",".join(KINDS),
+        help=f"comma separated case kinds to run, any of {', '.join(KINDS)} (default: all)",
+    )
+    parser.add_argument(
+        "--all-sizes",
+        action="store_true",
+        help=f"also run Python-loop cases above {LOOP_MAX_SIZE:,} members",
+    )
+    parser.add_argument("-o", "--output", default="bench.json", help="results file (default: bench.json)")
+    parser.add_argument("--compare", metavar="BASELINE", help="flag regressions against a saved results file")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="allowed slowdown / memory growth before flagging, as a fraction (default: 0.2)",
+    )
+    args = parser.parse_args(argv)
+
+    try:
+        sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    except ValueError:
+        sizes = []
+    kinds = [k.strip() for k in args.only.split(",") if k.strip()]
+    if not sizes or min(sizes) < 1:
+        print("error: --sizes must be positive integers", file=sys.stderr)
+        return 2
+    if not kinds or any(k not in KINDS for k in kinds):
+        print(f"error: --only must be a list of {', '.join(KINDS)}", file=sys.stderr)
+        return 2
+
+    baseline = None
+    if args.compare:
+        try:
+            with open(args.compare, encoding="utf-8") as f:
+                baseline = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"error: {e}", file=sys.stderr)
+            return 1
+
+    print(f"{'case':40s} {'members':>9} {'total':>11} {'per member':>13} {'throughput':>15} {'peak mem':>13}")
+    report = run_suite(sizes, kinds, args.all_sizes, progress=_print_entry)
+
+    try:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    except OSError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    print(f"Saved {len(report['results'])} results to {args.output}")
+
+    if baseline is None:
+        return 0
+
+    regressions = compare(report, baseline, args.threshold)
+    if not regressions:
+        print(f"No regressions over {args.threshold:.0%} against {args.compare}.")
+        return 0
+    print(f"{len(regressions)} regression(s) over {args.threshold:.0%} against {args.compare}:")
+    for r in regressions:
+        print(f"  {r['name']} @ {r['size']:,}: {r['metric']} {r['baseline']:.4g} -> {r['current']:.4g} ({r['ratio']:.2f}x)")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
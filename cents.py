@@ -0,0 +1,179 @@
+"""
+Integer-cents versions of the three scenarios.
+
+The float functions in logic.py fix rounding drift by adjusting December,
+which still leaves fractions of a cent that do not reconcile with billing.
+Here every amount is a whole number of cents:
+
+- the annual estimate is rounded to cents once (round half to even)
+- the total is split over the months with SPENDING_WEIGHTS using the
+  largest-remainder method: each month gets the floor of its exact share,
+  and the leftover cents go to the months with the largest remainders
+  (earliest month first on ties)
+- the smoothing plan splits the remaining balance into equal installments;
+  when it does not divide evenly, the earliest installments get one extra cent
+
+So each schedule sums exactly to the capped total, and the capped schedules
+never add up to more than CAP. Everything is integer arithmetic, so results
+are identical on every platform. Batch versions live in batch.py.
+"""
+
+import math
+import struct
+
+import logic
+from logic import MONTHS_IN_YEAR
+
+# Weights are turned into integers with this resolution (0.001% of the
+# year). Two-decimal weights such as the defaults are exact; fitted
+# profiles are rounded to it, which moves at most a cent or so per month
+# at CAP.
+WEIGHT_UNITS = 100_000
+
+# Allocations repeat with a period of sum(units) / gcd(units): with the
+# default two-decimal weights that is every 100 cents, and for any weights
+# summing to 1.0 it is at most about WEIGHT_UNITS. Up to this period the
+# allocation of each residue is cached (see _AllocationPlan).
+MAX_CACHED_PERIOD = 2 * WEIGHT_UNITS
+
+# The cached path keeps the twelve monthly amounts as 64-bit fields of one
+# Python int, so m * units + residue is a single big-int multiply-add
+# instead of twelve. Totals at or above _PACK_LIMIT cents would overflow a
+# field and take the list path.
+_PACK_BITS = 64
+_PACK_LIMIT = 1 << 62
+_PACK_BYTES = MONTHS_IN_YEAR * _PACK_BITS // 8
+_unpack = struct.Struct(f"<{MONTHS_IN_YEAR}q").unpack
+
+
+def _pack(amounts) -> int:
+    return sum(a << (_PACK_BITS * i) for i, a in enumerate(amounts))
+
+
+class _AllocationPlan:
+    """
+    Integer weights plus the cached allocation of each residue.
+
+    For total = m * period + r, every month's exact share is
+    m * reduced_unit + r * unit / unit_total, and the remainders only
+    depend on r. So the largest-remainder allocation of the total is
+    m * reduced_units plus the allocation of r, which is computed once per
+    residue and reused. Both are kept packed (see _pack).
+    """
+
+    __slots__ = ("units", "unit_total", "reduced_units", "packed_units", "period", "residues")
+
+    def __init__(self, weights):
+        self.units = tuple(round(w * WEIGHT_UNITS) for w in weights)
+        self.unit_total = sum(self.units)
+
+        divisor = self.unit_total
+        for u in self.units:
+            divisor = math.gcd(divisor, u)
+        divisor = divisor or 1
+        self.reduced_units = tuple(u // divisor for u in self.units)
+        self.packed_units = _pack(self.reduced_units)
+        self.period = self.unit_total // divisor
+        self.residues = {}
+
+    def allocate_direct(self, total_cents: int) -> list[int]:
+        shares = [divmod(total_cents * u, self.unit_total) for u in self.units]
+        amounts = [q for q, _ in shares]
+        short = total_cents - sum(amounts)
+        if short:
+            by_remainder = sorted(range(MONTHS_IN_YEAR), key=lambda i: -shares[i][1])
+            for i in by_remainder[:short]:
+                amounts[i] += 1
+        return amounts
+
+    def allocate(self, total_cents: int) -> list[int]:
+        if self.period > MAX_CACHED_PERIOD or self.unit_total == 0 or total_cents >= _PACK_LIMIT:
+            return self.allocate_direct(total_cents)
+
+        m, r = divmod(total_cents, self.period)
+        base = self.residues.get(r)
+        if base is None:
+            base = self.residues[r] = _pack(self.allocate_direct(r))
+        return list(_unpack((m * self.packed_units + base).to_bytes(_PACK_BYTES, "little")))
+
+
+_plan: _AllocationPlan | None = None
+_plan_weights: list[float] | None = None
+
+
+def allocation_plan() -> _AllocationPlan:
+    """
+    The allocation plan for the current SPENDING_WEIGHTS (rebuilt on change).
+    """
+    global _plan, _plan_weights
+
+    # Plans only depend on the weights; comparing the lists is cheaper than
+    # building logic._model_key() on every scalar call.
+    if logic.SPENDING_WEIGHTS != _plan_weights:
+        _plan_weights = list(logic.SPENDING_WEIGHTS)
+        _plan = _AllocationPlan(_plan_weights)
+    return _plan
+
+
+def weight_units() -> tuple[int, ...]:
+    """
+    SPENDING_WEIGHTS as integers.
+    """
+    return allocation_plan().units
+
+
+def to_cents(amount: float) -> int:
+    """
+    Round a dollar amount to whole cents (half to even).
+
+    Raises ValueError for NaN, infinities and amounts too large to scale.
+    """
+    scaled = amount * 100
+    if not math.isfinite(scaled):
+        raise ValueError(f"amount must be a finite number of dollars, got {amount!r}")
+    return round(scaled)
+
+
+def allocate_cents(total_cents: int) -> list[int]:
+    """
+    Split total_cents over the months with the largest-remainder method.
+    """
+    if total_cents <= 0:
+        return [0] * MONTHS_IN_YEAR
+    plan = _plan if logic.SPENDING_WEIGHTS == _plan_weights else allocation_plan()
+    return plan.allocate(total_cents)
+
+
+def compute_monthly_no_cap_cents(annual_oop_estimate: float) -> list[int]:
+    """
+    Scenario 1 in cents: no cap at all.
+    """
+    return allocate_cents(to_cents(annual_oop_estimate))
+
+
+def compute_monthly_without_smoothing_cents(annual_oop_estimate: float) -> list[int]:
+    """
+    Scenario 2 in cents: cap at CAP, no monthly payment plan.
+    """
+    return allocate_cents(min(to_cents(annual_oop_estimate), round(logic.CAP * 100)))
+
+
+def compute_monthly_with_smoothing_cents(annual_oop_estimate: float, start_month: int) -> list[int]:
+    """
+    Scenario 3 in cents: cap at CAP, with the monthly payment plan from
+    start_month. Same rules as compute_monthly_with_smoothing.
+    """
+    if start_month < 1:
+        start_month = 1
+    elif start_month > 12:
+        start_month = 12
+
+    total_cap = max(min(to_cents(annual_oop_estimate), round(logic.CAP * 100)), 0)
+    payments = allocate_cents(total_cap)[: start_month - 1]
+
+    remaining_balance = total_cap - sum(payments)
+    remaining_months = MONTHS_IN_YEAR - (start_month - 1)
+    installment, extra = divmod(remaining_balance, remaining_months)
+
+    payments += [installment + 1] * extra + [installment] * (remaining_months - extra)
+    return payments
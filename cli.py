@@ -0,0 +1,223 @@
+"""
+Command-line entry point for scripts.
+
+Subcommands:
+- single: one estimate and start month (or a persona), printed as text,
+  JSON or CSV
+- batch: a whole member file, same options as cohort.py
+- sweep: the estimate x start month grid, same options as sweep.py
+- gui: the Tkinter explorer
+
+Only logic.py is imported up front. NumPy, matplotlib and tkinter are
+imported inside the subcommand that needs them, so `single` starts about as
+fast as the interpreter itself. python bench_startup.py measures this.
+
+Example:
+    python cli.py single 3000 --start-month 5 --format json
+    python cli.py single --persona "Occasional user" --plot chart.png
+    python cli.py single --persona "Insulin dependent diabetic" --weights-file weight_profiles.json
+    python cli.py batch members.csv -o schedules.csv --workers 4
+"""
+
+import argparse
+import csv
+import json
+import sys
+
+import logic
+from logic import MONTH_NAMES, MONTHS_IN_YEAR, PERSONAS, compute_scenarios
+
+OUTPUT_FORMATS = ("text", "json", "csv")
+
+SERIES_LABELS = {
+    "no_cap": "No cap",
+    "cap_no_smooth": "Cap only",
+    "cap_smooth": "Cap + smoothing",
+}
+
+# Subcommands that hand their arguments on to another script's main().
+PASS_THROUGH = ("batch", "sweep")
+
+
+def _resolve_inputs(args) -> tuple[float, int]:
+    if args.persona and args.persona not in PERSONAS:
+        raise ValueError(f"unknown persona {args.persona!r}")
+    defaults = PERSONAS.get(args.persona) or {}
+
+    annual = args.annual_oop if args.annual_oop is not None else defaults.get("annual_oop")
+    if annual is None:
+        raise ValueError("give an annual estimate or a --persona")
+    start = args.start_month if args.start_month is not None else defaults.get("start_month", 1)
+    return annual, min(max(start, 1), 12)
+
+
+def _select_weights(args) -> str:
+    """
+    Load --weights-file and switch to the chosen profile. Without --weights
+    that is the profile fitted for --persona if the file has one.
+    """
+    if args.weights_file:
+        names = logic.load_weight_profiles(args.weights_file)
+        if args.weights is None and args.persona in names:
+            args.weights = args.persona
+    name = args.weights or logic.DEFAULT_WEIGHT_PROFILE
+    logic.use_weight_profile(name)
+    return name
+
+
+def _single_result(annual: float, start: int, persona: str | None, weights: str) -> dict:
+    summary, series = compute_scenarios(annual, start)
+    return {
+        "annual_oop": annual,
+        "start_month": start,
+        "persona": persona,
+        "weights": weights,
+        "summary": summary._asdict(),
+        "monthly": dict(zip(SERIES_LABELS, series)),
+    }
+
+
+def _write_single(result: dict, fmt: str, out) -> None:
+    if fmt == "json":
+        json.dump(result, out, indent=2)
+        out.write("\n")
+        return
+
+    if fmt == "csv":
+        writer = csv.writer(out, lineterminator="\n")
+        writer.writerow(["month", *SERIES_LABELS])
+        for m in range(MONTHS_IN_YEAR):
+            writer.writerow([m + 1, *(result["monthly"][name][m] for name in SERIES_LABELS)])
+        return
+
+    from scenario import run_scenario
+
+    _, _, explanation = run_scenario(result["annual_oop"], result["start_month"], result["persona"])
+    out.write(explanation + "\n\n")
+    out.write(f"{'Month':<6}" + "".join(f"{label:>18}" for label in SERIES_LABELS.values()) + "\n")
+    for m in range(MONTHS_IN_YEAR):
+        values = "".join(f"{'$' + format(result['monthly'][name][m], ',.2f'):>18}" for name in SERIES_LABELS)
+        out.write(f"{MONTH_NAMES[m]:<6}{values}\n")
+
+
+def _plot_single(result: dict, path: str | None) -> None:
+    """
+    Chart the three series with matplotlib: shown on screen, or saved to path.
+    """
+    if path:
+        import matplotlib
+
+        matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    months = list(range(1, MONTHS_IN_YEAR + 1))
+    plt.figure()
+    for name, label in SERIES_LABELS.items():
+        plt.plot(months, result["monthly"][name], marker="o", label=label)
+    plt.title(
+        f"Monthly payments, annual estimate = ${result['annual_oop']:,.0f}, "
+        f"start month = {result['start_month']}"
+    )
+    plt.xlabel("Month")
+    plt.xticks(months, MONTH_NAMES)
+    plt.ylabel("Monthly payment ($)")
+    plt.grid(True)
+    plt.legend()
+    plt.tight_layout()
+    if path:
+        plt.savefig(path)
+    else:
+        plt.show()
+
+
+def _run_single(args) -> int:
+    try:
+        annual, start = _resolve_inputs(args)
+    except ValueError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 2
+    try:
+        weights = _select_weights(args)
+    except (OSError, ValueError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+
+    result = _single_result(annual, start, args.persona, weights)
+    _write_single(result, args.format, sys.stdout)
+
+    if args.plot is not None:
+        try:
+            _plot_single(result, args.plot or None)
+        except ImportError:
+            print("error: --plot needs matplotlib (pip install matplotlib)", file=sys.stderr)
+            return 1
+        except OSError as e:
+            print(f"error: {e}", file=sys.stderr)
+            return 1
+    return 0
+
+
+def _run_pass_through(command: str, argv: list[str]) -> int:
+    if command == "batch":
+        import cohort
+
+        return cohort.main(argv)
+
+    import sweep
+
+    return sweep.main(argv)
+
+
+def _run_gui() -> int:
+    try:
+        import gui_app
+    except ImportError:
+        print("error: the GUI needs tkinter", file=sys.stderr)
+        return 1
+    gui_app.main()
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Medicare Part D 2025 out of pocket cap calculator.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    single = commands.add_parser("single", help="one estimate and start month")
+    single.add_argument("annual_oop", type=float, nargs="?", help="annual out of pocket estimate (default: from --persona)")
+    single.add_argument("-s", "--start-month", type=int, help="payment plan start month, 1-12 (default: from --persona, else 1)")
+    single.add_argument("-p", "--persona", help="use a PERSONAS preset for missing values")
+    single.add_argument("-f", "--format", choices=OUTPUT_FORMATS, default="text", help="output format (default: text)")
+    single.add_argument("--weights-file", metavar="FILE", help="weight profiles fitted by fit_weights.py")
+    single.add_argument(
+        "--weights",
+        metavar="NAME",
+        help="monthly spending profile to use (default: the --persona profile from --weights-file, else built in)",
+    )
+    single.add_argument(
+        "--plot",
+        nargs="?",
+        const="",
+        metavar="FILE",
+        help="chart the series with matplotlib; saved to FILE if given, else shown",
+    )
+
+    # add_help=False so --help reaches the wrapped script's own parser.
+    commands.add_parser("batch", add_help=False, help="run a member file (options as in cohort.py)")
+    commands.add_parser("sweep", add_help=False, help="build sweep surfaces (options as in sweep.py)")
+    commands.add_parser("gui", help="open the Tkinter explorer")
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] in PASS_THROUGH:
+        return _run_pass_through(argv[0], argv[1:])
+
+    args = build_parser().parse_args(argv)
+    if args.command == "single":
+        return _run_single(args)
+    return _run_gui()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
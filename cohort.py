@@ -0,0 +1,741 @@
+"""
+Headless cohort runner.
+
+Streams a CSV or JSONL file of beneficiaries through the three scenarios in
+fixed-size chunks and writes one output record per member: the three monthly
+schedules plus the summary numbers run_scenario shows in the GUI. Only one
+chunk is held in memory at a time, so memory use does not grow with the
+size of the input file.
+
+Input fields:
+- id: member identifier (any string)
+- annual_oop: estimated annual out of pocket spending
+- start_month: month the member enrolls in the monthly payment plan (1-12)
+- persona: optional, one of the PERSONAS names. Used to fill in a blank
+  annual_oop or start_month.
+
+With --weights-by COLUMN, each member's spending pattern is the fitted
+profile named by their value in that column (e.g. persona or drug_class);
+members without a matching profile use --weights or the built-in curve.
+
+Each record has to sit on a single line (no embedded newlines in CSV fields).
+
+Example:
+    python cohort.py members.csv -o schedules.jsonl
+    python cohort.py members.csv -o schedules.csv --workers 8 --speedup-report
+    python cohort.py members.csv -o schedules.csv --cache results.sqlite
+    python cohort.py members.csv --store results.bin
+    python cohort.py members.csv -o /dev/null --profile profile.json
+    python cohort.py members.csv -o schedules.csv --weights-file weight_profiles.json --weights insulin
+    python cohort.py members.csv -o schedules.csv --weights-file weight_profiles.json --weights-by drug_class
+"""
+
+import argparse
+import csv
+import io
+import json
+import math
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import instrument
+import logic
+from batch import batch_compute_scenarios
+from logic import MONTH_NAMES, MONTHS_IN_YEAR, PERSONAS, ScenarioSummary
+from result_cache import DEFAULT_MAX_BYTES, ResultCache
+from result_store import ResultStore
+
+DEFAULT_CHUNK_SIZE = 10_000
+
+# Byte-range shards handed out per worker process in parallel mode.
+SHARDS_PER_WORKER = 4
+
+FORMATS = ("csv", "jsonl")
+
+# Scenario keys, named after the series in run_scenario.
+SCENARIOS = ("no_cap", "cap_no_smooth", "cap_smooth")
+
+SUMMARY_FIELDS = list(ScenarioSummary._fields)
+
+RESULT_FIELDS = SCENARIOS + tuple(SUMMARY_FIELDS)
+
+# float64 values per member in a cache entry: three schedules plus the summary.
+_PACKED_WIDTH = len(SCENARIOS) * MONTHS_IN_YEAR + len(SUMMARY_FIELDS)
+
+CSV_FIELDS = (
+    ["id", "persona", "annual_oop", "start_month"]
+    + [f"{scenario}_{m:02d}" for scenario in SCENARIOS for m in range(1, MONTHS_IN_YEAR + 1)]
+    + SUMMARY_FIELDS
+)
+
+
+def guess_format(path: str, default: str = "csv") -> str:
+    """
+    Pick csv or jsonl from a file name, falling back to `default`.
+    """
+    lowered = path.lower()
+    if lowered.endswith((".jsonl", ".ndjson", ".json")):
+        return "jsonl"
+    if lowered.endswith(".csv"):
+        return "csv"
+    return default
+
+
+def parse_member(fields: dict, where: str) -> tuple[str, float, int, str]:
+    """
+    Turn one raw input record into (id, annual_oop, start_month, persona).
+
+    Blank annual_oop / start_month fall back to the persona defaults when a
+    known persona is given. start_month defaults to January otherwise.
+    """
+    member_id = fields.get("id")
+    if member_id is None or str(member_id).strip() == "":
+        raise ValueError(f"{where}: missing id")
+    member_id = str(member_id).strip()
+
+    persona = fields.get("persona") or ""
+    persona = str(persona).strip()
+    defaults = PERSONAS.get(persona) or {}
+
+    annual = fields.get("annual_oop")
+    if annual is None or str(annual).strip() == "":
+        if not defaults:
+            raise ValueError(f"{where}: missing annual_oop for member {member_id}")
+        annual = defaults["annual_oop"]
+
+    start = fields.get("start_month")
+    if start is None or str(start).strip() == "":
+        start = defaults.get("start_month", 1)
+
+    try:
+        annual_val = float(annual)
+        start_val = int(start)
+    except (TypeError, ValueError):
+        raise ValueError(
+            f"{where}: annual_oop must be a number and start_month an integer "
+            f"(member {member_id})"
+        ) from None
+    if not math.isfinite(annual_val):
+        raise ValueError(f"{where}: annual_oop must be finite, got {annual!r} (member {member_id})")
+
+    start_val = min(max(start_val, 1), 12)
+    return member_id, annual_val, start_val, persona
+
+
+def iter_lines(path: str, start: int = 0, end: int | None = None):
+    """
+    Yield (byte_offset, text) for the lines whose first byte falls in
+    [start, end). With the default range this is every line in the file.
+    """
+    with open(path, "rb") as f:
+        if start > 0:
+            # Back up one byte: if start is exactly on a line boundary we keep
+            # that line, otherwise we skip the partial line before it.
+            f.seek(start - 1)
+            f.readline()
+        pos = f.tell()
+        while end is None or pos < end:
+            raw = f.readline()
+            if not raw:
+                break
+            yield pos, raw.decode("utf-8")
+            pos += len(raw)
+
+
+def read_csv_header(path: str) -> list[str]:
+    """
+    Return the column names from the first line of a CSV file.
+    """
+    with open(path, "rb") as f:
+        first = f.readline().decode("utf-8-sig")
+    header = next(csv.reader([first]), None)
+    if not header:
+        raise ValueError(f"{path}: empty CSV file")
+    return [name.strip() for name in header]
+
+
+def iter_records(path: str, fmt: str, start: int = 0, end: int | None = None):
+    """
+    Yield (where, fields) for every raw input record, fields being the dict
+    of column values as read. `where` locates the record for error messages.
+
+    start/end restrict reading to the lines that begin inside that byte range.
+    """
+    header = read_csv_header(path) if fmt == "csv" else None
+
+    for pos, line in iter_lines(path, start, end):
+        if not line.strip():
+            continue
+        if fmt == "csv":
+            if pos == 0:
+                continue  # header line
+            values = next(csv.reader([line]))
+            fields = dict(zip(header, values))
+        else:
+            try:
+                fields = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"{path} @ byte {pos}: invalid JSON ({e.msg})") from None
+            if not isinstance(fields, dict):
+                raise ValueError(f"{path} @ byte {pos}: expected a JSON object")
+
+        yield f"{path} @ byte {pos}", fields
+
+
+def iter_member_chunks(
+    path: str,
+    fmt: str,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    start: int = 0,
+    end: int | None = None,
+    weights_by: str | None = None,
+):
+    """
+    Yield lists of parsed members, at most `chunk_size` per list.
+
+    start/end restrict reading to the lines that begin inside that byte range.
+    With weights_by, each member tuple gets a fifth element: the member's
+    value in that column, naming their weight profile (see member_weights).
+    """
+    chunk = []
+
+    for where, fields in iter_records(path, fmt, start, end):
+        member = parse_member(fields, where)
+        if weights_by is not None:
+            value = fields.get(weights_by)
+            member += ("" if value is None else str(value).strip(),)
+        chunk.append(member)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+
+    if chunk:
+        yield chunk
+
+
+def member_weights(members) -> np.ndarray:
+    """
+    (N, 12) spending weights for members read with weights_by: the profile
+    in logic.WEIGHT_PROFILES named by each member's value, or
+    SPENDING_WEIGHTS when there is no such profile.
+    """
+    rows = {}
+    index = np.fromiter(
+        (rows.setdefault(m[4], len(rows)) for m in members), dtype=np.intp, count=len(members)
+    )
+    table = np.array(
+        [logic.WEIGHT_PROFILES.get(name, logic.SPENDING_WEIGHTS) for name in rows], dtype=float
+    ).reshape(-1, MONTHS_IN_YEAR)
+    return table[index]
+
+
+def compute_chunk(members: list[tuple[str, float, int, str]], weights: np.ndarray | None = None) -> dict:
+    """
+    Run the three scenarios for one chunk of members.
+
+    weights is None for SPENDING_WEIGHTS, else one row per member (see
+    member_weights). Returns a dict with the three (N, 12) schedule
+    matrices under the SCENARIOS keys plus one array per SUMMARY_FIELDS
+    entry.
+    """
+    annual = np.fromiter((m[1] for m in members), dtype=float, count=len(members))
+    start = np.fromiter((m[2] for m in members), dtype=np.int64, count=len(members))
+
+    summary, series = batch_compute_scenarios(annual, start, weights)
+    return dict(zip(SCENARIOS, series), **summary)
+
+
+def compute_chunk_cached(
+    members: list[tuple[str, float, int, str]], cache: ResultCache, weights: np.ndarray | None = None
+) -> dict:
+    """
+    Like compute_chunk, but reuse cached results for members whose inputs
+    were seen before and only run the kernel on the rest.
+
+    Returns a dict with the same keys as compute_chunk. Newly computed
+    results are added to the cache.
+    """
+    n = len(members)
+    annual = np.fromiter((m[1] for m in members), dtype=float, count=n)
+    start = np.fromiter((m[2] for m in members), dtype=np.int64, count=n)
+    keys = cache.keys(annual, start, weights)
+    found = cache.get_many(keys)
+
+    hit = np.fromiter((key in found for key in keys), dtype=bool, count=n)
+    packed = np.empty((n, _PACKED_WIDTH))
+    if hit.any():
+        payloads = b"".join(found[key] for key, is_hit in zip(keys, hit) if is_hit)
+        packed[hit] = np.frombuffer(payloads).reshape(-1, _PACKED_WIDTH)
+
+    miss = np.flatnonzero(~hit)
+    if miss.size:
+        summary, series = batch_compute_scenarios(
+            annual[miss], start[miss], None if weights is None else weights[miss]
+        )
+        computed = dict(zip(SCENARIOS, series), **summary)
+        rows = np.concatenate(
+            [computed[name].reshape(miss.size, -1).astype(float) for name in RESULT_FIELDS], axis=1
+        )
+        packed[miss] = rows
+        values = rows.view(f"V{rows.itemsize * _PACKED_WIDTH}").ravel().tolist()
+        # Duplicate inputs within the chunk are stored once.
+        cache.put_many(dict(zip((keys[i] for i in miss), values)).items())
+
+    results = {}
+    column = 0
+    for name in RESULT_FIELDS:
+        if name in SCENARIOS:
+            results[name] = packed[:, column:column + MONTHS_IN_YEAR]
+            column += MONTHS_IN_YEAR
+        else:
+            results[name] = packed[:, column]
+            if name.startswith("month_"):
+                results[name] = results[name].astype(np.int64)
+            column += 1
+    return results
+
+
+def _output_rows(members, results):
+    """
+    Yield one plain dict per member, ready for CSV or JSON output.
+    """
+    columns = {name: results[name].tolist() for name in RESULT_FIELDS}
+
+    for i, (member_id, annual, start, persona, *_) in enumerate(members):
+        row = {
+            "id": member_id,
+            "persona": persona,
+            "annual_oop": annual,
+            "start_month": start,
+        }
+        for name in SCENARIOS:
+            row[name] = columns[name][i]
+        for name in SUMMARY_FIELDS:
+            value = columns[name][i]
+            row[name] = MONTH_NAMES[value - 1] if name.startswith("month_") else value
+        yield row
+
+
+def write_chunk(out, fmt: str, members, results) -> None:
+    """
+    Write one computed chunk to a text stream.
+    """
+    if fmt == "jsonl":
+        for row in _output_rows(members, results):
+            out.write(json.dumps(row))
+            out.write("\n")
+        return
+
+    writer = csv.writer(out, lineterminator="\n")
+    for row in _output_rows(members, results):
+        flat = [row["id"], row["persona"], row["annual_oop"], row["start_month"]]
+        for name in SCENARIOS:
+            flat.extend(row[name])
+        flat.extend(row[name] for name in SUMMARY_FIELDS)
+        writer.writerow(flat)
+
+
+def write_header(out, fmt: str) -> None:
+    """
+    Write the CSV header line. JSONL output has no header.
+    """
+    if fmt == "csv":
+        csv.writer(out, lineterminator="\n").writerow(CSV_FIELDS)
+
+
+def run_cohort(
+    in_path: str,
+    out,
+    in_fmt: str,
+    out_fmt: str,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    start: int = 0,
+    end: int | None = None,
+    header: bool = True,
+    cache: ResultCache | None = None,
+    store: ResultStore | None = None,
+    weights_by: str | None = None,
+) -> int:
+    """
+    Stream `in_path` through the scenarios and write results to `out`.
+
+    With a cache, only members whose inputs are not cached are computed.
+    With a store, results are also appended to it; out may then be None to
+    skip the text output. With weights_by, each member's profile is picked
+    by that column (see member_weights). Returns the number of members
+    processed.
+    """
+    if header and out is not None:
+        write_header(out, out_fmt)
+
+    count = 0
+    chunks = iter_member_chunks(in_path, in_fmt, chunk_size, start, end, weights_by)
+    while True:
+        with instrument.stage("cohort.parse"):
+            members = next(chunks, None)
+        if members is None:
+            break
+        with instrument.stage("cohort.compute"):
+            weights = None if weights_by is None else member_weights(members)
+            if cache is None:
+                results = compute_chunk(members, weights)
+            else:
+                results = compute_chunk_cached(members, cache, weights)
+        if out is not None:
+            with instrument.stage("cohort.write"):
+                write_chunk(out, out_fmt, members, results)
+        if store is not None:
+            with instrument.stage("cohort.store"):
+                store.append(members, results)
+        count += len(members)
+    return count
+
+
+def count_lines(path: str, cancel=None) -> int:
+    """
+    Upper bound on the number of records in a file (newlines + 1).
+
+    cancel is an optional threading.Event; once it is set, counting stops
+    and the count so far is returned.
+    """
+    count = 1
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            if cancel is not None and cancel.is_set():
+                break
+            count += block.count(b"\n")
+    return count
+
+
+def shard_ranges(path: str, shards: int) -> list[tuple[int, int]]:
+    """
+    Split a file into `shards` byte ranges of roughly equal size.
+
+    Ranges are raw byte offsets; iter_member_chunks assigns each line to the
+    range that holds its first byte, so every line is read exactly once.
+    """
+    size = os.path.getsize(path)
+    bounds = [size * i // shards for i in range(shards + 1)]
+    return [(bounds[i], bounds[i + 1]) for i in range(shards) if bounds[i] < bounds[i + 1]]
+
+
+def _run_shard(
+    in_path, in_fmt, out_fmt, chunk_size, start, end, shard_path, cache_info, weights_by
+) -> tuple[int, dict | None]:
+    """
+    Worker entry point: process one byte range into its own output file.
+
+    cache_info is (path, generation) of the parent's cache, or None. Returns
+    the member count and, when instrumentation is on, this shard's counters.
+    """
+    cache = None
+    if cache_info is not None:
+        cache_path, generation = cache_info
+        cache = ResultCache(cache_path, generation=generation)
+    try:
+        instrument.reset()
+        with open(shard_path, "w", encoding="utf-8", newline="") as out:
+            count = run_cohort(
+                in_path, out, in_fmt, out_fmt, chunk_size, start, end,
+                header=False, cache=cache, weights_by=weights_by,
+            )
+        return count, (instrument.export_state() if instrument.is_enabled() else None)
+    finally:
+        if cache is not None:
+            cache.close()
+
+
+def _init_worker(weights: tuple, profiles: dict, profile: tuple | None) -> None:
+    """
+    Pool initializer: use the parent's spending weights and weight profiles
+    (fitted profiles may be in use) and instrumentation settings, whatever
+    the start method.
+    """
+    logic.SPENDING_WEIGHTS[:] = weights
+    logic.WEIGHT_PROFILES.update(profiles)
+    if profile is not None:
+        instrument.enable(*profile)
+
+
+def run_cohort_parallel(
+    in_path: str,
+    out_path: str,
+    in_fmt: str,
+    out_fmt: str,
+    workers: int,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    cache: ResultCache | None = None,
+    weights_by: str | None = None,
+) -> int:
+    """
+    Process `in_path` with a pool of `workers` processes.
+
+    The file is cut into byte-range shards (a few per worker so a slow shard
+    does not hold up the rest). Each worker writes its shard to a temporary
+    file and the shards are concatenated in input order, so the output is
+    byte-identical to a single-process run whatever the worker count.
+
+    out_path may be "-" for stdout. With a cache, workers open their own
+    connection to it. Workers use this process's SPENDING_WEIGHTS and
+    WEIGHT_PROFILES. If
+    instrumentation is on, it is turned on in the workers too and their
+    counters are merged into this process's. Returns the number of members
+    processed.
+    """
+    ranges = shard_ranges(in_path, max(workers * SHARDS_PER_WORKER, 1))
+    cache_info = None if cache is None else (cache.path, cache.generation)
+
+    profile = None
+    if instrument.is_enabled():
+        settings = instrument.snapshot()
+        profile = (settings["sample_every"], settings["allocations"])
+    initargs = (tuple(logic.SPENDING_WEIGHTS), dict(logic.WEIGHT_PROFILES), profile)
+
+    with tempfile.TemporaryDirectory(prefix="cohort-") as tmp_dir:
+        shard_paths = [os.path.join(tmp_dir, f"shard-{i:05d}") for i in range(len(ranges))]
+
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=initargs) as pool:
+            futures = [
+                pool.submit(
+                    _run_shard,
+                    in_path, in_fmt, out_fmt, chunk_size, start, end, shard_path, cache_info, weights_by,
+                )
+                for (start, end), shard_path in zip(ranges, shard_paths)
+            ]
+            count = 0
+            for future in futures:
+                shard_count, metrics = future.result()
+                count += shard_count
+                if metrics is not None:
+                    instrument.merge_state(metrics)
+
+        header = io.StringIO()
+        write_header(header, out_fmt)
+
+        if out_path == "-":
+            sys.stdout.flush()
+            _concat(sys.stdout.buffer, header.getvalue(), shard_paths)
+            sys.stdout.buffer.flush()
+        else:
+            with open(out_path, "wb") as out:
+                _concat(out, header.getvalue(), shard_paths)
+
+    return count
+
+
+def _concat(out, header: str, shard_paths: list[str]) -> None:
+    out.write(header.encode("utf-8"))
+    for shard_path in shard_paths:
+        with open(shard_path, "rb") as shard:
+            shutil.copyfileobj(shard, out)
+
+
+def _run(
+    args,
+    in_fmt: str,
+    out_fmt: str,
+    workers: int,
+    out_path: str | None,
+    cache: ResultCache | None = None,
+    store: ResultStore | None = None,
+) -> int:
+    if workers > 1:
+        return run_cohort_parallel(
+            args.input, out_path, in_fmt, out_fmt, workers, args.chunk_size, cache=cache,
+            weights_by=args.weights_by,
+        )
+
+    if out_path is None or out_path == "-":
+        out = None if out_path is None else sys.stdout
+        return run_cohort(
+            args.input, out, in_fmt, out_fmt, args.chunk_size, cache=cache, store=store,
+            weights_by=args.weights_by,
+        )
+    with open(out_path, "w", encoding="utf-8", newline="") as out:
+        return run_cohort(
+            args.input, out, in_fmt, out_fmt, args.chunk_size, cache=cache, store=store,
+            weights_by=args.weights_by,
+        )
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Run the Part D cap scenarios for every member in a CSV or JSONL file."
+    )
+    parser.add_argument("input", help="CSV or JSONL file with id, annual_oop, start_month[, persona]")
+    parser.add_argument(
+        "-o",
+        "--output",
+        help="output file, - for stdout (default: stdout, or none when --store is given)",
+    )
+    parser.add_argument("--input-format", choices=FORMATS, help="default: from the file name")
+    parser.add_argument("--output-format", choices=FORMATS, help="default: from the file name, else csv")
+    parser.add_argument(
+        "--store",
+        metavar="PATH",
+        help="also write results to a memory-mapped columnar store (see result_store.py)",
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=DEFAULT_CHUNK_SIZE,
+        help=f"members per batch (default: {DEFAULT_CHUNK_SIZE})",
+    )
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=1,
+        help="worker processes; 0 means one per CPU (default: 1)",
+    )
+    parser.add_argument(
+        "--speedup-report",
+        action="store_true",
+        help="also time a single-process run and report the parallel speedup",
+    )
+    parser.add_argument(
+        "--cache",
+        metavar="PATH",
+        help="SQLite result cache; only members with new or changed inputs are recomputed",
+    )
+    parser.add_argument(
+        "--cache-max-mb",
+        type=float,
+        default=DEFAULT_MAX_BYTES / 1024 / 1024,
+        help="evict least recently used cache entries above this size (default: %(default).0f)",
+    )
+    parser.add_argument("--weights-file", metavar="FILE", help="weight profiles fitted by fit_weights.py")
+    parser.add_argument(
+        "--weights",
+        metavar="NAME",
+        help="monthly spending profile for every member (default: the built-in SPENDING_WEIGHTS)",
+    )
+    parser.add_argument(
+        "--weights-by",
+        metavar="COLUMN",
+        help="pick each member's profile from --weights-file by this column (e.g. persona, drug_class); "
+        "members without a matching profile use --weights",
+    )
+    parser.add_argument(
+        "--profile",
+        metavar="FILE",
+        help="time parsing, compute and output stages and the logic.py functions; "
+        "write the counters to FILE (.prom/.txt for Prometheus text, else JSON)",
+    )
+    parser.add_argument(
+        "--profile-sample",
+        type=int,
+        default=1,
+        metavar="N",
+        help="with --profile, time one call in N (default: 1)",
+    )
+    parser.add_argument(
+        "--profile-allocations",
+        action="store_true",
+        help="with --profile, also count net memory blocks allocated per call",
+    )
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+
+    if args.chunk_size < 1:
+        print("error: --chunk-size must be at least 1", file=sys.stderr)
+        return 2
+    if args.workers < 0:
+        print("error: --workers must be 0 or more", file=sys.stderr)
+        return 2
+    if args.profile_sample < 1:
+        print("error: --profile-sample must be at least 1", file=sys.stderr)
+        return 2
+
+    if args.weights_by and not args.weights_file:
+        print("error: --weights-by needs --weights-file", file=sys.stderr)
+        return 2
+
+    workers = args.workers or os.cpu_count() or 1
+    if args.store and workers > 1:
+        print("error: --store writes from a single process; use --workers 1", file=sys.stderr)
+        return 2
+
+    output = args.output if args.output or args.store else "-"
+    in_fmt = args.input_format or guess_format(args.input)
+    out_fmt = args.output_format or guess_format(output or "-")
+
+    cache = None
+    store = None
+    try:
+        if args.weights_file:
+            logic.load_weight_profiles(args.weights_file)
+        if args.weights:
+            logic.use_weight_profile(args.weights)
+        if args.weights_by and in_fmt == "csv" and args.weights_by not in read_csv_header(args.input):
+            raise ValueError(f"{args.input}: no {args.weights_by!r} column for --weights-by")
+
+        if args.speedup_report:
+            started = time.perf_counter()
+            _run(args, in_fmt, out_fmt, 1, os.devnull)
+            serial_seconds = time.perf_counter() - started
+
+        if args.cache:
+            cache = ResultCache(args.cache, max_bytes=int(args.cache_max_mb * 1024 * 1024))
+        if args.store:
+            store = ResultStore.create(args.store, count_lines(args.input))
+
+        if args.profile:
+            instrument.enable(args.profile_sample, args.profile_allocations)
+
+        started = time.perf_counter()
+        count = _run(args, in_fmt, out_fmt, workers, output, cache, store)
+        if store is not None:
+            store.flush()
+        seconds = time.perf_counter() - started
+
+        if cache is not None:
+            reused, computed = cache.run_stats()
+            evicted = cache.evicted + cache.evict()
+        if args.profile:
+            instrument.disable()
+            instrument.dump(args.profile)
+    except (OSError, ValueError, sqlite3.Error) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        if cache is not None:
+            cache.close()
+
+    rate = count / seconds if seconds > 0 else 0.0
+    print(
+        f"Processed {count:,} members in {seconds:.2f}s "
+        f"with {workers} worker(s) ({rate:,.0f} members/s).",
+        file=sys.stderr,
+    )
+    if cache is not None:
+        print(
+            f"Cache: {reused:,} results reused, {computed:,} computed, "
+            f"{evicted:,} entries evicted.",
+            file=sys.stderr,
+        )
+    if args.profile:
+        print(instrument.format_table(), file=sys.stderr)
+    if args.speedup_report:
+        speedup = serial_seconds / seconds if seconds > 0 else 0.0
+        print(
+            f"Single process: {serial_seconds:.2f}s. "
+            f"Speedup with {workers} worker(s): {speedup:.2f}x "
+            f"({speedup / workers:.0%} parallel efficiency).",
+            file=sys.stderr,
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
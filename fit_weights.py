@@ -0,0 +1,512 @@
+"""
+Fit monthly spending profiles from historical claims.
+
+logic.SPENDING_WEIGHTS is one front-loaded curve for everybody. This streams
+claims files once and works out, per group (persona by default, or any
+column such as drug_class), what share of the year's out of pocket spending
+lands in each calendar month. The result is a set of named weight profiles
+that logic.load_weight_profiles() / logic.use_weight_profile() can use in
+place of the built-in curve.
+
+Claims files are CSV or JSONL with one claim per line:
+- month: 1-12, or an ISO date (2024-03 or 2024-03-15) to take the month from
+- amount: out of pocket dollars for the claim (reversals may be negative)
+- the --group-by column, e.g. persona or drug_class
+
+Per group the fit only keeps the claim count and twelve running month
+totals in whole cents, so memory does not depend on file size, totals are
+exact, and partial fits merge in any order. --workers splits every file into
+byte-range shards (as in cohort.py) and merges the shard fits.
+
+The output file doubles as a cache: it keeps the month totals of every
+source file with its size and modification time, so re-running with the
+same files reads nothing, and adding a file only streams the new one.
+Groups with fewer than --min-claims claims are left out (too noisy); the
+"all" profile covers every claim.
+
+Example:
+    python fit_weights.py claims_2023.csv claims_2024.csv --group-by drug_class -w 4
+    python cli.py single 3000 --weights-file weight_profiles.json --weights insulin
+"""
+
+import argparse
+import csv
+import json
+import math
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from cohort import (
+    FORMATS,
+    SHARDS_PER_WORKER,
+    guess_format,
+    iter_lines,
+    iter_records,
+    read_csv_header,
+    shard_ranges,
+)
+from logic import DEFAULT_WEIGHT_PROFILE, MONTH_NAMES, MONTHS_IN_YEAR, WEIGHT_PROFILES
+
+# Bump when the way claims are read or summed changes, so cached month
+# totals are refitted.
+FIT_VERSION = 1
+
+DEFAULT_OUTPUT = "weight_profiles.json"
+DEFAULT_CHUNK_SIZE = 50_000
+DEFAULT_MIN_CLAIMS = 1000
+
+# Profile fitted from every claim, whatever its group.
+OVERALL = "all"
+
+# Label for claims with a blank group value.
+BLANK_GROUP = "(none)"
+
+
+def _parse_claim(month, amount) -> tuple[int, int]:
+    """
+    Turn raw month and amount values into (month 1-12, amount in cents).
+    """
+    try:
+        text = str(month).strip()
+        # ISO dates: the month is the second field of YYYY-MM[-DD].
+        month_val = int(text[5:7]) if len(text) >= 7 and text[4] == "-" else int(text)
+        dollars = float(amount)
+    except (TypeError, ValueError):
+        raise ValueError("expected month (1-12 or YYYY-MM-DD) and amount") from None
+    if not math.isfinite(dollars * 100):
+        raise ValueError(f"amount must be a finite number of dollars, got {amount!r}")
+    cents = round(dollars * 100)
+    if not 1 <= month_val <= MONTHS_IN_YEAR:
+        raise ValueError(f"month {month_val} is not 1-12")
+    return month_val, cents
+
+
+def _group_value(value) -> str:
+    value = "" if value is None else str(value).strip()
+    return value or BLANK_GROUP
+
+
+def _claim_columns(path: str, group_by: str | None) -> tuple[int, int, int | None]:
+    """
+    Positions of the month, amount and group columns in a claims CSV.
+    """
+    header = read_csv_header(path)
+    wanted = ["month", "amount"] + ([] if group_by is None else [group_by])
+    missing = [name for name in wanted if name not in header]
+    if missing:
+        raise ValueError(f"{path}: missing column(s) {', '.join(missing)}")
+    group_col = None if group_by is None else header.index(group_by)
+    return header.index("month"), header.index("amount"), group_col
+
+
+def iter_claims(path: str, fmt: str, group_by: str | None, start: int = 0, end: int | None = None):
+    """
+    Yield (month, cents, group) for every claim in a file, or in the lines
+    that begin inside the byte range start-end.
+
+    CSV files go through one csv.reader and column positions rather than a
+    dict per line (cohort.iter_records), which is what most of the time
+    goes on for claims files with tens of millions of lines.
+    """
+    if fmt != "csv":
+        for where, fields in iter_records(path, fmt, start, end):
+            try:
+                month, cents = _parse_claim(fields.get("month"), fields.get("amount"))
+            except ValueError as e:
+                raise ValueError(f"{where}: {e}") from None
+            yield month, cents, (OVERALL if group_by is None else _group_value(fields.get(group_by)))
+        return
+
+    month_col, amount_col, group_col = _claim_columns(path, group_by)
+    position = 0
+
+    def lines():
+        nonlocal position
+        for pos, line in iter_lines(path, start, end):
+            if pos == 0 or not line.strip():
+                continue  # header line or blank
+            position = pos
+            yield line
+
+    for values in csv.reader(lines()):
+        try:
+            month, cents = _parse_claim(values[month_col], values[amount_col])
+            group = OVERALL if group_col is None else (values[group_col].strip() or BLANK_GROUP)
+        except (ValueError, IndexError) as e:
+            problem = e if isinstance(e, ValueError) else "too few columns"
+            raise ValueError(f"{path} @ byte {position}: {problem}") from None
+        yield month, cents, group
+
+
+class _GroupSums:
+    """
+    Running totals for one group.
+    """
+
+    __slots__ = ("claims", "month_cents")
+
+    def __init__(self):
+        self.claims = 0
+        self.month_cents = np.zeros(MONTHS_IN_YEAR, dtype=np.int64)
+
+    def merge(self, other: "_GroupSums") -> None:
+        self.claims += other.claims
+        self.month_cents += other.month_cents
+
+    def weights(self) -> list[float] | None:
+        """
+        Month shares of the total, or None if there is nothing to share out.
+        Months that net out negative (more reversals than claims) count as 0.
+        """
+        positive = np.maximum(self.month_cents, 0)
+        total = int(positive.sum())
+        if total <= 0:
+            return None
+        return (positive / total).tolist()
+
+
+class WeightFit:
+    """
+    Mergeable per-group month totals of claims.
+
+    Feed it with add_chunk() (or add_file()), combine partial fits with
+    merge(), and turn the totals into weight profiles with profiles().
+    """
+
+    def __init__(self, group_by: str | None = "persona"):
+        self.group_by = group_by
+        self.groups: dict[str, _GroupSums] = {}
+
+    def add_chunk(self, months: list[int], cents: list[int], groups: list[str]) -> None:
+        """
+        Add one chunk of parsed claims: month (1-12), cents and group name of
+        each claim.
+        """
+        n = len(months)
+        if n == 0:
+            return
+        index = {}
+        codes = np.fromiter((index.setdefault(g, len(index)) for g in groups), dtype=np.intp, count=n)
+        month_index = np.fromiter(months, dtype=np.intp, count=n) - 1
+
+        sums = np.zeros((len(index), MONTHS_IN_YEAR), dtype=np.int64)
+        np.add.at(sums, (codes, month_index), np.fromiter(cents, dtype=np.int64, count=n))
+        claims = np.bincount(codes, minlength=len(index))
+
+        for name, code in index.items():
+            totals = self.groups.get(name)
+            if totals is None:
+                totals = self.groups[name] = _GroupSums()
+            totals.claims += int(claims[code])
+            totals.month_cents += sums[code]
+
+    def add_file(
+        self,
+        path: str,
+        fmt: str,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        start: int = 0,
+        end: int | None = None,
+    ) -> int:
+        """
+        Stream a claims file (or the byte range start-end of it) into the
+        totals. Returns the number of claims added.
+        """
+        count = 0
+        months, cents, groups = [], [], []
+        for month, amount, group in iter_claims(path, fmt, self.group_by, start, end):
+            months.append(month)
+            cents.append(amount)
+            groups.append(group)
+            if len(months) >= chunk_size:
+                self.add_chunk(months, cents, groups)
+                count += len(months)
+                months, cents, groups = [], [], []
+        self.add_chunk(months, cents, groups)
+        return count + len(months)
+
+    def merge(self, other: "WeightFit") -> "WeightFit":
+        """
+        Fold another partial fit (same grouping) into this one.
+        """
+        if other.group_by != self.group_by:
+            raise ValueError("can only merge fits with the same grouping")
+        for name, theirs in other.groups.items():
+            ours = self.groups.get(name)
+            if ours is None:
+                ours = self.groups[name] = _GroupSums()
+            ours.merge(theirs)
+        return self
+
+    def total(self) -> _GroupSums:
+        """
+        Totals over every group.
+        """
+        overall = _GroupSums()
+        for totals in self.groups.values():
+            overall.merge(totals)
+        return overall
+
+    def profiles(self, min_claims: int = DEFAULT_MIN_CLAIMS) -> tuple[dict, list[str]]:
+        """
+        ({name: {"weights", "claims", "total_oop"}}, skipped group names).
+
+        Every group with at least min_claims claims gets a profile, plus
+        OVERALL for all claims together. Groups whose value is itself OVERALL
+        or the built-in profile's name are renamed "<group_by>:<value>" so
+        they replace neither.
+        """
+        profiles = {}
+        skipped = []
+        if self.group_by is None:
+            rows = [(OVERALL, self.total())]
+        else:
+            rows = [
+                (f"{self.group_by}:{name}" if name in (OVERALL, DEFAULT_WEIGHT_PROFILE) else name, totals)
+                for name, totals in sorted(self.groups.items())
+            ]
+            rows.append((OVERALL, self.total()))
+        for name, totals in rows:
+            weights = totals.weights()
+            if weights is None or (name != OVERALL and totals.claims < min_claims):
+                skipped.append(name)
+                continue
+            profiles[name] = {
+                "weights": weights,
+                "claims": totals.claims,
+                "total_oop": int(totals.month_cents.sum()) / 100,
+            }
+        return profiles, skipped
+
+    def to_state(self) -> dict:
+        """
+        The raw totals as plain JSON data; see from_state().
+        """
+        return {
+            name: {"claims": totals.claims, "month_cents": totals.month_cents.tolist()}
+            for name, totals in sorted(self.groups.items())
+        }
+
+    @classmethod
+    def from_state(cls, group_by: str | None, state: dict) -> "WeightFit":
+        fit = cls(group_by)
+        for name, values in state.items():
+            totals = fit.groups[name] = _GroupSums()
+            totals.claims = int(values["claims"])
+            totals.month_cents = np.array(values["month_cents"], dtype=np.int64)
+        return fit
+
+
+def _fit_shard(path, fmt, group_by, chunk_size, start, end) -> WeightFit:
+    fit = WeightFit(group_by)
+    fit.add_file(path, fmt, chunk_size, start, end)
+    return fit
+
+
+def _source_key(path: str) -> dict:
+    """
+    What a cached fit of `path` is valid for.
+    """
+    stat = os.stat(path)
+    return {"path": os.path.abspath(path), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def _load_cache(cache_path: str | None, group_by: str | None) -> dict:
+    """
+    {absolute path: source entry} from a previous output file, keeping only
+    entries fitted the same way. A missing or unreadable file is an empty cache.
+    """
+    if not cache_path or not os.path.exists(cache_path):
+        return {}
+    try:
+        with open(cache_path, encoding="utf-8") as f:
+            saved = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(saved, dict) or saved.get("fit_version") != FIT_VERSION or saved.get("group_by") != group_by:
+        return {}
+    return {entry["path"]: entry for entry in saved.get("sources", []) if isinstance(entry, dict) and "path" in entry}
+
+
+def fit_files(
+    paths: list[str],
+    fmt: str | None = None,
+    group_by: str | None = "persona",
+    workers: int = 1,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    cache_path: str | None = None,
+) -> tuple[WeightFit, list[dict], list[str]]:
+    """
+    Fit every claims file, reusing month totals cached in `cache_path`.
+
+    Returns (combined fit, source entries for the cache, paths that had to
+    be read). fmt None means guess from each file name.
+    """
+    cached = _load_cache(cache_path, group_by)
+    sources = []
+    to_fit = []
+    for path in paths:
+        key = _source_key(path)
+        if any(entry["path"] == key["path"] for entry in sources):
+            continue
+        entry = cached.get(key["path"])
+        if entry is not None and (entry.get("size"), entry.get("mtime_ns")) == (key["size"], key["mtime_ns"]):
+            sources.append(entry)
+            continue
+        key["format"] = fmt or guess_format(path)
+        if key["format"] == "csv":
+            _claim_columns(path, group_by)
+        sources.append(key)
+        to_fit.append(key)
+
+    fits = {entry["path"]: WeightFit(group_by) for entry in to_fit}
+    if workers <= 1:
+        for entry in to_fit:
+            entry["claims"] = fits[entry["path"]].add_file(entry["path"], entry["format"], chunk_size)
+    elif to_fit:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [
+                (entry["path"], pool.submit(_fit_shard, entry["path"], entry["format"], group_by, chunk_size, start, end))
+                for entry in to_fit
+                for start, end in shard_ranges(entry["path"], workers * SHARDS_PER_WORKER)
+            ]
+            for path, future in futures:
+                fits[path].merge(future.result())
+        for entry in to_fit:
+            entry["claims"] = sum(totals.claims for totals in fits[entry["path"]].groups.values())
+    for entry in to_fit:
+        entry["groups"] = fits[entry["path"]].to_state()
+
+    combined = WeightFit(group_by)
+    for entry in sources:
+        combined.merge(WeightFit.from_state(group_by, entry.get("groups", {})))
+    return combined, sources, [entry["path"] for entry in to_fit]
+
+
+def save_profiles(
+    path: str, fit: WeightFit, sources: list[dict], min_claims: int = DEFAULT_MIN_CLAIMS
+) -> dict:
+    """
+    Write the profiles (and the per-source totals that make the file a
+    cache) to `path`, replacing it atomically. Returns what was written.
+    """
+    profiles, skipped = fit.profiles(min_claims)
+    document = {
+        "fit_version": FIT_VERSION,
+        "group_by": fit.group_by,
+        "min_claims": min_claims,
+        "profiles": profiles,
+        "skipped": skipped,
+        "sources": sources,
+    }
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(document, f, indent=1)
+        f.write("\n")
+    os.replace(tmp_path, path)
+    return document
+
+
+def _print_profiles(profiles: dict) -> None:
+    rows = [(f"{DEFAULT_WEIGHT_PROFILE} (built in)", {"weights": WEIGHT_PROFILES[DEFAULT_WEIGHT_PROFILE], "claims": None})]
+    rows += list(profiles.items())
+    width = max(len("profile"), *(len(name) for name, _ in rows))
+    print(f"{'profile':{width}s} {'claims':>12} " + " ".join(f"{name:>6s}" for name in MONTH_NAMES))
+    for name, profile in rows:
+        claims = "" if profile["claims"] is None else f"{profile['claims']:,}"
+        shares = " ".join(f"{w:>6.1%}" for w in profile["weights"])
+        print(f"{name:{width}s} {claims:>12} {shares}")
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Fit monthly spending weight profiles from claims files.")
+    parser.add_argument("claims", nargs="+", help="CSV or JSONL claims files with month, amount and the group column")
+    parser.add_argument("--input-format", choices=FORMATS, help="default: from each file name")
+    parser.add_argument(
+        "--group-by",
+        default="persona",
+        help="claims column to fit a profile per value of, or none (default: persona)",
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        default=DEFAULT_OUTPUT,
+        help=f"profiles file, also used as the fit cache (default: {DEFAULT_OUTPUT})",
+    )
+    parser.add_argument(
+        "--min-claims",
+        type=int,
+        default=DEFAULT_MIN_CLAIMS,
+        help=f"leave out groups with fewer claims (default: {DEFAULT_MIN_CLAIMS})",
+    )
+    parser.add_argument("--force", action="store_true", help="ignore cached month totals and re-read every file")
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=DEFAULT_CHUNK_SIZE,
+        help=f"claims per batch (default: {DEFAULT_CHUNK_SIZE})",
+    )
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=1,
+        help="worker processes; 0 means one per CPU (default: 1)",
+    )
+    parser.add_argument("--json", action="store_true", help="print the profiles as JSON")
+    args = parser.parse_args(argv)
+
+    if args.chunk_size < 1:
+        print("error: --chunk-size must be at least 1", file=sys.stderr)
+        return 2
+    if args.workers < 0 or args.min_claims < 0:
+        print("error: --workers and --min-claims must be 0 or more", file=sys.stderr)
+        return 2
+
+    workers = args.workers or os.cpu_count() or 1
+    group_by = None if args.group_by.lower() == "none" else args.group_by
+
+    started = time.perf_counter()
+    try:
+        fit, sources, fitted = fit_files(
+            args.claims,
+            args.input_format,
+            group_by,
+            workers,
+            args.chunk_size,
+            cache_path=None if args.force else args.output,
+        )
+        document = save_profiles(args.output, fit, sources, args.min_claims)
+    except (OSError, ValueError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    seconds = time.perf_counter() - started
+
+    if args.json:
+        print(json.dumps(document["profiles"], indent=2))
+    else:
+        _print_profiles(document["profiles"])
+
+    claims = sum(entry.get("claims", 0) for entry in sources if entry["path"] in fitted)
+    rate = claims / seconds if seconds > 0 else 0.0
+    print(
+        f"Read {len(fitted)} of {len(sources)} file(s), {claims:,} claims in {seconds:.2f}s "
+        f"with {workers} worker(s) ({rate:,.0f} claims/s); "
+        f"{len(sources) - len(fitted)} reused from {args.output}.",
+        file=sys.stderr,
+    )
+    if document["skipped"]:
+        print(
+            f"Skipped {len(document['skipped'])} group(s) with fewer than {args.min_claims:,} claims: "
+            + ", ".join(document["skipped"]),
+            file=sys.stderr,
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
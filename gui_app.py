@@ -1,38 +1,143 @@
+import queue
+import threading
+import time
 import tkinter as tk
-from tkinter import ttk, messagebox
+from collections import deque
+from tkinter import filedialog, ttk, messagebox
 
 from logic import (
-    compute_monthly_no_cap,
-    compute_monthly_without_smoothing,
-    compute_monthly_with_smoothing,
+    CAP,
+    MONTH_NAMES,
+    PERSONAS,
+    SPENDING_WEIGHTS,
 )
+from scenario import run_scenario
 
-MONTH_NAMES = ["Jan", "Feb", "Mar", "Apr", "May", "Jun",
-               "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
-
-PERSONAS = {
-    "Custom": None,
-    "High cost oncology patient": {
-        "annual_oop": 5000.0,
-        "start_month": 2,
-        "description": "Very high cost drugs, likely to hit cap early in the year."
-    },
-    "Insulin dependent diabetic": {
-        "annual_oop": 2500.0,
-        "start_month": 1,
-        "description": "Steady monthly use of insulin and other meds."
-    },
-    "Chronic condition on mixed meds": {
-        "annual_oop": 1800.0,
-        "start_month": 1,
-        "description": "Multiple chronic medications, moderate annual costs."
-    },
-    "Occasional user": {
-        "annual_oop": 600.0,
-        "start_month": 1,
-        "description": "Only occasional prescriptions through the year."
-    },
-}
+
+# Colors for series
+COLORS = ["#d62728", "#1f77b4", "#2ca02c"]  # red, blue, green
+
+# Slider changes are coalesced: at most one recompute per this many ms while
+# dragging, always with the latest slider values.
+DEBOUNCE_MS = 15
+
+SLIDER_MAX_ANNUAL = 20_000
+SLIDER_STEP = 50
+
+# One frame at 60 Hz. Redraw times are reported against this.
+FRAME_BUDGET_MS = 1000 / 60
+
+
+class ChartView:
+    """
+    Line chart on a Tkinter canvas that keeps its items between redraws.
+
+    All items (axes, labels, one line and one oval per point for each
+    series, legend) are created once; update() only moves them with
+    canvas.coords and changes label text with itemconfigure.
+    """
+
+    def __init__(self, canvas, months, labels):
+        self.canvas = canvas
+        self.months = list(months)
+        self.labels = list(labels)
+
+        width = int(canvas["width"])
+        height = int(canvas["height"])
+        margin = 50
+
+        self.plot_left = margin
+        self.plot_right = width - margin
+        self.plot_top = margin
+        self.plot_bottom = height - margin
+
+        canvas.delete("all")
+        plot_left, plot_right = self.plot_left, self.plot_right
+        plot_top, plot_bottom = self.plot_top, self.plot_bottom
+
+        # Draw axes
+        canvas.create_line(plot_left, plot_bottom, plot_right, plot_bottom)  # X axis
+        canvas.create_line(plot_left, plot_bottom, plot_left, plot_top)      # Y axis
+
+        # Y axis labels (0, 50%, 100% of max); only their text changes
+        self.y_labels = []
+        for frac in [0.0, 0.5, 1.0]:
+            y = plot_bottom - frac * (plot_bottom - plot_top)
+            canvas.create_line(plot_left - 5, y, plot_left, y)
+            self.y_labels.append(canvas.create_text(plot_left - 10, y, text="", anchor="e", fill="gray"))
+
+        num_points = len(self.months)
+        if num_points < 2:
+            self.xs = []
+        else:
+            step = (plot_right - plot_left) / (num_points - 1)
+            self.xs = [plot_left + i * step for i in range(num_points)]
+
+        # Draw month labels
+        for x, m in zip(self.xs, self.months):
+            canvas.create_line(x, plot_bottom, x, plot_bottom + 5)
+            canvas.create_text(x, plot_bottom + 15, text=MONTH_NAMES[m - 1], anchor="n")
+
+        # One polyline and a set of ovals per series, placed by update()
+        self.lines = []
+        self.points = []
+        for idx in range(len(self.labels)):
+            color = COLORS[idx % len(COLORS)]
+            flat = [coord for x in self.xs for coord in (x, plot_bottom)]
+            self.lines.append(canvas.create_line(*flat, fill=color, width=2) if self.xs else None)
+            self.points.append([
+                canvas.create_oval(x - 3, plot_bottom - 3, x + 3, plot_bottom + 3, fill=color, outline=color)
+                for x in self.xs
+            ])
+
+        # Legend
+        legend_x = plot_right - 120
+        legend_y = plot_top + 10
+        for idx, label in enumerate(self.labels):
+            color = COLORS[idx % len(COLORS)]
+            canvas.create_rectangle(legend_x, legend_y + idx * 20,
+                                    legend_x + 10, legend_y + idx * 20 + 10,
+                                    fill=color, outline=color)
+            canvas.create_text(legend_x + 15, legend_y + idx * 20 + 5,
+                               text=label, anchor="w")
+
+    def fits(self, months, series_dict) -> bool:
+        """
+        True if this view has items for these months and series labels.
+        """
+        return list(months) == self.months and list(series_dict) == self.labels
+
+    def update(self, series_dict):
+        """
+        Move the existing items to show new values.
+        """
+        canvas = self.canvas
+
+        # Compute overall max value
+        max_val = 0.0
+        for values in series_dict.values():
+            if values:
+                max_val = max(max_val, max(values))
+
+        if max_val <= 0:
+            max_val = 1.0  # avoid division by zero
+
+        for item, frac in zip(self.y_labels, [0.0, 0.5, 1.0]):
+            canvas.itemconfigure(item, text=f"${frac * max_val:,.0f}")
+
+        if not self.xs:
+            return
+
+        plot_bottom = self.plot_bottom
+        scale = (plot_bottom - self.plot_top) / max_val
+        for line, ovals, values in zip(self.lines, self.points, series_dict.values()):
+            flat = []
+            for x, oval, v in zip(self.xs, ovals, values):
+                y = plot_bottom - v * scale
+                canvas.coords(oval, x - 3, y - 3, x + 3, y + 3)
+                flat.append(x)
+                flat.append(y)
+            canvas.coords(line, *flat)
 
 
 def draw_chart(canvas, months, series_dict):
@@ -40,152 +145,290 @@ def draw_chart(canvas, months, series_dict):
     Draw a simple line chart on the given Tkinter canvas.
 
     series_dict: {label: [values]}
+
+    The canvas items are created on the first call and reused afterwards,
+    so repeated calls only move them.
     """
-    canvas.delete("all")
-
-    width = int(canvas["width"])
-    height = int(canvas["height"])
-    margin = 50
-
-    plot_left = margin
-    plot_right = width - margin
-    plot_top = margin
-    plot_bottom = height - margin
-
-    # Compute overall max value
-    max_val = 0.0
-    for values in series_dict.values():
-        if values:
-            max_val = max(max_val, max(values))
-
-    if max_val <= 0:
-        max_val = 1.0  # avoid division by zero
-
-    # Draw axes
-    canvas.create_line(plot_left, plot_bottom, plot_right, plot_bottom)  # X axis
-    canvas.create_line(plot_left, plot_bottom, plot_left, plot_top)      # Y axis
-
-    # Y axis labels (0, 50%, 100% of max)
-    for i, frac in enumerate([0.0, 0.5, 1.0]):
-        y_val = frac * max_val
-        y = plot_bottom - frac * (plot_bottom - plot_top)
-        canvas.create_line(plot_left - 5, y, plot_left, y)
-        canvas.create_text(plot_left - 10, y, text=f"${y_val:,.0f}", anchor="e", fill="gray")
-
-    # X axis labels (months)
-    num_points = len(months)
-    if num_points < 2:
-        return
-
-    def x_coord(i):
-        return plot_left + (i / (num_points - 1)) * (plot_right - plot_left)
-
-    # Draw month labels
-    for i, m in enumerate(months):
-        x = x_coord(i)
-        canvas.create_line(x, plot_bottom, x, plot_bottom + 5)
-        canvas.create_text(x, plot_bottom + 15, text=MONTH_NAMES[m - 1], anchor="n")
-
-    # Colors for series
-    colors = ["#d62728", "#1f77b4", "#2ca02c"]  # red, blue, green
-    labels = list(series_dict.keys())
-
-    for idx, label in enumerate(labels):
-        values = series_dict[label]
-        color = colors[idx % len(colors)]
-        prev_x = None
-        prev_y = None
-        for i, v in enumerate(values):
-            x = x_coord(i)
-            y = plot_bottom - (v / max_val) * (plot_bottom - plot_top)
-            # Draw point
-            canvas.create_oval(x - 3, y - 3, x + 3, y + 3, fill=color, outline=color)
-            # Draw line from previous point
-            if prev_x is not None:
-                canvas.create_line(prev_x, prev_y, x, y, fill=color, width=2)
-            prev_x, prev_y = x, y
-
-    # Legend
-    legend_x = plot_right - 120
-    legend_y = plot_top + 10
-    for idx, label in enumerate(labels):
-        color = colors[idx % len(colors)]
-        canvas.create_rectangle(legend_x, legend_y + idx * 20,
-                                legend_x + 10, legend_y + idx * 20 + 10,
-                                fill=color, outline=color)
-        canvas.create_text(legend_x + 15, legend_y + idx * 20 + 5,
-                           text=label, anchor="w")
-
-
-def run_scenario(annual_oop_estimate: float, start_month: int, persona_name: str | None):
+    view = getattr(canvas, "_chart_view", None)
+    if view is None or not view.fits(months, series_dict):
+        view = canvas._chart_view = ChartView(canvas, months, series_dict.keys())
+    view.update(series_dict)
+
+
+# Cohort mode: members per chunk handed back to the UI, how often the UI
+# polls for them, how long closing the window waits for the worker to
+# stop, and the peak bill histogram bins.
+COHORT_CHUNK_SIZE = 2_000
+COHORT_POLL_MS = 50
+COHORT_CLOSE_WAIT_S = 2.0
+PEAK_BINS = 12
+
+
+class HistogramView:
     """
-    Compute the three scenarios and return:
-    - months list
-    - dict of label -> values
-    - explanation string
+    Bar chart with persistent bars, one group of bars per bin and one bar
+    per series in each group. update() only moves the bars.
     """
-    if start_month < 1:
-        start_month = 1
-    elif start_month > 12:
-        start_month = 12
-
-    months = list(range(1, 13))
-
-    # Three scenarios
-    no_cap = compute_monthly_no_cap(annual_oop_estimate)
-    cap_no_smooth = compute_monthly_without_smoothing(annual_oop_estimate)
-    cap_smooth = compute_monthly_with_smoothing(annual_oop_estimate, start_month)
-
-    total_no_cap = sum(no_cap)
-    total_cap = sum(cap_no_smooth)
-    total_cap_smooth = sum(cap_smooth)
-
-    # Key monthly peaks
-    max_no_cap = max(no_cap) if no_cap else 0.0
-    max_cap_no_smooth = max(cap_no_smooth) if cap_no_smooth else 0.0
-    max_cap_smooth = max(cap_smooth) if cap_smooth else 0.0
-
-    idx_no_cap = no_cap.index(max_no_cap) if max_no_cap > 0 else 0
-    idx_cap_no_smooth = cap_no_smooth.index(max_cap_no_smooth) if max_cap_no_smooth > 0 else 0
-    idx_cap_smooth = cap_smooth.index(max_cap_smooth) if max_cap_smooth > 0 else 0
-
-    month_no_cap = MONTH_NAMES[idx_no_cap]
-    month_cap_no_smooth = MONTH_NAMES[idx_cap_no_smooth]
-    month_cap_smooth = MONTH_NAMES[idx_cap_smooth]
-
-    avoided = max(total_no_cap - total_cap, 0.0)
-
-    if persona_name and persona_name in PERSONAS and PERSONAS[persona_name]:
-        persona_label = persona_name
-    else:
-        persona_label = "This example"
-
-    explanation = (
-        f"{persona_label} with an annual out of pocket estimate of "
-        f"${annual_oop_estimate:,.0f}:\n\n"
-        f"- Without any cap, total yearly out of pocket would be about "
-        f"${total_no_cap:,.0f}.\n"
-        f"- Under the 2025 $2,000 cap, yearly out of pocket is limited to "
-        f"${total_cap:,.0f}, avoiding about ${avoided:,.0f} in spending.\n"
-        f"- The highest monthly payment without a cap is about "
-        f"${max_no_cap:,.0f} in {month_no_cap}.\n"
-        f"- With the cap but no monthly payment plan, the highest monthly "
-        f"payment is about ${max_cap_no_smooth:,.0f} in {month_cap_no_smooth}.\n"
-        f"- After enrolling in the monthly payment plan in month {start_month}, "
-        f"the highest monthly payment falls to about "
-        f"${max_cap_smooth:,.0f} in {month_cap_smooth}.\n\n"
-        f"The total amount owed under the cap is the same with or without "
-        f"the monthly payment plan. The plan mainly changes the timing and "
-        f"reduces the worst single month bill."
-    )
 
-    series_dict = {
-        "No cap": no_cap,
-        "Cap only": cap_no_smooth,
-        "Cap + smoothing": cap_smooth,
-    }
+    def __init__(self, canvas, bin_labels, series_labels, title):
+        self.canvas = canvas
+        width = int(canvas["width"])
+        height = int(canvas["height"])
+        margin = 40
+
+        self.plot_left = margin
+        self.plot_right = width - 10
+        self.plot_top = margin
+        self.plot_bottom = height - margin
+
+        canvas.delete("all")
+        canvas.create_text(width / 2, 15, text=title, anchor="n")
+        canvas.create_line(self.plot_left, self.plot_bottom, self.plot_right, self.plot_bottom)
+        self.max_label = canvas.create_text(self.plot_left - 5, self.plot_top, text="", anchor="e", fill="gray")
+
+        group_width = (self.plot_right - self.plot_left) / len(bin_labels)
+        bar_width = group_width * 0.8 / len(series_labels)
+        self.bars = []
+        for b, label in enumerate(bin_labels):
+            left = self.plot_left + b * group_width + group_width * 0.1
+            canvas.create_text(left + group_width * 0.4, self.plot_bottom + 5, text=label, anchor="n")
+            for idx in range(len(series_labels)):
+                color = COLORS[(idx + 1) % len(COLORS)]
+                x0 = left + idx * bar_width
+                self.bars.append(
+                    canvas.create_rectangle(x0, self.plot_bottom, x0 + bar_width, self.plot_bottom,
+                                            fill=color, outline=color)
+                )
+        self.n_series = len(series_labels)
+
+        legend_x = self.plot_right - 130
+        for idx, label in enumerate(series_labels):
+            color = COLORS[(idx + 1) % len(COLORS)]
+            y = self.plot_top + idx * 18
+            canvas.create_rectangle(legend_x, y, legend_x + 10, y + 10, fill=color, outline=color)
+            canvas.create_text(legend_x + 15, y + 5, text=label, anchor="w")
+
+    def update(self, counts):
+        """
+        counts: one list per series, one count per bin.
+        """
+        top = max((max(row) for row in counts), default=0) or 1
+        scale = (self.plot_bottom - self.plot_top) / top
+        self.canvas.itemconfigure(self.max_label, text=f"{top:,}")
+        for b in range(len(counts[0])):
+            for idx, row in enumerate(counts):
+                bar = self.bars[b * self.n_series + idx]
+                x0, _, x1, _ = self.canvas.coords(bar)
+                self.canvas.coords(bar, x0, self.plot_bottom - row[b] * scale, x1, self.plot_bottom)
+
+
+def run_cohort_job(path, results, cancel, chunk_size=COHORT_CHUNK_SIZE):
+    """
+    Worker thread body for cohort mode.
+
+    Reads the file in chunks, runs the batch kernel and puts one message per
+    chunk on the `results` queue:
+    - ("total", n): upper bound on the member count, sent first
+    - ("chunk", n, peak_counts, hit_counts): histogram increments for n members
+    - ("done", n, seconds), ("cancelled", n) or ("error", message) at the end
+
+    Stops during the line count or after the current chunk once `cancel`
+    is set. NumPy and the cohort
+    tools are imported here so the plain GUI does not need them.
+    """
+    try:
+        import numpy as np
+
+        from batch import batch_compute_scenarios, cumulative_shares
+        from cohort import count_lines, guess_format, iter_member_chunks
+
+        started = time.perf_counter()
+        total = count_lines(path, cancel)
+        if cancel.is_set():
+            results.put(("cancelled", 0))
+            return
+        results.put(("total", total))
+
+        peak_edges = np.linspace(0.0, CAP * max(SPENDING_WEIGHTS), PEAK_BINS + 1)
+        shares = cumulative_shares()
+        done = 0
+        for members in iter_member_chunks(path, guess_format(path), chunk_size):
+            if cancel.is_set():
+                results.put(("cancelled", done))
+                return
+
+            annual = np.fromiter((m[1] for m in members), dtype=float, count=len(members))
+            start = np.fromiter((m[2] for m in members), dtype=np.int64, count=len(members))
+            summary, _ = batch_compute_scenarios(annual, start)
 
-    return months, series_dict, explanation
+            peak_counts = []
+            for name in ("max_cap_no_smooth", "max_cap_smooth"):
+                bins = np.searchsorted(peak_edges, summary[name], side="right") - 1
+                peak_counts.append(np.bincount(np.clip(bins, 0, PEAK_BINS - 1), minlength=PEAK_BINS).tolist())
+
+            # Month the cap is reached (1-12), 0 for never
+            reached = annual[:, None] * shares[None, :] >= CAP
+            hit_month = np.where(reached.any(axis=1), reached.argmax(axis=1) + 1, 0)
+            hit_counts = np.bincount(hit_month, minlength=13)
+            # Months first, "never" last
+            hit_counts = hit_counts[1:].tolist() + [int(hit_counts[0])]
+
+            done += len(members)
+            results.put(("chunk", len(members), peak_counts, hit_counts))
+
+        results.put(("done", done, time.perf_counter() - started))
+    except Exception as e:
+        results.put(("error", str(e)))
+
+
+def _stop_cohort_job(window, job: dict, wait: float = COHORT_CLOSE_WAIT_S) -> None:
+    """
+    Stop a cohort window's job: cancel the pending poll, tell the worker to
+    stop and wait for it (it checks between chunks, so this is short).
+    """
+    if job.get("after") is not None:
+        window.after_cancel(job["after"])
+        job["after"] = None
+    if job.get("cancel") is not None:
+        job["cancel"].set()
+    thread = job.get("thread")
+    if thread is not None:
+        thread.join(wait)
+        job["thread"] = None
+
+
+def open_cohort_window(root):
+    """
+    Cohort mode: load an enrollment file and show aggregate charts while it
+    is processed in a background thread.
+    """
+    window = tk.Toplevel(root)
+    window.title("Cohort analysis")
+
+    controls = tk.Frame(window)
+    controls.grid(row=0, column=0, sticky="w", padx=5, pady=5)
+    load_button = tk.Button(controls, text="Load enrollment file...")
+    load_button.pack(side="left")
+    cancel_button = tk.Button(controls, text="Cancel", state="disabled")
+    cancel_button.pack(side="left", padx=5)
+
+    progress = ttk.Progressbar(window, length=600, mode="determinate")
+    progress.grid(row=1, column=0, padx=5, pady=5, sticky="w")
+    status = tk.Label(window, text="Choose a CSV or JSONL file (id, annual_oop, start_month[, persona]).", fg="gray")
+    status.grid(row=2, column=0, padx=5, sticky="w")
+
+    peak_canvas = tk.Canvas(window, width=700, height=250, bg="white")
+    peak_canvas.grid(row=3, column=0, padx=5, pady=5)
+    hit_canvas = tk.Canvas(window, width=700, height=250, bg="white")
+    hit_canvas.grid(row=4, column=0, padx=5, pady=5)
+
+    top = CAP * max(SPENDING_WEIGHTS)
+    peak_labels = [f"${top * (b + 1) / PEAK_BINS:,.0f}" for b in range(PEAK_BINS)]
+    peak_view = HistogramView(peak_canvas, peak_labels, ["Cap only", "Cap + smoothing"],
+                              "Members by worst monthly bill (up to)")
+    hit_view = HistogramView(hit_canvas, MONTH_NAMES + ["Never"], ["Members"],
+                             "Month the cap is reached")
+
+    job = {"thread": None, "cancel": None, "queue": None, "after": None}
+    totals = {}
+
+    def reset():
+        totals.update(
+            members=0,
+            expected=1,
+            peak=[[0] * PEAK_BINS for _ in range(2)],
+            hit=[[0] * 13],
+            started=time.perf_counter(),
+        )
+
+    def finish(message):
+        status.config(text=message)
+        load_button.config(state="normal")
+        cancel_button.config(state="disabled")
+        job["thread"] = None
+
+    def poll():
+        # Drain whatever the worker produced since the last poll, redraw once.
+        job["after"] = None
+        changed = False
+        try:
+            while True:
+                message = job["queue"].get_nowait()
+                kind = message[0]
+                if kind == "total":
+                    totals["expected"] = max(message[1], 1)
+                elif kind == "chunk":
+                    _, n, peak_counts, hit_counts = message
+                    totals["members"] += n
+                    for row, inc in zip(totals["peak"], peak_counts):
+                        row[:] = [a + b for a, b in zip(row, inc)]
+                    totals["hit"][0] = [a + b for a, b in zip(totals["hit"][0], hit_counts)]
+                    changed = True
+                elif kind == "done":
+                    progress.config(value=100)
+                    finish(f"Done: {message[1]:,} members in {message[2]:.1f}s.")
+                elif kind == "cancelled":
+                    finish(f"Cancelled after {message[1]:,} members.")
+                else:
+                    finish(f"Error: {message[1]}")
+        except queue.Empty:
+            pass
+
+        if changed:
+            peak_view.update(totals["peak"])
+            hit_view.update(totals["hit"])
+            if job["thread"] is not None:
+                elapsed = time.perf_counter() - totals["started"]
+                progress.config(value=min(100.0, 100.0 * totals["members"] / totals["expected"]))
+                status.config(text=f"{totals['members']:,} members processed ({elapsed:.1f}s)...")
+
+        if job["thread"] is not None:
+            job["after"] = window.after(COHORT_POLL_MS, poll)
+
+    def on_load():
+        path = filedialog.askopenfilename(
+            parent=window,
+            title="Enrollment file",
+            filetypes=[("Member files", "*.csv *.jsonl *.ndjson *.json"), ("All files", "*")],
+        )
+        if not path:
+            return
+        try:
+            import numpy  # noqa: F401
+        except ImportError:
+            messagebox.showerror("Cohort mode", "Cohort mode needs NumPy (pip install numpy).", parent=window)
+            return
+
+        reset()
+        peak_view.update(totals["peak"])
+        hit_view.update(totals["hit"])
+        progress.config(value=0)
+        status.config(text=f"Loading {path}...")
+        load_button.config(state="disabled")
+        cancel_button.config(state="normal")
+
+        job["queue"] = queue.Queue()
+        job["cancel"] = threading.Event()
+        job["thread"] = threading.Thread(
+            target=run_cohort_job, args=(path, job["queue"], job["cancel"]), daemon=True
+        )
+        job["thread"].start()
+        job["after"] = window.after(COHORT_POLL_MS, poll)
+
+    def on_cancel():
+        if job["cancel"] is not None:
+            job["cancel"].set()
+            status.config(text="Cancelling...")
+
+    def on_close():
+        # No poll may fire on the destroyed widgets, and the worker should
+        # not outlive its window.
+        _stop_cohort_job(window, job)
+        window.destroy()
+
+    load_button.config(command=on_load)
+    cancel_button.config(command=on_cancel)
+    window.protocol("WM_DELETE_WINDOW", on_close)
 
 
 def main():
@@ -218,6 +461,32 @@ def main():
     start_month_entry = tk.Entry(root, width=5)
     start_month_entry.grid(row=2, column=1, padx=5, pady=5, sticky="w")
 
+    # Sliders: recompute and redraw live while dragging
+    annual_var = tk.DoubleVar(value=0.0)
+    month_var = tk.IntVar(value=1)
+    pending = {"after_id": None}
+
+    def on_slide(_value=None):
+        annual_entry.delete(0, tk.END)
+        annual_entry.insert(0, f"{annual_var.get():g}")
+        start_month_entry.delete(0, tk.END)
+        start_month_entry.insert(0, str(month_var.get()))
+        if pending["after_id"] is None:
+            pending["after_id"] = root.after(DEBOUNCE_MS, live_update)
+
+    def live_update():
+        pending["after_id"] = None
+        show(annual_var.get(), month_var.get())
+
+    tk.Scale(
+        root, variable=annual_var, from_=0, to=SLIDER_MAX_ANNUAL, resolution=SLIDER_STEP,
+        orient="horizontal", length=250, showvalue=False, command=on_slide,
+    ).grid(row=1, column=2, padx=5, pady=5, sticky="w")
+    tk.Scale(
+        root, variable=month_var, from_=1, to=12, orient="horizontal", length=250,
+        showvalue=False, command=on_slide,
+    ).grid(row=2, column=2, padx=5, pady=5, sticky="w")
+
     # Persona description
     persona_desc = tk.Label(root, text="", fg="gray")
     persona_desc.grid(row=3, column=0, columnspan=3, sticky="w", padx=5, pady=5)
@@ -249,6 +518,8 @@ def main():
 
         start_month_entry.delete(0, tk.END)
         start_month_entry.insert(0, str(info["start_month"]))
+        annual_var.set(info["annual_oop"])
+        month_var.set(info["start_month"])
 
         persona_desc.config(text=info.get("description", ""))
 
@@ -257,6 +528,32 @@ def main():
     # Default hint
     persona_desc.config(text="Select a persona or stay on Custom and enter your own values.")
 
+    # Redraw time (compute + canvas update + Tk layout) against the frame budget
+    frame_times = deque(maxlen=120)
+    frame_label = tk.Label(root, text="", fg="gray")
+    frame_label.grid(row=8, column=1, columnspan=2, sticky="w", padx=5)
+
+    def show(annual_val, start_val):
+        started = time.perf_counter()
+
+        persona_name = persona_var.get()
+        months, series_dict, explanation = run_scenario(annual_val, start_val, persona_name)
+
+        draw_chart(chart_canvas, months, series_dict)
+
+        explanation_text.delete("1.0", tk.END)
+        explanation_text.insert(tk.END, explanation)
+        root.update_idletasks()
+
+        frame_times.append((time.perf_counter() - started) * 1000)
+        ordered = sorted(frame_times)
+        p95 = ordered[min(int(len(ordered) * 0.95), len(ordered) - 1)]
+        frame_label.config(
+            text=f"Redraw {frame_times[-1]:.1f} ms (p95 {p95:.1f} ms, max {ordered[-1]:.1f} ms "
+                 f"over {len(ordered)}; budget {FRAME_BUDGET_MS:.1f} ms)",
+            fg="gray" if p95 <= FRAME_BUDGET_MS else "#d62728",
+        )
+
     def on_run():
         try:
             annual_str = annual_entry.get().strip()
@@ -274,13 +571,9 @@ def main():
             if start_val < 1 or start_val > 12:
                 raise ValueError("Start month must be between 1 and 12.")
 
-            persona_name = persona_var.get()
-            months, series_dict, explanation = run_scenario(annual_val, start_val, persona_name)
-
-            draw_chart(chart_canvas, months, series_dict)
-
-            explanation_text.delete("1.0", tk.END)
-            explanation_text.insert(tk.END, explanation)
+            annual_var.set(annual_val)
+            month_var.set(start_val)
+            show(annual_val, start_val)
 
         except ValueError as e:
             messagebox.showerror("Input error", str(e))
@@ -290,6 +583,9 @@ def main():
     run_button = tk.Button(root, text="Run scenario", command=on_run)
     run_button.grid(row=8, column=0, padx=5, pady=10, sticky="w")
 
+    cohort_button = tk.Button(root, text="Cohort analysis...", command=lambda: open_cohort_window(root))
+    cohort_button.grid(row=9, column=0, padx=5, pady=(0, 10), sticky="w")
+
     root.mainloop()
 
 
@@ -0,0 +1,434 @@
+"""
+Opt-in timing and allocation counters for the scenario code.
+
+When a cohort run or the quote service is slow, this shows where the time
+goes: input parsing, baseline construction, smoothing, summaries or output.
+Two kinds of hooks feed the same set of named metrics:
+
+- @timed() on the scalar functions in logic.py. Per call it records the
+  call count and, for sampled calls, the wall time and (optionally) the net
+  number of memory blocks the call left allocated.
+- `with stage("cohort.parse"):` around pipeline steps in cohort.py, batch.py
+  and quote_service.py.
+
+It is off by default and then costs nothing on the scalar path: @timed()
+hands back the function itself and only registers it. enable() swaps timing
+wrappers in wherever a registered function is bound in one of this
+project's own modules (the .py files next to this one, including their
+`from logic import ...` copies), and disable() puts the originals back.
+Library modules are never touched. Modules imported while enabled pick up the wrappers on their own.
+stage() returns a shared no-op context manager while disabled.
+
+With enable(sample_every=N) every call is still counted but only the 1st,
+(N+1)th, (2N+1)th... call per metric is timed, so it can stay on under production load.
+Durations go into log-linear histograms (8 buckets per power of two, so
+percentiles are within about 6%), which stay small and merge exactly across
+worker processes.
+
+    import instrument
+    instrument.enable(sample_every=10, allocations=True)
+    ... run things ...
+    print(instrument.to_prometheus())
+    instrument.dump("profile.json")
+
+cohort.py takes --profile FILE, and quote_service.py serves the metrics at
+GET /metrics when started with --metrics.
+"""
+
+import functools
+import os
+import sys
+import time
+
+# Histogram layout: values under 16 ns get a bucket each, larger values get
+# 8 buckets per power of two.
+_SUB_BUCKETS = 8
+_LINEAR_LIMIT = 2 * _SUB_BUCKETS
+
+QUANTILES = (0.5, 0.9, 0.99)
+
+_enabled = False
+_sample_every = 1
+_allocations = False
+
+_metrics = {}
+# (original function, metric name) for everything decorated with @timed().
+_registered = []
+# id(original) -> wrapper for the functions currently swapped in.
+_installed = {}
+
+
+def _bucket(ns: int) -> int:
+    if ns < _LINEAR_LIMIT:
+        return max(ns, 0)
+    shift = ns.bit_length() - 4
+    return _LINEAR_LIMIT + (shift - 1) * _SUB_BUCKETS + (ns >> shift) - _SUB_BUCKETS
+
+
+def _bucket_bounds(index: int) -> tuple[int, int]:
+    """
+    [low, high) range of nanoseconds covered by a histogram bucket.
+    """
+    if index < _LINEAR_LIMIT:
+        return index, index + 1
+    shift = (index - _LINEAR_LIMIT) // _SUB_BUCKETS + 1
+    mantissa = (index - _LINEAR_LIMIT) % _SUB_BUCKETS + _SUB_BUCKETS
+    return mantissa << shift, (mantissa + 1) << shift
+
+
+class Metric:
+    """
+    Counters for one timed function or stage.
+
+    calls counts every call; sampled, total_ns, min_ns, max_ns, alloc_blocks
+    and the histogram only cover the sampled calls.
+    """
+
+    __slots__ = ("calls", "sampled", "total_ns", "min_ns", "max_ns", "alloc_blocks", "histogram")
+
+    def __init__(self):
+        self.calls = 0
+        self.sampled = 0
+        self.total_ns = 0
+        self.min_ns = 0
+        self.max_ns = 0
+        self.alloc_blocks = 0
+        self.histogram = {}
+
+    def record(self, ns: int, blocks: int = 0) -> None:
+        if not self.sampled or ns < self.min_ns:
+            self.min_ns = ns
+        if ns > self.max_ns:
+            self.max_ns = ns
+        self.sampled += 1
+        self.total_ns += ns
+        self.alloc_blocks += blocks
+        index = _bucket(ns)
+        self.histogram[index] = self.histogram.get(index, 0) + 1
+
+    def quantile(self, q: float) -> float:
+        """
+        Estimated q-quantile of the sampled durations, in seconds.
+        """
+        if not self.sampled:
+            return 0.0
+        rank = q * (self.sampled - 1)
+        seen = 0
+        for index in sorted(self.histogram):
+            seen += self.histogram[index]
+            if seen > rank:
+                low, high = _bucket_bounds(index)
+                ns = min(max((low + high) / 2, self.min_ns), self.max_ns)
+                return ns / 1e9
+        return self.max_ns / 1e9
+
+    def merge(self, other: "Metric") -> None:
+        if other.sampled and (not self.sampled or other.min_ns < self.min_ns):
+            self.min_ns = other.min_ns
+        self.max_ns = max(self.max_ns, other.max_ns)
+        self.calls += other.calls
+        self.sampled += other.sampled
+        self.total_ns += other.total_ns
+        self.alloc_blocks += other.alloc_blocks
+        for index, count in other.histogram.items():
+            self.histogram[index] = self.histogram.get(index, 0) + count
+
+    def summary(self) -> dict:
+        """
+        JSON-friendly numbers. With sampling, total_seconds is scaled up from
+        the sampled calls to all calls.
+        """
+        mean = self.total_ns / self.sampled / 1e9 if self.sampled else 0.0
+        result = {
+            "calls": self.calls,
+            "sampled": self.sampled,
+            "total_seconds": mean * self.calls,
+            "mean_seconds": mean,
+            "min_seconds": self.min_ns / 1e9,
+            "max_seconds": self.max_ns / 1e9,
+        }
+        for q in QUANTILES:
+            result[f"p{round(q * 100)}_seconds"] = self.quantile(q)
+        if _allocations or self.alloc_blocks:
+            result["alloc_blocks_per_call"] = self.alloc_blocks / self.sampled if self.sampled else 0.0
+        return result
+
+
+def metric(name: str) -> Metric:
+    """
+    The Metric for `name`, created on first use.
+    """
+    found = _metrics.get(name)
+    if found is None:
+        found = _metrics[name] = Metric()
+    return found
+
+
+def _wrap(func, name: str):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        counters = metric(name)
+        counters.calls += 1
+        if (counters.calls - 1) % _sample_every:
+            return func(*args, **kwargs)
+        if _allocations:
+            blocks = sys.getallocatedblocks()
+            started = time.perf_counter_ns()
+            result = func(*args, **kwargs)
+            counters.record(time.perf_counter_ns() - started, sys.getallocatedblocks() - blocks)
+        else:
+            started = time.perf_counter_ns()
+            result = func(*args, **kwargs)
+            counters.record(time.perf_counter_ns() - started)
+        return result
+
+    return wrapper
+
+
+def timed(name: str | None = None):
+    """
+    Register a function for timing under `name` (default module.function).
+
+    Returns the function unchanged, or already wrapped if instrumentation is
+    on when the decorator runs.
+    """
+    def decorate(func):
+        metric_name = name or f"{func.__module__}.{func.__name__}"
+        _registered.append((func, metric_name))
+        if _enabled:
+            wrapper = _installed[id(func)] = _wrap(func, metric_name)
+            return wrapper
+        return func
+
+    return decorate
+
+
+# Directory of the project's modules; only these are rebound.
+_PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def _project_modules():
+    for module in list(sys.modules.values()):
+        path = getattr(module, "__file__", None)
+        if path and os.path.dirname(os.path.abspath(path)) == _PROJECT_DIR:
+            yield module
+
+
+def _rebind(replacements: dict) -> None:
+    """
+    Replace every module-level binding in the project's modules whose
+    value's id is a key of `replacements` with the mapped object.
+    """
+    for module in _project_modules():
+        namespace = module.__dict__
+        for attr, value in list(namespace.items()):
+            replacement = replacements.get(id(value))
+            if replacement is not None:
+                namespace[attr] = replacement
+
+
+class _Stage:
+    __slots__ = ("counters", "started", "blocks")
+
+    def __init__(self, name: str):
+        counters = self.counters = metric(name)
+        counters.calls += 1
+        self.started = None
+        if (counters.calls - 1) % _sample_every == 0:
+            self.blocks = sys.getallocatedblocks() if _allocations else 0
+            self.started = time.perf_counter_ns()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        if self.started is not None:
+            ns = time.perf_counter_ns() - self.started
+            self.counters.record(ns, sys.getallocatedblocks() - self.blocks if _allocations else 0)
+        return False
+
+
+class _NoStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NO_STAGE = _NoStage()
+
+
+def stage(name: str):
+    """
+    Context manager timing a pipeline step as metric `name`.
+    """
+    if not _enabled:
+        return _NO_STAGE
+    return _Stage(name)
+
+
+def enable(sample_every: int = 1, allocations: bool = False) -> None:
+    """
+    Start collecting. Counters from earlier runs are kept; see reset().
+
+    sample_every: time one call in N per metric (all calls are counted).
+    allocations: also record net allocated memory blocks per sampled call
+    (sys.getallocatedblocks, roughly doubles the per-call overhead).
+    """
+    global _enabled, _sample_every, _allocations
+    if sample_every < 1:
+        raise ValueError("sample_every must be at least 1")
+    _sample_every = sample_every
+    _allocations = allocations
+    if _enabled:
+        return
+    _enabled = True
+
+    for func, name in _registered:
+        if id(func) not in _installed:
+            _installed[id(func)] = _wrap(func, name)
+    _rebind(_installed)
+
+
+def disable() -> None:
+    """
+    Stop collecting and put the original functions back. Counters are kept.
+    """
+    global _enabled
+    if not _enabled:
+        return
+    _enabled = False
+    originals = {func for func, _ in _registered}
+    _rebind({
+        id(wrapper): func for func in originals
+        if (wrapper := _installed.get(id(func))) is not None
+    })
+    _installed.clear()
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def reset() -> None:
+    """
+    Drop all counters.
+    """
+    _metrics.clear()
+
+
+def export_state() -> dict:
+    """
+    Raw counters as plain data, e.g. to send back from a worker process.
+    """
+    return {
+        name: (m.calls, m.sampled, m.total_ns, m.min_ns, m.max_ns, m.alloc_blocks, m.histogram)
+        for name, m in _metrics.items()
+    }
+
+
+def merge_state(state: dict) -> None:
+    """
+    Add counters from export_state() (typically another process) to ours.
+    """
+    for name, values in state.items():
+        other = Metric()
+        (other.calls, other.sampled, other.total_ns, other.min_ns,
+         other.max_ns, other.alloc_blocks, other.histogram) = values
+        metric(name).merge(other)
+
+
+def snapshot() -> dict:
+    """
+    Current settings and per-metric summaries, sorted by metric name.
+    """
+    return {
+        "enabled": _enabled,
+        "sample_every": _sample_every,
+        "allocations": _allocations,
+        "metrics": {name: _metrics[name].summary() for name in sorted(_metrics)},
+    }
+
+
+def to_json(indent: int | None = 2) -> str:
+    # Imported here: logic.py imports this module and stays cheap to import.
+    import json
+
+    return json.dumps(snapshot(), indent=indent)
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def to_prometheus(prefix: str = "partd") -> str:
+    """
+    Metrics in the Prometheus text exposition format.
+
+    <prefix>_calls_total counts every call, <prefix>_call_seconds is a
+    summary over the sampled calls (quantiles, _sum, _count) and
+    <prefix>_alloc_blocks_total is present when allocations are tracked.
+    """
+    names = sorted(_metrics)
+    lines = [
+        f"# HELP {prefix}_calls_total Calls of each timed function or stage.",
+        f"# TYPE {prefix}_calls_total counter",
+    ]
+    for name in names:
+        lines.append(f'{prefix}_calls_total{{name="{_label(name)}"}} {_metrics[name].calls}')
+
+    lines += [
+        f"# HELP {prefix}_call_seconds Wall time of sampled calls.",
+        f"# TYPE {prefix}_call_seconds summary",
+    ]
+    for name in names:
+        m = _metrics[name]
+        label = _label(name)
+        for q in QUANTILES:
+            lines.append(f'{prefix}_call_seconds{{name="{label}",quantile="{q:g}"}} {m.quantile(q):.9g}')
+        lines.append(f'{prefix}_call_seconds_sum{{name="{label}"}} {m.total_ns / 1e9:.9g}')
+        lines.append(f'{prefix}_call_seconds_count{{name="{label}"}} {m.sampled}')
+
+    if _allocations or any(m.alloc_blocks for m in _metrics.values()):
+        lines += [
+            f"# HELP {prefix}_alloc_blocks_total Net memory blocks left allocated by sampled calls.",
+            f"# TYPE {prefix}_alloc_blocks_total counter",
+        ]
+        for name in names:
+            lines.append(f'{prefix}_alloc_blocks_total{{name="{_label(name)}"}} {_metrics[name].alloc_blocks}')
+
+    return "\n".join(lines) + "\n"
+
+
+def dump(path: str) -> None:
+    """
+    Write the metrics to `path`: Prometheus text for .prom/.txt files,
+    JSON otherwise.
+    """
+    text = to_prometheus() if path.endswith((".prom", ".txt")) else to_json() + "\n"
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+def format_table() -> str:
+    """
+    Plain-text table of the metrics, slowest total first.
+    """
+    rows = sorted(_metrics.items(), key=lambda item: item[1].summary()["total_seconds"], reverse=True)
+    if not rows:
+        return "no metrics recorded"
+    width = max(len("name"), *(len(name) for name, _ in rows))
+    lines = [
+        f"{'name':<{width}} {'calls':>11} {'total s':>9} {'mean us':>10} "
+        f"{'p50 us':>10} {'p99 us':>10} {'max us':>10}"
+    ]
+    for name, m in rows:
+        s = m.summary()
+        lines.append(
+            f"{name:<{width}} {s['calls']:>11,} {s['total_seconds']:>9.3f} {s['mean_seconds'] * 1e6:>10.2f} "
+            f"{s['p50_seconds'] * 1e6:>10.2f} {s['p99_seconds'] * 1e6:>10.2f} {s['max_seconds'] * 1e6:>10.2f}"
+        )
+    return "\n".join(lines)
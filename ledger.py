@@ -0,0 +1,287 @@
+"""
+Claim-level ledger for the cap and the monthly payment (smoothing) plan.
+
+logic.py spreads a synthetic annual estimate over SPENDING_WEIGHTS. Here we
+follow actual pharmacy claims instead. Each BeneficiaryLedger keeps a handful
+of running totals, so adding a claim is O(1) no matter how many claims came
+before it:
+
+- every claim counts toward CAP; once the cap is reached, further claims
+  cost the beneficiary nothing
+- before the plan start month, the beneficiary pays claims at the pharmacy
+- from the start month on, claims go onto the plan balance, and each month
+  the plan bills the balance divided by the months left in the year
+  (the same even-spread rule compute_monthly_with_smoothing uses)
+
+Claims streams sorted by member then month can be replayed in bulk with
+replay_claims, holding one ledger in memory at a time.
+
+Example:
+    python ledger.py claims.csv -o ledger.csv
+
+The claims CSV needs id, month, amount columns and may carry start_month.
+A member's start_month goes on their first claim row; later rows may leave
+it blank or repeat it, anything else is an error.
+"""
+
+import argparse
+import csv
+import math
+import sys
+from itertools import groupby
+
+import logic
+from logic import MONTHS_IN_YEAR
+
+
+class BeneficiaryLedger:
+    """
+    Running cap and payment-plan state for one beneficiary.
+    """
+
+    __slots__ = (
+        "member_id",
+        "start_month",
+        "cap",
+        "month",
+        "total_oop",
+        "paid_at_pharmacy",
+        "billed",
+        "balance",
+        "last_bill",
+        "cap_month",
+    )
+
+    def __init__(self, member_id: str, start_month: int = 1, cap: float | None = None):
+        if start_month < 1:
+            start_month = 1
+        elif start_month > 12:
+            start_month = 12
+
+        self.member_id = member_id
+        self.start_month = start_month
+        self.cap = logic.CAP if cap is None else cap
+        self.month = 1  # current (still open) month
+        self.total_oop = 0.0  # everything counted toward the cap
+        self.paid_at_pharmacy = 0.0  # paid directly, before the plan started
+        self.billed = 0.0  # billed through the payment plan so far
+        self.balance = 0.0  # owed to the plan, not billed yet
+        self.last_bill = 0.0  # plan bill for the most recently closed month
+        self.cap_month = None  # month the cap was reached, if it was
+
+    def __repr__(self):
+        return (
+            f"BeneficiaryLedger({self.member_id!r}, month={self.month}, "
+            f"total_oop={self.total_oop:.2f}, balance={self.balance:.2f})"
+        )
+
+    @property
+    def remaining_balance(self) -> float:
+        """
+        What the beneficiary still owes the plan.
+        """
+        return self.balance
+
+    @property
+    def installment(self) -> float:
+        """
+        The plan bill for the current month if no more claims arrive in it.
+        """
+        if self.month < self.start_month or self.month > MONTHS_IN_YEAR:
+            return 0.0
+        return self.balance / (MONTHS_IN_YEAR - self.month + 1)
+
+    @property
+    def total_paid(self) -> float:
+        """
+        Everything the beneficiary has actually paid so far.
+        """
+        return self.paid_at_pharmacy + self.billed
+
+    def add_claim(self, month: int, amount: float) -> float:
+        """
+        Record one claim and return the beneficiary's share of it after the cap.
+
+        Claims must arrive in month order.
+        """
+        if month < 1 or month > MONTHS_IN_YEAR:
+            raise ValueError(f"member {self.member_id}: month must be between 1 and 12")
+        if not math.isfinite(amount):
+            raise ValueError(f"member {self.member_id}: claim amount must be finite, got {amount!r}")
+        if month < self.month:
+            raise ValueError(
+                f"member {self.member_id}: claim for month {month} arrived after "
+                f"month {self.month} was opened; claims must be sorted by month"
+            )
+
+        self.advance_to(month)
+
+        room = self.cap - self.total_oop
+        cost = min(max(amount, 0.0), room) if room > 0 else 0.0
+        if cost == 0:
+            return 0.0
+
+        self.total_oop += cost
+        if self.cap_month is None and self.total_oop >= self.cap:
+            self.cap_month = month
+
+        if month < self.start_month:
+            self.paid_at_pharmacy += cost
+        else:
+            self.balance += cost
+        return cost
+
+    def advance_to(self, month: int) -> None:
+        """
+        Close every month before `month`, issuing its plan bill.
+
+        At most twelve months can be closed over a whole year, so this stays
+        O(1) per claim. advance_to(13) closes December and settles the year.
+        """
+        while self.month < month and self.month <= MONTHS_IN_YEAR:
+            if self.month >= self.start_month and self.balance > 0:
+                bill = self.balance / (MONTHS_IN_YEAR - self.month + 1)
+                self.billed += bill
+                self.balance -= bill
+                self.last_bill = bill
+            else:
+                self.last_bill = 0.0
+            self.month += 1
+
+    def close_year(self) -> None:
+        """
+        Close all remaining months; the plan balance is fully billed after this.
+        """
+        self.advance_to(MONTHS_IN_YEAR + 1)
+
+
+def replay_claims(claims, start_months: dict | None = None, default_start_month: int = 1):
+    """
+    Replay a claims stream and yield one closed-out ledger per member.
+
+    - claims: iterable of (member_id, month, amount), sorted by member id
+      (plain string order, as sorted() or `LC_ALL=C sort` give) and then
+      by month
+    - start_months: optional {member_id: start_month}
+    - default_start_month: used for members not in start_months
+
+    Only the ledger of the member being replayed is kept in memory. Each id
+    is checked against the previous one, so a member whose claims are not
+    contiguous raises ValueError instead of being replayed as two partial
+    years.
+    """
+    if start_months is None:
+        start_months = {}
+
+    previous = None
+    for member_id, member_claims in groupby(claims, key=lambda claim: claim[0]):
+        if previous is not None and member_id < previous:
+            raise ValueError(
+                f"claims for member {member_id!r} are not contiguous or not sorted "
+                f"(they follow {previous!r}); sort the claims by member id"
+            )
+        previous = member_id
+        ledger = BeneficiaryLedger(member_id, start_months.get(member_id, default_start_month))
+        for _, month, amount in member_claims:
+            ledger.add_claim(month, amount)
+        ledger.close_year()
+        yield ledger
+
+
+def _read_claims_csv(path: str, start_months: dict):
+    """
+    Stream (id, month, amount) tuples from a claims CSV.
+
+    start_month values are collected into `start_months` as members appear,
+    before their first claim is yielded. A later row of the same member
+    with a different start_month is an error rather than being ignored.
+    """
+    current_id = None
+    current_start = None
+    with open(path, newline="", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            line_no = reader.line_num
+            try:
+                member_id = row["id"].strip()
+                month = int(row["month"])
+                amount = float(row["amount"])
+            except (KeyError, AttributeError, TypeError, ValueError):
+                raise ValueError(
+                    f"{path}:{line_no}: expected id, month and amount columns"
+                ) from None
+            if not math.isfinite(amount):
+                raise ValueError(f"{path}:{line_no}: amount must be finite, got {row['amount'].strip()!r}")
+
+            start = (row.get("start_month") or "").strip()
+            if start:
+                try:
+                    start = int(start)
+                except ValueError:
+                    raise ValueError(
+                        f"{path}:{line_no}: start_month must be a whole number, got {start!r}"
+                    ) from None
+            if member_id != current_id:
+                current_id, current_start = member_id, start
+                if start:
+                    start_months[member_id] = start
+            elif start and start != current_start:
+                raise ValueError(
+                    f"{path}:{line_no}: start_month {start} for member {member_id!r} differs from "
+                    f"their first row ({current_start or 'blank'}); put it on the first row only"
+                )
+            yield member_id, month, amount
+
+
+OUTPUT_FIELDS = [
+    "id",
+    "start_month",
+    "total_oop",
+    "paid_at_pharmacy",
+    "billed",
+    "cap_month",
+]
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Replay a sorted claims CSV through the cap and payment plan ledger."
+    )
+    parser.add_argument(
+        "claims", help="CSV with id, month, amount[, start_month], sorted by id (string order) then month"
+    )
+    parser.add_argument("-o", "--output", default="-", help="output CSV (default: stdout)")
+    args = parser.parse_args(argv)
+
+    # Only the start month of the member being replayed is needed, so the
+    # dict is cleared as each member finishes.
+    start_months = {}
+    out = sys.stdout if args.output == "-" else open(args.output, "w", newline="", encoding="utf-8")
+    try:
+        writer = csv.writer(out, lineterminator="\n")
+        writer.writerow(OUTPUT_FIELDS)
+        count = 0
+        for ledger in replay_claims(_read_claims_csv(args.claims, start_months), start_months):
+            writer.writerow([
+                ledger.member_id,
+                ledger.start_month,
+                ledger.total_oop,
+                ledger.paid_at_pharmacy,
+                ledger.billed,
+                ledger.cap_month or "",
+            ])
+            start_months.pop(ledger.member_id, None)
+            count += 1
+    except (OSError, ValueError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    print(f"Replayed claims for {count:,} members.", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
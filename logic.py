@@ -1,6 +1,19 @@
+import math
+import sys
+from typing import NamedTuple
+
+try:
+    from instrument import timed
+except ImportError:  # logic.py copied on its own; nothing to instrument
+    def timed(name=None):
+        return lambda func: func
+
 CAP = 2000.0
 MONTHS_IN_YEAR = 12
 
+# Bump when the scenario rules change, so cached results are recomputed.
+MODEL_VERSION = 1
+
 
 SPENDING_WEIGHTS = [
     0.15,  # Ja
@@ -17,14 +30,51 @@ SPENDING_WEIGHTS = [
     0.02,  # De
 ]
 
-
-def _build_spending(annual_oop_estimate: float, cap: float | None) -> list[float]:
+# Named monthly spending patterns. "default" is the built-in curve above;
+# profiles fitted from claims (fit_weights.py) are added with
+# load_weight_profiles() and switched to with use_weight_profile().
+DEFAULT_WEIGHT_PROFILE = "default"
+WEIGHT_PROFILES: dict[str, tuple[float, ...]] = {DEFAULT_WEIGHT_PROFILE: tuple(SPENDING_WEIGHTS)}
+
+
+MONTH_NAMES = ["Jan", "Feb", "Mar", "Apr", "May", "Jun",
+               "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+
+PERSONAS = {
+    "Custom": None,
+    "High cost oncology patient": {
+        "annual_oop": 5000.0,
+        "start_month": 2,
+        "description": "Very high cost drugs, likely to hit cap early in the year."
+    },
+    "Insulin dependent diabetic": {
+        "annual_oop": 2500.0,
+        "start_month": 1,
+        "description": "Steady monthly use of insulin and other meds."
+    },
+    "Chronic condition on mixed meds": {
+        "annual_oop": 1800.0,
+        "start_month": 1,
+        "description": "Multiple chronic medications, moderate annual costs."
+    },
+    "Occasional user": {
+        "annual_oop": 600.0,
+        "start_month": 1,
+        "description": "Only occasional prescriptions through the year."
+    },
+}
+
+
+@timed()
+def _build_spending(annual_oop_estimate: float, cap: float | None, weights=None) -> list[float]:
     """
     Build the month-by-month spending pattern.
 
     - annual_oop_estimate: user estimate of annual out of pocket
     - cap: if not None, cap total spending at this value (e.g. CAP).
       If None, do not cap.
+    - weights: 12 monthly shares to use instead of SPENDING_WEIGHTS
+      (e.g. a fitted profile from WEIGHT_PROFILES).
 
     Uses a fixed front-loaded pattern and adjusts for any tiny rounding error.
     """
@@ -37,7 +87,7 @@ def _build_spending(annual_oop_estimate: float, cap: float | None) -> list[float
     if total == 0:
         return [0.0] * MONTHS_IN_YEAR
 
-    baseline = [w * total for w in SPENDING_WEIGHTS]
+    baseline = [w * total for w in (SPENDING_WEIGHTS if weights is None else weights)]
 
    
     diff = total - sum(baseline)
@@ -46,23 +96,26 @@ def _build_spending(annual_oop_estimate: float, cap: float | None) -> list[float
     return baseline
 
 
-def compute_monthly_no_cap(annual_oop_estimate: float) -> list[float]:
+@timed()
+def compute_monthly_no_cap(annual_oop_estimate: float, weights=None) -> list[float]:
     """
     Scenario 1: No cap at all.
     Apply the front-loaded pattern to the full annual estimate.
     """
-    return _build_spending(annual_oop_estimate, cap=None)
+    return _build_spending(annual_oop_estimate, cap=None, weights=weights)
 
 
-def compute_monthly_without_smoothing(annual_oop_estimate: float) -> list[float]:
+@timed()
+def compute_monthly_without_smoothing(annual_oop_estimate: float, weights=None) -> list[float]:
     """
     Scenario 2: Cap at 2000, no monthly payment plan.
     Apply the front-loaded pattern, but cap total at CAP.
     """
-    return _build_spending(annual_oop_estimate, cap=CAP)
+    return _build_spending(annual_oop_estimate, cap=CAP, weights=weights)
 
 
-def compute_monthly_with_smoothing(annual_oop_estimate: float, start_month: int) -> list[float]:
+@timed()
+def compute_monthly_with_smoothing(annual_oop_estimate: float, start_month: int, weights=None) -> list[float]:
     """
     Scenario 3: Cap at 2000, with monthly payment (smoothing) plan.
 
@@ -80,6 +133,8 @@ def compute_monthly_with_smoothing(annual_oop_estimate: float, start_month: int)
         over the remaining months.
 
     Returns a list of 12 floats: what the beneficiary pays each month.
+    All scenario functions take optional `weights` in place of
+    SPENDING_WEIGHTS.
     """
 
     if start_month < 1:
@@ -88,9 +143,17 @@ def compute_monthly_with_smoothing(annual_oop_estimate: float, start_month: int)
         start_month = 12
 
 
-    baseline_cap = compute_monthly_without_smoothing(annual_oop_estimate)
-    total_cap = sum(baseline_cap)
+    baseline_cap = compute_monthly_without_smoothing(annual_oop_estimate, weights)
+    return _smooth_baseline(baseline_cap, sum(baseline_cap), start_month)
 
+
+@timed()
+def _smooth_baseline(baseline_cap: list[float], total_cap: float, start_month: int) -> list[float]:
+    """
+    Apply the smoothing rules to an already capped baseline.
+
+    total_cap must be sum(baseline_cap) and start_month already clamped.
+    """
     if total_cap == 0:
         return [0.0] * MONTHS_IN_YEAR
 
@@ -122,3 +185,412 @@ def compute_monthly_with_smoothing(annual_oop_estimate: float, start_month: int)
         payments[-1] -= diff
 
     return payments
+
+
+
+class ScenarioSummary(NamedTuple):
+    """
+    Summary numbers for the three scenarios, as shown by run_scenario.
+
+    month_* fields are month numbers (1 = January). When a series is all
+    zeros its peak month is reported as January.
+    """
+
+    total_no_cap: float
+    total_cap: float
+    total_cap_smooth: float
+    max_no_cap: float
+    max_cap_no_smooth: float
+    max_cap_smooth: float
+    month_no_cap: int
+    month_cap_no_smooth: int
+    month_cap_smooth: int
+    avoided: float
+
+
+def _series_stats(values: list[float]) -> tuple[float, float, int]:
+    """
+    Total, peak and 1-based peak month of a monthly series.
+    """
+    peak = max(values)
+    return sum(values), peak, (values.index(peak) + 1 if peak > 0 else 1)
+
+
+@timed()
+def compute_scenarios(
+    annual_oop_estimate: float, start_month: int, weights=None
+) -> tuple[ScenarioSummary, tuple[list[float], list[float], list[float]]]:
+    """
+    Compute all three scenarios and their summary numbers in one go.
+
+    Returns (summary, (no_cap, cap_no_smooth, cap_smooth)). The series and
+    numbers are identical to calling the three compute_monthly_* functions
+    and summarizing their results, but the work is shared:
+
+    - the capped baseline is the uncapped one whenever the estimate is at or
+      under CAP, so it is only rebuilt for estimates above the cap
+    - the smoothing path reuses the capped baseline and its total instead of
+      building them again
+    - each series is summed, maxed and searched once
+    """
+    if start_month < 1:
+        start_month = 1
+    elif start_month > 12:
+        start_month = 12
+
+    no_cap = _build_spending(annual_oop_estimate, cap=None, weights=weights)
+    total_no_cap, max_no_cap, month_no_cap = _series_stats(no_cap)
+
+    if max(annual_oop_estimate, 0.0) <= CAP:
+        cap_no_smooth = no_cap[:]
+        total_cap, max_cap_no_smooth, month_cap_no_smooth = total_no_cap, max_no_cap, month_no_cap
+    else:
+        cap_no_smooth = _build_spending(annual_oop_estimate, cap=CAP, weights=weights)
+        total_cap, max_cap_no_smooth, month_cap_no_smooth = _series_stats(cap_no_smooth)
+
+    cap_smooth = _smooth_baseline(cap_no_smooth, total_cap, start_month)
+    total_cap_smooth, max_cap_smooth, month_cap_smooth = _series_stats(cap_smooth)
+
+    summary = ScenarioSummary(
+        total_no_cap,
+        total_cap,
+        total_cap_smooth,
+        max_no_cap,
+        max_cap_no_smooth,
+        max_cap_smooth,
+        month_no_cap,
+        month_cap_no_smooth,
+        month_cap_smooth,
+        max(total_no_cap - total_cap, 0.0),
+    )
+    return summary, (no_cap, cap_no_smooth, cap_smooth)
+
+
+# sum() carries a Neumaier compensation term for floats from Python 3.12 on.
+_COMPENSATED_SUM = sys.version_info >= (3, 12)
+
+
+def _finish_sum(s: float, c: float) -> float:
+    """
+    The value sum() returns for a running total s and compensation c.
+    """
+    if _COMPENSATED_SUM and c and math.isfinite(c):
+        return s + c
+    return s
+
+
+def _pattern_pass(total: float, start_month: int, weights) -> tuple:
+    """
+    Walk the front-loaded pattern for `total` once, without building it.
+
+    Returns (sum, peak, peak_index, head) where head is the running
+    (sum, compensation, peak, peak_index) state over the months before
+    start_month, i.e. what the smoothing rules see as already paid. Sums
+    follow sum() bit for bit; peaks follow max() and list.index().
+    """
+    last = MONTHS_IN_YEAR - 1
+    head_at = start_month - 1
+    s = c = 0.0
+    peak = float("-inf")
+    peak_index = 0
+    head = (s, c, peak, peak_index)
+    if _COMPENSATED_SUM:
+        for i in range(last):
+            if i == head_at:
+                head = (s, c, peak, peak_index)
+            v = weights[i] * total
+            t = s + v
+            # Both are non-negative here, so this is the abs() comparison.
+            c += (s - t) + v if s >= v else (v - t) + s
+            s = t
+            if v > peak:
+                peak = v
+                peak_index = i
+    else:
+        # Plain left-to-right sum; the compensation stays 0.0.
+        for i in range(last):
+            if i == head_at:
+                head = (s, c, peak, peak_index)
+            v = weights[i] * total
+            s += v
+            if v > peak:
+                peak = v
+                peak_index = i
+    if head_at == last:
+        head = (s, c, peak, peak_index)
+
+    # The last month absorbs the rounding difference, as in _build_spending.
+    v = weights[last] * total
+    v += total - _add_sum(s, c, v)
+    if v > peak:
+        peak = v
+        peak_index = last
+    return _add_sum(s, c, v), peak, peak_index, head
+
+
+def _add_sum(s: float, c: float, x: float) -> float:
+    """
+    sum() of a series whose running state is (s, c), with x appended.
+    """
+    t = s + x
+    if not _COMPENSATED_SUM:
+        return t
+    c += (s - t) + x if abs(s) >= abs(x) else (x - t) + s
+    return _finish_sum(t, c)
+
+
+def _smooth_stats(total_cap: float, head: tuple, start_month: int) -> tuple[float, float, int]:
+    """
+    Total, peak and peak index of _smooth_baseline's result, from the capped
+    baseline's head state.
+    """
+    s, c, peak, peak_index = head
+    remaining_months = MONTHS_IN_YEAR - (start_month - 1)
+    remaining_balance = max(total_cap - _finish_sum(s, c), 0.0)
+    if remaining_balance == 0:
+        # The months from start_month on stay 0.0, which changes neither
+        # the sum nor the peak of the months already paid.
+        return _finish_sum(s, c), peak, peak_index
+
+    smoothed = remaining_balance / remaining_months
+    if remaining_months > 1 and smoothed > peak:
+        peak, peak_index = smoothed, start_month - 1
+    for _ in range(remaining_months - 1):
+        t = s + smoothed
+        if _COMPENSATED_SUM:
+            c += (s - t) + smoothed if abs(s) >= abs(smoothed) else (smoothed - t) + s
+        s = t
+
+    # December takes any overshoot off, as in _smooth_baseline.
+    last = smoothed
+    total_paid = _add_sum(s, c, last)
+    if total_paid > total_cap:
+        last -= total_paid - total_cap
+        total_paid = _add_sum(s, c, last)
+    if last > peak:
+        peak, peak_index = last, MONTHS_IN_YEAR - 1
+    return total_paid, peak, peak_index
+
+
+# Summary numbers of both capped scenarios for estimates above CAP, keyed
+# by (CAP, weights, start month). They do not depend on the estimate, so
+# they are worked out once per model and start month.
+_capped_summaries: dict[tuple, tuple] = {}
+_MAX_CAPPED_SUMMARIES = 12 * 64
+
+
+def _capped_stats(start_month: int, weights) -> tuple:
+    """
+    (total, peak, peak_index) of the capped series followed by the same for
+    the smoothed one, for any estimate above CAP.
+    """
+    key = (CAP, tuple(weights), start_month)
+    stats = _capped_summaries.get(key)
+    if stats is None:
+        if len(_capped_summaries) >= _MAX_CAPPED_SUMMARIES:
+            _capped_summaries.clear()
+        total_cap, peak, peak_index, head = _pattern_pass(CAP, start_month, weights)
+        stats = (total_cap, peak, peak_index) + _smooth_stats(total_cap, head, start_month)
+        _capped_summaries[key] = stats
+    return stats
+
+
+@timed()
+def summarize_scenarios(annual_oop_estimate: float, start_month: int, weights=None) -> ScenarioSummary:
+    """
+    Summary numbers only, for bulk runs that do not need the monthly series.
+
+    Same numbers as compute_scenarios, but totals, peaks and peak months are
+    tracked while the monthly values are generated, so no series is built
+    or walked again.
+    """
+    if not math.isfinite(annual_oop_estimate):
+        return compute_scenarios(annual_oop_estimate, start_month, weights)[0]
+    if weights is None:
+        weights = SPENDING_WEIGHTS
+    if start_month < 1:
+        start_month = 1
+    elif start_month > 12:
+        start_month = 12
+
+    total = max(annual_oop_estimate, 0.0)
+    if total == 0:
+        return ScenarioSummary(0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 1, 1, 1, 0.0)
+
+    total_no_cap, max_no_cap, index_no_cap, head = _pattern_pass(total, start_month, weights)
+    if total <= CAP:
+        total_cap, max_cap_no_smooth, index_cap_no_smooth = total_no_cap, max_no_cap, index_no_cap
+        total_cap_smooth, max_cap_smooth, index_cap_smooth = _smooth_stats(total_cap, head, start_month)
+    else:
+        (total_cap, max_cap_no_smooth, index_cap_no_smooth,
+         total_cap_smooth, max_cap_smooth, index_cap_smooth) = _capped_stats(start_month, weights)
+
+    return ScenarioSummary(
+        total_no_cap,
+        total_cap,
+        total_cap_smooth,
+        max_no_cap,
+        max_cap_no_smooth,
+        max_cap_smooth,
+        index_no_cap + 1 if max_no_cap > 0 else 1,
+        index_cap_no_smooth + 1 if max_cap_no_smooth > 0 else 1,
+        index_cap_smooth + 1 if max_cap_smooth > 0 else 1,
+        max(total_no_cap - total_cap, 0.0),
+    )
+
+# Normalized smoothing profiles, one row per start month. Row s-1 is what
+# compute_monthly_with_smoothing returns for a capped total of 1.0, so any
+# other total is just that row scaled. Built on first use and rebuilt when
+# CAP or SPENDING_WEIGHTS change.
+_profile_table: tuple[tuple[float, ...], ...] | None = None
+_profile_key: tuple | None = None
+
+
+def _model_key() -> tuple:
+    """
+    The model parameters cached results depend on.
+    """
+    return (CAP, tuple(SPENDING_WEIGHTS))
+
+
+def model_fingerprint(weights=None) -> str:
+    """
+    Short hash of MODEL_VERSION, CAP and SPENDING_WEIGHTS (or `weights`).
+
+    Anything stored outside the process (result caches, saved tables) should
+    carry this so it can be thrown away when the model changes.
+    """
+    # Imported here to keep `import logic` cheap for command-line use.
+    import hashlib
+    import json
+
+    params = {"version": MODEL_VERSION, "cap": CAP, "weights": [float(w) for w in (SPENDING_WEIGHTS if weights is None else weights)]}
+    return hashlib.sha256(json.dumps(params, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def register_weight_profile(name: str, weights) -> tuple[float, ...]:
+    """
+    Add (or replace) a named spending pattern.
+
+    weights must be 12 non-negative numbers with a positive sum; they are
+    scaled to sum to 1.0. The built-in DEFAULT_WEIGHT_PROFILE cannot be
+    replaced. Returns the stored weights.
+    """
+    if name == DEFAULT_WEIGHT_PROFILE:
+        raise ValueError(f"weight profile {name!r} is built in and cannot be replaced")
+    values = [float(w) for w in weights]
+    if len(values) != MONTHS_IN_YEAR:
+        raise ValueError(f"weight profile {name!r} needs {MONTHS_IN_YEAR} values, got {len(values)}")
+    if any(not w >= 0 or w == float("inf") for w in values):
+        raise ValueError(f"weight profile {name!r} has negative or non-finite values")
+    total = sum(values)
+    if total <= 0:
+        raise ValueError(f"weight profile {name!r} sums to zero")
+
+    profile = tuple(w / total for w in values)
+    WEIGHT_PROFILES[name] = profile
+    return profile
+
+
+def load_weight_profiles(path: str) -> list[str]:
+    """
+    Register every profile in a fit_weights.py output file and return
+    their names.
+    """
+    import json
+
+    with open(path, encoding="utf-8") as f:
+        document = json.load(f)
+    profiles = document.get("profiles") if isinstance(document, dict) else None
+    if not isinstance(profiles, dict):
+        raise ValueError(f"{path}: not a weight profiles file (no profiles)")
+
+    for name, profile in profiles.items():
+        weights = profile.get("weights") if isinstance(profile, dict) else profile
+        if not isinstance(weights, list):
+            raise ValueError(f"{path}: profile {name!r} has no weights list")
+        register_weight_profile(name, weights)
+    return list(profiles)
+
+
+def weight_profile(name: str) -> tuple[float, ...]:
+    """
+    The weights of a registered profile, e.g. to pass as `weights` to the
+    scenario functions for one beneficiary.
+    """
+    try:
+        return WEIGHT_PROFILES[name]
+    except KeyError:
+        raise ValueError(
+            f"unknown weight profile {name!r} (have: {', '.join(sorted(WEIGHT_PROFILES))})"
+        ) from None
+
+
+def use_weight_profile(name: str) -> None:
+    """
+    Make the named profile the spending pattern every scenario uses.
+
+    SPENDING_WEIGHTS is updated in place, so modules holding a reference to
+    it see the change, and the profile table, cents allocation plans, memo
+    caches and result cache fingerprints follow it like any other change to
+    SPENDING_WEIGHTS.
+    """
+    SPENDING_WEIGHTS[:] = weight_profile(name)
+
+
+def _build_profile_table(weights) -> tuple[tuple[float, ...], ...]:
+    """
+    Run the smoothing rules once per start month on a total of 1.0.
+    """
+    baseline = list(weights)
+    baseline[-1] += 1.0 - sum(baseline)
+
+    table = []
+    for start_month in range(1, MONTHS_IN_YEAR + 1):
+        row = baseline[: start_month - 1]
+        remaining_balance = max(1.0 - sum(row), 0.0)
+        remaining_months = MONTHS_IN_YEAR - (start_month - 1)
+        row += [remaining_balance / remaining_months] * remaining_months
+        table.append(tuple(row))
+
+    return tuple(table)
+
+
+def profile_table() -> tuple[tuple[float, ...], ...]:
+    """
+    Return the 12x12 table of normalized smoothing profiles.
+
+    Row i is the monthly payment pattern for start month i + 1 and sums to
+    1.0. The table is cached and rebuilt automatically if CAP or
+    SPENDING_WEIGHTS have changed since it was built.
+    """
+    global _profile_table, _profile_key
+
+    key = _model_key()
+    if key != _profile_key:
+        _profile_table = _build_profile_table(key[1])
+        _profile_key = key
+    return _profile_table
+
+
+@timed()
+def compute_monthly_with_smoothing_from_profile(
+    annual_oop_estimate: float, start_month: int
+) -> list[float]:
+    """
+    Scenario 3 as a scale-and-lookup: capped total times the profile row.
+
+    Gives the same schedule as compute_monthly_with_smoothing up to float
+    rounding (last-bit differences), without rebuilding the baseline or
+    looping month by month on every call.
+    """
+    if start_month < 1:
+        start_month = 1
+    elif start_month > 12:
+        start_month = 12
+
+    total_cap = min(max(annual_oop_estimate, 0.0), CAP)
+    if total_cap == 0:
+        return [0.0] * MONTHS_IN_YEAR
+
+    return [total_cap * p for p in profile_table()[start_month - 1]]
@@ -0,0 +1,146 @@
+"""
+Opt-in in-process memoization for the scenario functions.
+
+The GUI and service wrappers evaluate the same inputs over and over: the
+PERSONAS presets and round-number estimates. ScenarioMemo wraps the logic.py
+scenario functions and run_scenario with a bounded LRU cache:
+
+- keys are the normalized inputs (estimate floored at 0, start month
+  clamped to 1-12), so inputs that give the same answer share an entry
+- results are returned as tuples (and a read-only mapping for
+  run_scenario's series), so callers cannot corrupt cached values
+- hits, misses and evictions are counted
+- the whole cache is dropped automatically when CAP or SPENDING_WEIGHTS
+  change at runtime
+
+Nothing uses it unless you create one:
+
+    from memo import ScenarioMemo
+    memo = ScenarioMemo(maxsize=4096)
+    memo.compute_monthly_with_smoothing(3000, 7)
+"""
+
+from collections import OrderedDict
+from types import MappingProxyType
+
+import logic
+from scenario import run_scenario
+
+DEFAULT_MAXSIZE = 4096
+
+
+def _clamp_month(start_month: int) -> int:
+    if start_month < 1:
+        return 1
+    if start_month > 12:
+        return 12
+    return start_month
+
+
+class ScenarioMemo:
+    """
+    Bounded LRU cache in front of the scenario functions.
+    """
+
+    def __init__(self, maxsize: int = DEFAULT_MAXSIZE):
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._entries = OrderedDict()
+        self._model_key = logic._model_key()
+
+    def _lookup(self, key, compute):
+        # logic._model_key() rather than the public model_fingerprint(): the
+        # fingerprint hashes the model on every call (~14us against ~0.2us),
+        # more than a cache hit is worth. test_memo.py pins the behaviour.
+        model_key = logic._model_key()
+        if model_key != self._model_key:
+            self._entries.clear()
+            self._model_key = model_key
+            self.invalidations += 1
+
+        entries = self._entries
+        try:
+            value = entries[key]
+        except KeyError:
+            pass
+        else:
+            entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+        self.misses += 1
+        value = compute()
+        entries[key] = value
+        if len(entries) > self.maxsize:
+            entries.popitem(last=False)
+            self.evictions += 1
+        return value
+
+    def compute_monthly_no_cap(self, annual_oop_estimate: float) -> tuple[float, ...]:
+        estimate = max(annual_oop_estimate, 0.0)
+        return self._lookup(
+            ("no_cap", estimate),
+            lambda: tuple(logic.compute_monthly_no_cap(estimate)),
+        )
+
+    def compute_monthly_without_smoothing(self, annual_oop_estimate: float) -> tuple[float, ...]:
+        estimate = max(annual_oop_estimate, 0.0)
+        return self._lookup(
+            ("without_smoothing", estimate),
+            lambda: tuple(logic.compute_monthly_without_smoothing(estimate)),
+        )
+
+    def compute_monthly_with_smoothing(self, annual_oop_estimate: float, start_month: int) -> tuple[float, ...]:
+        estimate = max(annual_oop_estimate, 0.0)
+        month = _clamp_month(start_month)
+        return self._lookup(
+            ("with_smoothing", estimate, month),
+            lambda: tuple(logic.compute_monthly_with_smoothing(estimate, month)),
+        )
+
+    def summarize_scenarios(self, annual_oop_estimate: float, start_month: int) -> logic.ScenarioSummary:
+        estimate = max(annual_oop_estimate, 0.0)
+        month = _clamp_month(start_month)
+        return self._lookup(
+            ("summary", estimate, month),
+            lambda: logic.summarize_scenarios(estimate, month),
+        )
+
+    def run_scenario(self, annual_oop_estimate: float, start_month: int, persona_name: str | None):
+        """
+        Memoized scenario.run_scenario.
+
+        Returns (months, series, explanation) with months as a tuple and
+        series as a read-only {label: tuple} mapping. The explanation quotes
+        the estimate as typed, so the raw estimate is part of the key here.
+        """
+        month = _clamp_month(start_month)
+        persona = persona_name if persona_name and logic.PERSONAS.get(persona_name) else None
+
+        def compute():
+            months, series, explanation = run_scenario(annual_oop_estimate, month, persona)
+            frozen = MappingProxyType({label: tuple(values) for label, values in series.items()})
+            return tuple(months), frozen, explanation
+
+        return self._lookup(("run_scenario", annual_oop_estimate, month, persona), compute)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        """
+        Counters and current size, e.g. for a status line or a metrics endpoint.
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+        }
@@ -0,0 +1,268 @@
+"""
+Monte Carlo view of the cap and smoothing scenarios.
+
+The calculator gives one answer per annual estimate. Here each persona's
+annual out of pocket spend is drawn from a distribution around its estimate,
+and the monthly pattern is drawn from a Dirichlet distribution centred on
+SPENDING_WEIGHTS, so some members front-load more than the profile and some
+less. Every draw runs through batch.batch_compute_scenarios with its own
+pattern, in fixed-size batches, and we report percentile bands for:
+
+- the peak monthly bill with the cap only
+- the peak monthly bill with the cap and the monthly payment plan
+- the month the cap is reached (among draws that reach it)
+
+Draws are split into fixed-size batches, each with its own child seed from
+one numpy SeedSequence, so the results for a given seed are the same with
+or without the process pool and for any worker count.
+
+Example:
+    python montecarlo.py --draws 100000 --seed 7 --workers 4
+"""
+
+import argparse
+import json
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import batch
+import logic
+from logic import MONTHS_IN_YEAR, PERSONAS
+
+DISTRIBUTIONS = ("lognormal", "gamma", "normal")
+
+PERCENTILES = (5, 25, 50, 75, 95)
+
+DEFAULT_BATCH_SIZE = 50_000
+
+
+def sample_annual(rng: np.random.Generator, mean: float, spread: float, size: int, distribution: str) -> np.ndarray:
+    """
+    Draw annual out of pocket estimates with the given mean.
+
+    spread is the coefficient of variation (standard deviation / mean).
+    Normal draws are clipped at zero.
+    """
+    if mean <= 0 or spread <= 0:
+        return np.full(size, max(mean, 0.0))
+
+    if distribution == "lognormal":
+        sigma = np.sqrt(np.log1p(spread ** 2))
+        return rng.lognormal(np.log(mean) - sigma ** 2 / 2, sigma, size)
+    if distribution == "gamma":
+        shape = 1.0 / spread ** 2
+        return rng.gamma(shape, mean / shape, size)
+    if distribution == "normal":
+        return np.maximum(rng.normal(mean, spread * mean, size), 0.0)
+    raise ValueError(f"unknown distribution: {distribution}")
+
+
+def sample_weights(rng: np.random.Generator, concentration: float, size: int) -> np.ndarray:
+    """
+    Draw (size, 12) monthly patterns around SPENDING_WEIGHTS.
+
+    Each row sums to 1. Higher concentration keeps draws closer to the
+    profile; 0 (or less) turns the variation off.
+    """
+    weights = np.asarray(logic.SPENDING_WEIGHTS, dtype=float)
+    weights = weights / weights.sum()
+    if concentration <= 0:
+        return np.broadcast_to(weights, (size, MONTHS_IN_YEAR))
+    return rng.dirichlet(concentration * weights, size)
+
+
+def simulate_batch(
+    annual: np.ndarray, weights: np.ndarray, start_month: int
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Run a batch of draws through batch.batch_compute_scenarios, each with
+    its own monthly pattern, so the cap and smoothing rules are the same
+    ones the calculator uses.
+
+    Returns (peak_cap_only, peak_smoothing, cap_hit_month) where
+    cap_hit_month is the month (1-12) the uncapped cumulative spend reaches
+    CAP, or 0 if it never does.
+    """
+    summary, (no_cap, _, _) = batch.batch_compute_scenarios(annual, start_month, weights)
+
+    reached = np.cumsum(no_cap, axis=1) >= logic.CAP
+    cap_hit_month = np.where(reached.any(axis=1), reached.argmax(axis=1) + 1, 0)
+
+    return summary["max_cap_no_smooth"], summary["max_cap_smooth"], cap_hit_month
+
+
+def _init_worker(weights: tuple, cap: float) -> None:
+    """
+    Pool initializer: use the parent's spending weights (a fitted profile
+    may be in use) and cap, whatever the start method.
+    """
+    logic.SPENDING_WEIGHTS[:] = weights
+    logic.CAP = cap
+
+
+def _run_batch(seed, size, annual_mean, spread, distribution, concentration, start_month):
+    rng = np.random.default_rng(seed)
+    annual = sample_annual(rng, annual_mean, spread, size, distribution)
+    weights = sample_weights(rng, concentration, size)
+    return simulate_batch(annual, weights, start_month)
+
+
+def simulate_persona(
+    annual_mean: float,
+    start_month: int,
+    draws: int,
+    seed: np.random.SeedSequence,
+    spread: float = 0.5,
+    distribution: str = "lognormal",
+    concentration: float = 100.0,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    pool: ProcessPoolExecutor | None = None,
+) -> dict:
+    """
+    Simulate `draws` members around one persona and summarize the results.
+
+    Returns a dict of percentile bands (keyed "p5", "p25", ...) for
+    peak_cap_only, peak_smoothing and cap_hit_month, plus the share of
+    draws that reach the cap. Raises ValueError if draws or batch_size is
+    less than 1.
+    """
+    if draws < 1 or batch_size < 1:
+        raise ValueError("draws and batch_size must be at least 1")
+
+    sizes = [batch_size] * (draws // batch_size)
+    if draws % batch_size:
+        sizes.append(draws % batch_size)
+    seeds = seed.spawn(len(sizes))
+
+    args = [
+        (child, size, annual_mean, spread, distribution, concentration, start_month)
+        for child, size in zip(seeds, sizes)
+    ]
+    if pool is None:
+        results = [_run_batch(*a) for a in args]
+    else:
+        results = list(pool.map(_run_batch, *zip(*args)))
+
+    peak_cap_only = np.concatenate([r[0] for r in results])
+    peak_smoothing = np.concatenate([r[1] for r in results])
+    cap_hit_month = np.concatenate([r[2] for r in results])
+    hit = cap_hit_month[cap_hit_month > 0]
+
+    def bands(values):
+        if values.size == 0:
+            return {f"p{p}": None for p in PERCENTILES}
+        return {f"p{p}": float(v) for p, v in zip(PERCENTILES, np.percentile(values, PERCENTILES))}
+
+    return {
+        "draws": draws,
+        "share_hitting_cap": float(hit.size / draws),
+        "peak_cap_only": bands(peak_cap_only),
+        "peak_smoothing": bands(peak_smoothing),
+        "cap_hit_month": bands(hit),
+    }
+
+
+def simulate_personas(
+    draws: int,
+    seed: int | None = None,
+    workers: int = 1,
+    **options,
+) -> dict:
+    """
+    Run simulate_persona for every persona in PERSONAS.
+
+    Returns {persona_name: result}. Extra keyword arguments are passed on
+    to simulate_persona.
+    """
+    named = [(name, info) for name, info in PERSONAS.items() if info]
+    seeds = np.random.SeedSequence(seed).spawn(len(named))
+
+    pool = None
+    if workers > 1:
+        pool = ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker, initargs=(tuple(logic.SPENDING_WEIGHTS), logic.CAP)
+        )
+    try:
+        return {
+            name: simulate_persona(info["annual_oop"], info["start_month"], draws, child, pool=pool, **options)
+            for (name, info), child in zip(named, seeds)
+        }
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+
+def _format_bands(bands: dict, money: bool) -> str:
+    cells = []
+    for p in PERCENTILES:
+        value = bands[f"p{p}"]
+        if value is None:
+            cells.append(f"{'-':>8}")
+        elif money:
+            cells.append(f"${value:>7,.0f}")
+        else:
+            cells.append(f"{value:>8.1f}")
+    return " ".join(cells)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Monte Carlo percentile bands for each persona.")
+    parser.add_argument("--draws", type=int, default=100_000, help="draws per persona (default: 100000)")
+    parser.add_argument("--seed", type=int, default=None, help="seed for reproducible runs")
+    parser.add_argument("--distribution", choices=DISTRIBUTIONS, default="lognormal")
+    parser.add_argument(
+        "--spread",
+        type=float,
+        default=0.5,
+        help="coefficient of variation of annual spend (default: 0.5)",
+    )
+    parser.add_argument(
+        "--concentration",
+        type=float,
+        default=100.0,
+        help="Dirichlet concentration around SPENDING_WEIGHTS; 0 disables (default: 100)",
+    )
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("-w", "--workers", type=int, default=1, help="worker processes (default: 1)")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args(argv)
+
+    if args.draws < 1 or args.batch_size < 1:
+        print("error: --draws and --batch-size must be at least 1", file=sys.stderr)
+        return 2
+
+    started = time.perf_counter()
+    results = simulate_personas(
+        args.draws,
+        seed=args.seed,
+        workers=args.workers,
+        spread=args.spread,
+        distribution=args.distribution,
+        concentration=args.concentration,
+        batch_size=args.batch_size,
+    )
+    seconds = time.perf_counter() - started
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return 0
+
+    header = " ".join(f"{'p' + str(p):>8}" for p in PERCENTILES)
+    for name, result in results.items():
+        print(name)
+        print(f"  reaches the cap in {result['share_hitting_cap']:.1%} of draws")
+        print(f"  {'':28s}{header}")
+        print(f"  {'peak bill, cap only':28s}{_format_bands(result['peak_cap_only'], True)}")
+        print(f"  {'peak bill, cap + smoothing':28s}{_format_bands(result['peak_smoothing'], True)}")
+        print(f"  {'month cap is reached':28s}{_format_bands(result['cap_hit_month'], False)}")
+        print()
+    total = args.draws * len(results)
+    print(f"{total:,} draws in {seconds:.2f}s", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
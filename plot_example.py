@@ -1,8 +1,8 @@
 from logic import compute_monthly_without_smoothing, compute_monthly_with_smoothing
-import matplotlib.pyplot as plt
 
 
 def plot_scenario(annual_oop_estimate: float, start_month: int):
+    import matplotlib.pyplot as plt
 
     no_smooth = compute_monthly_without_smoothing(annual_oop_estimate)
     smooth = compute_monthly_with_smoothing(annual_oop_estimate, start_month)
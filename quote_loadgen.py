@@ -0,0 +1,138 @@
+"""
+Load generator for quote_service.py.
+
+Opens --concurrency keep-alive connections to the service and sends
+single-member POST /quote requests (random estimates and start months) as
+fast as each connection gets answers, until --requests have been sent in
+total. Reports throughput and p50/p90/p99 latency, plus the service's own
+batching counters from /health.
+
+Example:
+    python quote_service.py &
+    python quote_loadgen.py --concurrency 64 --requests 20000
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+
+from quote_service import DEFAULT_HOST, DEFAULT_PORT
+
+PERCENTILES = (50, 90, 99)
+
+
+async def _request(reader, writer, host: str, method: str, path: str, body: bytes = b"") -> tuple[int, bytes]:
+    head = (
+        f"{method} {path} HTTP/1.1\r\n"
+        f"Host: {host}\r\n"
+        "Content-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n\r\n"
+    )
+    writer.write(head.encode("latin-1") + body)
+    await writer.drain()
+
+    status_line = await reader.readline()
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        if name.strip().lower() == "content-length":
+            length = int(value)
+    payload = await reader.readexactly(length) if length else b""
+    return int(status_line.split()[1]), payload
+
+
+async def _client(host, port, bodies, latencies, statuses) -> None:
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while bodies:
+            body = bodies.pop()
+            started = time.perf_counter()
+            status, _ = await _request(reader, writer, host, "POST", "/quote", body)
+            latencies.append(time.perf_counter() - started)
+            statuses[status] = statuses.get(status, 0) + 1
+    finally:
+        writer.close()
+
+
+async def run_load(host: str, port: int, concurrency: int, requests: int, seed: int | None = None) -> dict:
+    """
+    Send `requests` quotes over `concurrency` connections and return the
+    latency / throughput report.
+    """
+    rng = random.Random(seed)
+    bodies = [
+        json.dumps({"annual_oop": round(rng.uniform(0, 8000), 2), "start_month": rng.randint(1, 12)}).encode()
+        for _ in range(requests)
+    ]
+    latencies = []
+    statuses = {}
+
+    started = time.perf_counter()
+    await asyncio.gather(*(
+        _client(host, port, bodies, latencies, statuses) for _ in range(concurrency)
+    ))
+    seconds = time.perf_counter() - started
+
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        _, health = await _request(reader, writer, host, "GET", "/health")
+    finally:
+        writer.close()
+
+    latencies.sort()
+    report = {
+        "requests": len(latencies),
+        "concurrency": concurrency,
+        "seconds": seconds,
+        "throughput": len(latencies) / seconds if seconds > 0 else 0.0,
+        "status_counts": {str(code): count for code, count in sorted(statuses.items())},
+        "service": json.loads(health),
+    }
+    for p in PERCENTILES:
+        index = min(int(len(latencies) * p / 100), len(latencies) - 1)
+        report[f"p{p}_ms"] = latencies[index] * 1000 if latencies else None
+    return report
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Load test a running quote_service.py.")
+    parser.add_argument("--host", default=DEFAULT_HOST, help=f"default: {DEFAULT_HOST}")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"default: {DEFAULT_PORT}")
+    parser.add_argument("-c", "--concurrency", type=int, default=32, help="open connections (default: 32)")
+    parser.add_argument("-n", "--requests", type=int, default=10_000, help="total requests (default: 10000)")
+    parser.add_argument("--seed", type=int, default=None, help="seed for the random request mix")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args(argv)
+
+    if args.concurrency < 1 or args.requests < 1:
+        print("error: --concurrency and --requests must be at least 1", file=sys.stderr)
+        return 2
+
+    try:
+        report = asyncio.run(run_load(args.host, args.port, args.concurrency, args.requests, args.seed))
+    except (OSError, asyncio.IncompleteReadError, ValueError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return 0
+
+    service = report["service"]
+    print(f"{report['requests']:,} requests over {report['concurrency']} connections in {report['seconds']:.2f}s")
+    print(f"  throughput  {report['throughput']:>10,.0f} requests/s")
+    for p in PERCENTILES:
+        print(f"  p{p:<10} {report[f'p{p}_ms']:>10.2f} ms")
+    print(f"  statuses    {report['status_counts']}")
+    print(f"  service     {service['batches']:,} batches, {service['mean_batch']:.1f} members per batch on average")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
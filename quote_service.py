@@ -0,0 +1,461 @@
+"""
+Local HTTP/JSON quoting service.
+
+A small asyncio server (standard library only, plus NumPy for the batch
+kernel) for on-demand quotes:
+
+    POST /quote    {"annual_oop": 3000, "start_month": 5}
+                   {"annual_oop": 3000, "start_month": 5, "persona": "...", "explain": true}
+                   {"members": [{"annual_oop": 3000, "start_month": 5}, ...]}
+    GET  /health   status and batching counters
+    GET  /metrics  instrument.py counters in Prometheus text (with --metrics)
+
+A quote has the three monthly schedules, the ScenarioSummary numbers that
+run_scenario shows (peak months as 1-12), and with "explain": true the
+run_scenario explanation text. A bulk request returns {"quotes": [...]} in
+request order.
+
+Concurrent requests are not computed one by one. They are queued and
+grouped into micro-batches: a batch is run through
+batch.batch_compute_scenarios when it reaches --max-batch members or when
+--batch-window-ms has passed since its first member arrived, whichever
+comes first. Larger flushes (bulk requests) are computed --max-batch
+members at a time, letting other connections run in between. Results are
+identical to calling logic.compute_scenarios.
+
+Backpressure: when more than --max-pending members are in flight (queued,
+being computed or having their quotes built), new requests get 503 with
+Retry-After instead of growing the queue; bodies over --max-body bytes get
+413 and bulk requests over --max-members get 400.
+
+With --metrics the instrumentation in instrument.py is switched on
+(--metrics-sample N times one call in N) and request parsing, batch compute
+and the logic.py functions show up at /metrics for a local scraper.
+
+Example:
+    python quote_service.py --port 8765
+    python quote_service.py --metrics --metrics-sample 20
+    python quote_loadgen.py --port 8765 --concurrency 64 --requests 20000
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import sys
+import time
+from http import HTTPStatus
+
+import numpy as np
+
+import instrument
+from batch import batch_compute_scenarios
+from logic import PERSONAS, ScenarioSummary
+from scenario import run_scenario
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_BATCH_WINDOW_MS = 2.0
+DEFAULT_MAX_BATCH = 1024
+DEFAULT_MAX_PENDING = 50_000
+DEFAULT_MAX_MEMBERS = 10_000
+DEFAULT_MAX_BODY = 4 * 1024 * 1024
+
+SCENARIOS = ("no_cap", "cap_no_smooth", "cap_smooth")
+SUMMARY_FIELDS = ScenarioSummary._fields
+
+# Longest request line plus headers we accept.
+_MAX_HEADER = 16 * 1024
+
+
+class Overloaded(Exception):
+    """
+    Raised by MicroBatcher.submit when the queue is full.
+    """
+
+
+class MicroBatcher:
+    """
+    Groups members from concurrent requests into batches for the kernel.
+    """
+
+    def __init__(
+        self,
+        window_ms: float = DEFAULT_BATCH_WINDOW_MS,
+        max_batch: int = DEFAULT_MAX_BATCH,
+        max_pending: int = DEFAULT_MAX_PENDING,
+    ):
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self.max_pending = max_pending
+
+        # (annual list, start list, future) per waiting request
+        self._waiting = []
+        # members in self._waiting
+        self._pending = 0
+        # members admitted by submit() and not yet release()d, i.e. queued,
+        # being computed or waiting for their response to be written
+        self._in_flight = 0
+        self._timer = None
+        # _compute() tasks still running
+        self._computing = set()
+
+        self.batches = 0
+        self.members = 0
+        self.requests = 0
+        self.rejected = 0
+
+    def submit(self, annual: list[float], start: list[int]) -> asyncio.Future:
+        """
+        Queue one request's members. The future resolves to
+        (summary dict of arrays, (no_cap, cap_no_smooth, cap_smooth)) for
+        just these members.
+
+        The members count against max_pending until the caller hands them
+        back with release(), once their response is done.
+        """
+        if self._in_flight + len(annual) > self.max_pending:
+            self.rejected += 1
+            raise Overloaded(f"{self._in_flight:,} members already in flight")
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._waiting.append((annual, start, future))
+        self._pending += len(annual)
+        self._in_flight += len(annual)
+        self.requests += 1
+
+        if self._pending >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+        return future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        waiting, self._waiting = self._waiting, []
+        self._pending = 0
+        if not waiting:
+            return
+
+        task = asyncio.get_running_loop().create_task(self._compute(waiting))
+        # The loop only keeps a weak reference to tasks.
+        self._computing.add(task)
+        task.add_done_callback(self._computing.discard)
+
+    async def _compute(self, waiting) -> None:
+        """
+        Run the kernel over the waiting members and resolve their futures.
+
+        The members are computed max_batch at a time with a turn of the event
+        loop in between, so a big flush (a bulk request, or a queue that
+        filled up during the window) does not stall every other connection
+        for the whole computation.
+        """
+        annual = np.fromiter((a for item in waiting for a in item[0]), dtype=float)
+        start = np.fromiter((s for item in waiting for s in item[1]), dtype=np.int64)
+        parts = []
+        try:
+            for lo in range(0, annual.size, self.max_batch):
+                if parts:
+                    await asyncio.sleep(0)
+                hi = lo + self.max_batch
+                with instrument.stage("service.batch"):
+                    parts.append(batch_compute_scenarios(annual[lo:hi], start[lo:hi]))
+                self.batches += 1
+        except Exception as e:
+            for _, _, future in waiting:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        self.members += annual.size
+        if len(parts) == 1:
+            summary, series = parts[0]
+        else:
+            summary = {name: np.concatenate([part[0][name] for part in parts]) for name in parts[0][0]}
+            series = tuple(np.concatenate([part[1][k] for part in parts]) for k in range(len(SCENARIOS)))
+
+        row = 0
+        for item_annual, _, future in waiting:
+            end = row + len(item_annual)
+            if not future.done():
+                future.set_result((
+                    {name: values[row:end] for name, values in summary.items()},
+                    tuple(matrix[row:end] for matrix in series),
+                ))
+            row = end
+
+    def release(self, count: int) -> None:
+        """
+        Hand back `count` members admitted by submit().
+        """
+        self._in_flight -= count
+
+    def stats(self) -> dict:
+        return {
+            "requests": self.requests,
+            "members": self.members,
+            "batches": self.batches,
+            "mean_batch": self.members / self.batches if self.batches else 0.0,
+            "pending": self._pending,
+            "in_flight": self._in_flight,
+            "rejected": self.rejected,
+        }
+
+
+class BadRequest(Exception):
+    pass
+
+
+def _parse_member(item) -> tuple[float, int, str | None, bool]:
+    """
+    (annual_oop, start_month, persona, explain) from one JSON request object.
+    Missing values fall back to the persona preset, start month to January.
+    """
+    if not isinstance(item, dict):
+        raise BadRequest("each member must be a JSON object")
+
+    persona = item.get("persona")
+    if persona is not None and persona not in PERSONAS:
+        raise BadRequest(f"unknown persona {persona!r}")
+    defaults = PERSONAS.get(persona) or {}
+
+    annual = item.get("annual_oop", defaults.get("annual_oop"))
+    start = item.get("start_month", defaults.get("start_month", 1))
+    if isinstance(annual, bool) or not isinstance(annual, (int, float)):
+        raise BadRequest("annual_oop must be a number")
+    if isinstance(start, bool) or not isinstance(start, int):
+        raise BadRequest("start_month must be an integer")
+    try:
+        annual = float(annual)
+    except OverflowError:
+        raise BadRequest("annual_oop is out of range") from None
+    if not math.isfinite(annual):
+        raise BadRequest("annual_oop must be finite")
+    return annual, min(max(start, 1), 12), persona, bool(item.get("explain"))
+
+
+def _quotes(members, summary: dict, series: tuple) -> list[dict]:
+    columns = {name: summary[name].tolist() for name in SUMMARY_FIELDS}
+    schedules = [matrix.tolist() for matrix in series]
+
+    quotes = []
+    for i, (annual, start, persona, explain) in enumerate(members):
+        quote = {
+            "annual_oop": annual,
+            "start_month": start,
+            "monthly": {name: schedules[s][i] for s, name in enumerate(SCENARIOS)},
+            "summary": {name: columns[name][i] for name in SUMMARY_FIELDS},
+        }
+        if persona is not None:
+            quote["persona"] = persona
+        if explain:
+            quote["explanation"] = run_scenario(annual, start, persona)[2]
+        quotes.append(quote)
+    return quotes
+
+
+class QuoteService:
+    """
+    The HTTP side: one asyncio task per connection, keep-alive supported.
+    """
+
+    def __init__(
+        self,
+        batcher: MicroBatcher,
+        max_members: int = DEFAULT_MAX_MEMBERS,
+        max_body: int = DEFAULT_MAX_BODY,
+    ):
+        self.batcher = batcher
+        self.max_members = max_members
+        self.max_body = max_body
+        self.started = time.time()
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    return
+                except asyncio.LimitOverrunError:
+                    await self._respond(writer, HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE, {"error": "headers too large"}, False)
+                    return
+
+                method, path, headers = _parse_head(head)
+                keep_alive = headers.get("connection", "").lower() != "close"
+
+                try:
+                    length = int(headers.get("content-length", "0"))
+                except ValueError:
+                    length = -1
+                if length < 0 or length > self.max_body:
+                    status = HTTPStatus.BAD_REQUEST if length < 0 else HTTPStatus.REQUEST_ENTITY_TOO_LARGE
+                    await self._respond(writer, status, {"error": "bad or too large Content-Length"}, False)
+                    return
+                body = await reader.readexactly(length) if length else b""
+
+                status, payload, extra = await self._route(method, path, body)
+                await self._respond(writer, status, payload, keep_alive, extra)
+                if not keep_alive:
+                    return
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def _route(self, method: str, path: str, body: bytes):
+        if path == "/health" and method == "GET":
+            return HTTPStatus.OK, {"status": "ok", "uptime": time.time() - self.started, **self.batcher.stats()}, None
+        if path == "/metrics" and method == "GET" and instrument.is_enabled():
+            return HTTPStatus.OK, instrument.to_prometheus(), None
+        if path != "/quote":
+            return HTTPStatus.NOT_FOUND, {"error": f"no such endpoint {path}"}, None
+        if method != "POST":
+            return HTTPStatus.METHOD_NOT_ALLOWED, {"error": "use POST"}, {"Allow": "POST"}
+
+        try:
+            with instrument.stage("service.parse"):
+                request = json.loads(body)
+                bulk = isinstance(request, dict) and "members" in request
+                items = request["members"] if bulk else [request]
+                if not isinstance(items, list) or not items:
+                    raise BadRequest("members must be a non-empty list")
+                if len(items) > self.max_members:
+                    raise BadRequest(f"at most {self.max_members:,} members per request")
+                members = [_parse_member(item) for item in items]
+        except json.JSONDecodeError as e:
+            return HTTPStatus.BAD_REQUEST, {"error": f"invalid JSON: {e.msg}"}, None
+        except BadRequest as e:
+            return HTTPStatus.BAD_REQUEST, {"error": str(e)}, None
+        except (ValueError, TypeError, OverflowError) as e:
+            # e.g. a body that is not UTF-8
+            return HTTPStatus.BAD_REQUEST, {"error": f"invalid request: {e}"}, None
+
+        try:
+            future = self.batcher.submit([m[0] for m in members], [m[1] for m in members])
+        except Overloaded as e:
+            return HTTPStatus.SERVICE_UNAVAILABLE, {"error": f"overloaded: {e}"}, {"Retry-After": "1"}
+        try:
+            summary, series = await future
+            quotes = _quotes(members, summary, series)
+        finally:
+            self.batcher.release(len(members))
+        return HTTPStatus.OK, ({"quotes": quotes} if bulk else quotes[0]), None
+
+    @staticmethod
+    async def _respond(writer, status: HTTPStatus, payload: dict | str, keep_alive: bool, extra: dict | None = None) -> None:
+        if isinstance(payload, str):
+            body, content_type = payload.encode(), "text/plain; version=0.0.4"
+        else:
+            body, content_type = json.dumps(payload).encode(), "application/json"
+        lines = [
+            f"HTTP/1.1 {status.value} {status.phrase}",
+            f"Content-Type: {content_type}",
+            f"Content-Length: {len(body)}",
+            f"Connection: {'keep-alive' if keep_alive else 'close'}",
+        ]
+        lines.extend(f"{name}: {value}" for name, value in (extra or {}).items())
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body)
+        await writer.drain()
+
+
+def _parse_head(head: bytes) -> tuple[str, str, dict]:
+    lines = head.decode("latin-1").split("\r\n")
+    parts = lines[0].split(" ")
+    method = parts[0].upper() if parts else ""
+    path = parts[1].split("?", 1)[0] if len(parts) > 1 else ""
+    headers = {}
+    for line in lines[1:]:
+        name, sep, value = line.partition(":")
+        if sep:
+            headers[name.strip().lower()] = value.strip()
+    return method, path, headers
+
+
+async def serve(host: str, port: int, service: QuoteService) -> None:
+    server = await asyncio.start_server(service.handle_connection, host, port, limit=_MAX_HEADER)
+    addresses = ", ".join(f"{s.getsockname()[0]}:{s.getsockname()[1]}" for s in server.sockets)
+    print(f"Quote service listening on {addresses}", file=sys.stderr)
+    async with server:
+        await server.serve_forever()
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Local HTTP/JSON quoting service with micro-batching.")
+    parser.add_argument("--host", default=DEFAULT_HOST, help=f"default: {DEFAULT_HOST}")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"default: {DEFAULT_PORT}")
+    parser.add_argument(
+        "--batch-window-ms",
+        type=float,
+        default=DEFAULT_BATCH_WINDOW_MS,
+        help=f"longest a member waits for its batch to fill (default: {DEFAULT_BATCH_WINDOW_MS:g})",
+    )
+    parser.add_argument(
+        "--max-batch",
+        type=int,
+        default=DEFAULT_MAX_BATCH,
+        help=f"run a batch as soon as it has this many members (default: {DEFAULT_MAX_BATCH})",
+    )
+    parser.add_argument(
+        "--max-pending",
+        type=int,
+        default=DEFAULT_MAX_PENDING,
+        help=f"reject requests with 503 above this many members in flight (default: {DEFAULT_MAX_PENDING})",
+    )
+    parser.add_argument(
+        "--max-members",
+        type=int,
+        default=DEFAULT_MAX_MEMBERS,
+        help=f"most members in one bulk request (default: {DEFAULT_MAX_MEMBERS})",
+    )
+    parser.add_argument(
+        "--max-body",
+        type=int,
+        default=DEFAULT_MAX_BODY,
+        help=f"largest request body in bytes (default: {DEFAULT_MAX_BODY})",
+    )
+    parser.add_argument(
+        "--metrics",
+        action="store_true",
+        help="turn on instrument.py timing and serve it at GET /metrics",
+    )
+    parser.add_argument(
+        "--metrics-sample",
+        type=int,
+        default=10,
+        metavar="N",
+        help="with --metrics, time one call in N (default: 10)",
+    )
+    args = parser.parse_args(argv)
+
+    if args.metrics_sample < 1:
+        print("error: --metrics-sample must be at least 1", file=sys.stderr)
+        return 2
+    if args.batch_window_ms < 0 or args.max_batch < 1 or args.max_members < 1:
+        print("error: --batch-window-ms must be 0 or more, --max-batch and --max-members at least 1", file=sys.stderr)
+        return 2
+    if args.max_pending < args.max_members:
+        print("error: --max-pending must be at least --max-members", file=sys.stderr)
+        return 2
+
+    if args.metrics:
+        instrument.enable(args.metrics_sample)
+
+    batcher = MicroBatcher(args.batch_window_ms, args.max_batch, args.max_pending)
+    service = QuoteService(batcher, args.max_members, args.max_body)
+    try:
+        asyncio.run(serve(args.host, args.port, service))
+    except KeyboardInterrupt:
+        pass
+    except OSError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,368 @@
+"""
+Headless per-member reports for mailings.
+
+For every member in a cohort file (same formats as cohort.py) this writes
+the GUI chart and the run_scenario explanation without tkinter:
+
+- svg: the draw_chart line chart, same layout and colours
+- html: the explanation, the chart inline and a table of monthly payments
+- txt: the explanation as plain text
+- png: optional, drawn with matplotlib (imported only when asked for)
+
+Everything that is the same for all members (axes, month labels, legend,
+page markup) is rendered once into string.Template templates; per member
+only the numbers are filled in. The file is cut into byte-range shards that
+a process pool renders in parallel.
+
+Output goes to sharded directories so no single directory holds 100k files:
+OUT/<2 hex digits of a hash of the member id>/<member id>-<8 more>.<ext>.
+Characters that are not safe in file names are replaced with "_"; the hash
+suffix keeps ids that only differ in those characters (a/b and a_b) or in
+case apart.
+
+Example:
+    python render.py members.csv -o reports --formats svg,html --workers 4
+"""
+
+import argparse
+import hashlib
+import html
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from string import Template
+
+from cohort import (
+    DEFAULT_CHUNK_SIZE,
+    FORMATS,
+    SHARDS_PER_WORKER,
+    guess_format,
+    iter_member_chunks,
+    shard_ranges,
+)
+from logic import MONTH_NAMES, MONTHS_IN_YEAR
+from scenario import run_scenario
+
+REPORT_FORMATS = ("svg", "html", "txt", "png")
+
+CHART_WIDTH = 700
+CHART_HEIGHT = 300
+CHART_MARGIN = 50
+
+# Same colours as gui_app.draw_chart.
+COLORS = ["#d62728", "#1f77b4", "#2ca02c"]
+SERIES_LABELS = ["No cap", "Cap only", "Cap + smoothing"]
+
+_UNSAFE = re.compile(r"[^A-Za-z0-9._-]")
+
+
+class SvgChart:
+    """
+    draw_chart as an SVG template. Only the y axis labels and the point
+    coordinates change from member to member.
+    """
+
+    def __init__(self, width: int = CHART_WIDTH, height: int = CHART_HEIGHT, margin: int = CHART_MARGIN):
+        self.plot_left = margin
+        self.plot_right = width - margin
+        self.plot_top = margin
+        self.plot_bottom = height - margin
+
+        step = (self.plot_right - self.plot_left) / (MONTHS_IN_YEAR - 1)
+        self.xs = [f"{self.plot_left + i * step:.1f}" for i in range(MONTHS_IN_YEAR)]
+
+        left, right, top, bottom = self.plot_left, self.plot_right, self.plot_top, self.plot_bottom
+        parts = [
+            f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+            f'viewBox="0 0 {width} {height}" font-family="sans-serif" font-size="12">',
+            "<defs>",
+        ]
+        for idx, color in enumerate(COLORS):
+            # Point markers stand in for draw_chart's ovals, so each series is one element.
+            parts.append(
+                f'<marker id="p{idx}" viewBox="0 0 6 6" refX="3" refY="3" markerWidth="6" '
+                f'markerHeight="6" markerUnits="userSpaceOnUse"><circle cx="3" cy="3" r="3" '
+                f'fill="{color}"/></marker>'
+            )
+        parts.append("</defs>")
+        parts.append(f'<rect width="{width}" height="{height}" fill="white"/>')
+        parts.append(f'<g stroke="black"><line x1="{left}" y1="{bottom}" x2="{right}" y2="{bottom}"/>')
+        parts.append(f'<line x1="{left}" y1="{bottom}" x2="{left}" y2="{top}"/>')
+        for frac in (0.0, 0.5, 1.0):
+            y = bottom - frac * (bottom - top)
+            parts.append(f'<line x1="{left - 5}" y1="{y:g}" x2="{left}" y2="{y:g}"/>')
+        for x in self.xs:
+            parts.append(f'<line x1="{x}" y1="{bottom}" x2="{x}" y2="{bottom + 5}"/>')
+        parts.append("</g>")
+
+        parts.append('<g fill="gray" text-anchor="end" dominant-baseline="middle">')
+        parts.append(f'<text x="{left - 10}" y="{bottom}">$$0</text>')
+        for frac, name in ((0.5, "y_half"), (1.0, "y_max")):
+            y = bottom - frac * (bottom - top)
+            parts.append(f'<text x="{left - 10}" y="{y:g}">$$${{{name}}}</text>')
+        parts.append("</g>")
+
+        parts.append('<g text-anchor="middle" dominant-baseline="hanging">')
+        for x, name in zip(self.xs, MONTH_NAMES):
+            parts.append(f'<text x="{x}" y="{bottom + 15}">{name}</text>')
+        parts.append("</g>")
+
+        for idx, color in enumerate(COLORS):
+            parts.append(
+                f'<polyline fill="none" stroke="{color}" stroke-width="2" points="${{points{idx}}}" '
+                f'marker-start="url(#p{idx})" marker-mid="url(#p{idx})" marker-end="url(#p{idx})"/>'
+            )
+
+        legend_x = right - 120
+        legend_y = top + 10
+        for idx, (color, label) in enumerate(zip(COLORS, SERIES_LABELS)):
+            parts.append(
+                f'<rect x="{legend_x}" y="{legend_y + idx * 20}" width="10" height="10" fill="{color}"/>'
+                f'<text x="{legend_x + 15}" y="{legend_y + idx * 20 + 5}" dominant-baseline="middle">'
+                f"{html.escape(label)}</text>"
+            )
+        parts.append("</svg>")
+
+        self.template = Template("\n".join(parts))
+
+    def render(self, series: list[list[float]]) -> str:
+        """
+        SVG for the three series (no cap, cap only, cap + smoothing).
+        """
+        max_val = max(max(values) for values in series)
+        if max_val <= 0:
+            max_val = 1.0
+
+        scale = (self.plot_bottom - self.plot_top) / max_val
+        bottom = self.plot_bottom
+        points = {
+            f"points{idx}": " ".join(f"{x},{bottom - v * scale:.1f}" for x, v in zip(self.xs, values))
+            for idx, values in enumerate(series)
+        }
+        return self.template.substitute(
+            y_half=f"{max_val / 2:,.0f}", y_max=f"{max_val:,.0f}", **points
+        )
+
+
+HTML_TEMPLATE = Template("""<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>Your 2025 Part D out of pocket costs</title>
+<style>
+body { font-family: sans-serif; max-width: 760px; margin: 2em auto; }
+table { border-collapse: collapse; }
+th, td { padding: 2px 10px; text-align: right; }
+th:first-child, td:first-child { text-align: left; }
+</style>
+</head>
+<body>
+<h1>Your 2025 Part D out of pocket costs</h1>
+<p>Member $member_id</p>
+$chart
+$explanation
+<table>
+<tr><th>Month</th>$table_header</tr>
+$table_rows
+</table>
+</body>
+</html>
+""")
+
+
+def explanation_html(explanation: str) -> str:
+    """
+    run_scenario's explanation as HTML: "- " lines become a list, the rest
+    paragraphs.
+    """
+    blocks = []
+    for block in explanation.split("\n\n"):
+        lines = block.splitlines()
+        if lines and all(line.startswith("- ") for line in lines):
+            items = "".join(f"<li>{html.escape(line[2:])}</li>" for line in lines)
+            blocks.append(f"<ul>{items}</ul>")
+        else:
+            blocks.append(f"<p>{html.escape(block)}</p>")
+    return "\n".join(blocks)
+
+
+class MemberRenderer:
+    """
+    Renders every requested format for one member at a time into out_dir.
+    """
+
+    def __init__(self, out_dir: str, formats: list[str]):
+        self.out_dir = out_dir
+        self.formats = formats
+        self.chart = SvgChart()
+        self.table_header = "".join(f"<th>{html.escape(label)}</th>" for label in SERIES_LABELS)
+        self._made_dirs = set()
+
+    def member_path(self, member_id: str) -> str:
+        """
+        Output path for a member, without the extension.
+        """
+        digest = hashlib.md5(member_id.encode("utf-8")).hexdigest()
+        shard = digest[:2]
+        directory = os.path.join(self.out_dir, shard)
+        if directory not in self._made_dirs:
+            os.makedirs(directory, exist_ok=True)
+            self._made_dirs.add(directory)
+        return os.path.join(directory, f"{_UNSAFE.sub('_', member_id)}-{digest[2:10]}")
+
+    def render(self, member_id: str, annual_oop: float, start_month: int, persona: str) -> None:
+        _, series_dict, explanation = run_scenario(annual_oop, start_month, persona)
+        series = list(series_dict.values())
+        path = self.member_path(member_id)
+
+        svg = self.chart.render(series) if "svg" in self.formats or "html" in self.formats else None
+
+        if "svg" in self.formats:
+            _write(path + ".svg", svg)
+        if "txt" in self.formats:
+            _write(path + ".txt", explanation + "\n")
+        if "html" in self.formats:
+            rows = "\n".join(
+                f"<tr><td>{name}</td>" + "".join(f"<td>${values[m]:,.2f}</td>" for values in series) + "</tr>"
+                for m, name in enumerate(MONTH_NAMES)
+            )
+            page = HTML_TEMPLATE.substitute(
+                member_id=html.escape(member_id),
+                chart=svg,
+                explanation=explanation_html(explanation),
+                table_header=self.table_header,
+                table_rows=rows,
+            )
+            _write(path + ".html", page)
+        if "png" in self.formats:
+            _write_png(path + ".png", series)
+
+
+def _write(path: str, text: str) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+def _write_png(path: str, series: list[list[float]]) -> None:
+    import matplotlib
+
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    months = list(range(1, MONTHS_IN_YEAR + 1))
+    fig, ax = plt.subplots(figsize=(CHART_WIDTH / 100, CHART_HEIGHT / 100), dpi=100)
+    for values, label, color in zip(series, SERIES_LABELS, COLORS):
+        ax.plot(months, values, marker="o", color=color, label=label)
+    ax.set_xticks(months, MONTH_NAMES)
+    ax.set_ylabel("Monthly payment ($)")
+    ax.legend()
+    fig.tight_layout()
+    fig.savefig(path)
+    plt.close(fig)
+
+
+def render_range(in_path, in_fmt, out_dir, formats, chunk_size=DEFAULT_CHUNK_SIZE, start=0, end=None) -> int:
+    """
+    Render every member whose line starts in [start, end). Returns the count.
+    """
+    renderer = MemberRenderer(out_dir, formats)
+    count = 0
+    for members in iter_member_chunks(in_path, in_fmt, chunk_size, start, end):
+        for member in members:
+            renderer.render(*member)
+        count += len(members)
+    return count
+
+
+def render_file(
+    in_path: str,
+    in_fmt: str,
+    out_dir: str,
+    formats: list[str],
+    workers: int = 1,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> int:
+    """
+    Render reports for every member in a file, in a process pool when
+    workers > 1. Returns the number of members rendered.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    if workers <= 1:
+        return render_range(in_path, in_fmt, out_dir, formats, chunk_size)
+
+    ranges = shard_ranges(in_path, workers * SHARDS_PER_WORKER)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(render_range, in_path, in_fmt, out_dir, formats, chunk_size, start, end)
+            for start, end in ranges
+        ]
+        return sum(future.result() for future in futures)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Render a chart and explanation for every member in a file.")
+    parser.add_argument("input", help="CSV or JSONL file with id, annual_oop, start_month[, persona]")
+    parser.add_argument("-o", "--output-dir", default="reports", help="output directory (default: reports)")
+    parser.add_argument("--input-format", choices=FORMATS, help="default: from the file name")
+    parser.add_argument(
+        "--formats",
+        default="svg,html,txt",
+        help=f"comma separated, any of {', '.join(REPORT_FORMATS)} (default: svg,html,txt)",
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=DEFAULT_CHUNK_SIZE,
+        help=f"members per batch (default: {DEFAULT_CHUNK_SIZE})",
+    )
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=1,
+        help="worker processes; 0 means one per CPU (default: 1)",
+    )
+    args = parser.parse_args(argv)
+
+    formats = [f.strip() for f in args.formats.split(",") if f.strip()]
+    unknown = [f for f in formats if f not in REPORT_FORMATS]
+    if not formats or unknown:
+        print(f"error: --formats must be a list of {', '.join(REPORT_FORMATS)}", file=sys.stderr)
+        return 2
+    if args.chunk_size < 1:
+        print("error: --chunk-size must be at least 1", file=sys.stderr)
+        return 2
+    if args.workers < 0:
+        print("error: --workers must be 0 or more", file=sys.stderr)
+        return 2
+    if "png" in formats:
+        try:
+            import matplotlib  # noqa: F401
+        except ImportError:
+            print("error: png output needs matplotlib (pip install matplotlib)", file=sys.stderr)
+            return 1
+
+    workers = args.workers or os.cpu_count() or 1
+    in_fmt = args.input_format or guess_format(args.input)
+
+    started = time.perf_counter()
+    try:
+        count = render_file(args.input, in_fmt, args.output_dir, formats, workers, args.chunk_size)
+    except (OSError, ValueError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    seconds = time.perf_counter() - started
+
+    rate = count / seconds if seconds > 0 else 0.0
+    print(
+        f"Rendered {count:,} members ({', '.join(formats)}) to {args.output_dir} in {seconds:.2f}s "
+        f"with {workers} worker(s) ({rate:,.0f} members/s).",
+        file=sys.stderr,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,227 @@
+"""
+On-disk result cache for cohort re-runs.
+
+Nightly runs see the same members again with only a few of them changed.
+Results only depend on a member's inputs (annual estimate and start month)
+and on the model, so they are stored in SQLite per member: the key is the
+normalized (annual_oop, start_month) pair plus logic.model_fingerprint()
+(MODEL_VERSION, CAP and the member's weights), the value the member's packed
+results. A cohort run then only computes the members whose inputs are new
+or changed, whatever the chunk size, worker count or line order.
+
+Lookups are batched: a chunk's keys are built with NumPy and fetched with
+one `SELECT ... WHERE key IN (...)` per chunk, and last_used updates are
+written the same way with the next write.
+
+- When the model fingerprint differs from the one the cache was written
+  with, every entry is dropped on open.
+- Each open starts a new generation. Entries remember the generation they
+  were last used in. put_many() keeps the stored payloads within max_bytes
+  by dropping the least recently used entries as it goes, and the freed
+  pages are handed back to the file system (incremental auto-vacuum).
+
+Used by cohort.py --cache.
+"""
+
+import sqlite3
+
+import numpy as np
+
+import logic
+
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024
+
+# Bump when the table layout or key format changes; older files are emptied.
+SCHEMA_VERSION = 3
+
+# Bound parameters per statement; SQLite allows 32766 since 3.32.
+_MAX_VARIABLES = 30_000
+
+
+class ResultCache:
+    """
+    Content-addressed store of per-member results.
+
+    Values are opaque bytes; callers pick the encoding (cohort.py packs
+    the raw float64 values, so cached output is byte-identical to
+    recomputed output).
+    """
+
+    def __init__(self, path: str, max_bytes: int = DEFAULT_MAX_BYTES, generation: int | None = None):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.fingerprint = logic.model_fingerprint()
+        self.evicted = 0
+        self._touched = []
+
+        self.conn = sqlite3.connect(path, timeout=60)
+        if self.conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+            # Only takes effect on an empty database or after a VACUUM.
+            self.conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            self.conn.execute("VACUUM")
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        with self.conn:
+            self.conn.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT NOT NULL)")
+            if self._meta("schema") != str(SCHEMA_VERSION):
+                self.conn.execute("DROP TABLE IF EXISTS results")
+                self.conn.execute("DROP TABLE IF EXISTS usage")
+                self._set_meta("schema", str(SCHEMA_VERSION))
+            # Payloads and bookkeeping live in separate tables, so marking
+            # entries used only rewrites the small usage rows.
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS results (key BLOB PRIMARY KEY, payload BLOB NOT NULL) WITHOUT ROWID"
+            )
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS usage ("
+                " key BLOB PRIMARY KEY,"
+                " size INTEGER NOT NULL,"
+                " created INTEGER NOT NULL,"
+                " last_used INTEGER NOT NULL) WITHOUT ROWID"
+            )
+            self.conn.execute("CREATE INDEX IF NOT EXISTS usage_last_used ON usage (last_used)")
+
+        if generation is None:
+            # A new run: drop stale entries and start a new generation.
+            with self.conn:
+                if self._meta("fingerprint") != self.fingerprint:
+                    self.conn.execute("DELETE FROM results")
+                    self.conn.execute("DELETE FROM usage")
+                    self._set_meta("fingerprint", self.fingerprint)
+                generation = int(self._meta("generation") or 0) + 1
+                self._set_meta("generation", str(generation))
+        self.generation = generation
+
+        # Running total of stored payload bytes. Other processes writing to
+        # the same file are not seen here; evict() re-reads the true size.
+        self._size = self.size_bytes()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _meta(self, name: str) -> str | None:
+        row = self.conn.execute("SELECT value FROM meta WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, name: str, value: str) -> None:
+        self.conn.execute("INSERT OR REPLACE INTO meta (name, value) VALUES (?, ?)", (name, value))
+
+    def keys(self, annual: np.ndarray, start_months: np.ndarray, weights: np.ndarray | None = None) -> list[bytes]:
+        """
+        Cache keys for members' inputs under the current model, or with
+        each member's own (N, 12) weights.
+
+        Estimates at or below zero all give the same results and share the
+        key of 0.0; start months are clamped to 1-12 as the scenarios do.
+        """
+        records = np.empty(len(annual), dtype=[("model", "S16"), ("annual", "<f8"), ("start", "u1")])
+        if weights is None:
+            records["model"] = self.fingerprint.encode("ascii")
+        else:
+            profiles, inverse = np.unique(weights, axis=0, return_inverse=True)
+            prints = np.array([logic.model_fingerprint(row) for row in profiles.tolist()], dtype="S16")
+            records["model"] = prints[inverse.ravel()]
+        records["annual"] = np.where(annual > 0, annual, 0.0)
+        records["start"] = np.clip(start_months, 1, 12)
+        return records.view(f"V{records.itemsize}").tolist()
+
+    def get_many(self, keys) -> dict[bytes, bytes]:
+        """
+        {key: value} for the keys that are cached (marking them used).
+        """
+        unique = sorted(set(keys))  # sorted keys walk the index in order
+        found = {}
+        for i in range(0, len(unique), _MAX_VARIABLES):
+            batch = unique[i:i + _MAX_VARIABLES]
+            placeholders = ",".join("?" * len(batch))
+            found.update(
+                self.conn.execute(f"SELECT key, payload FROM results WHERE key IN ({placeholders})", batch)
+            )
+        self._touched.extend(found)
+        return found
+
+    def _flush_touched(self) -> None:
+        # Deferred from get_many(): committing per lookup cost more than the
+        # lookups themselves.
+        for i in range(0, len(self._touched), _MAX_VARIABLES):
+            batch = self._touched[i:i + _MAX_VARIABLES]
+            placeholders = ",".join("?" * len(batch))
+            self.conn.execute(
+                f"UPDATE usage SET last_used = ? WHERE key IN ({placeholders})", [self.generation, *batch]
+            )
+        self._touched = []
+
+    def put_many(self, items) -> None:
+        """
+        Store (key, value) pairs, then evict least recently used entries if
+        the cache has grown past max_bytes.
+        """
+        items = list(items)
+        with self.conn:
+            self._flush_touched()
+            self.conn.executemany("INSERT OR REPLACE INTO results (key, payload) VALUES (?, ?)", items)
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO usage (key, size, created, last_used) VALUES (?, ?, ?, ?)",
+                [(key, len(value), self.generation, self.generation) for key, value in items],
+            )
+        self._size += sum(len(value) for _, value in items)
+        if self._size > self.max_bytes:
+            self.evicted += self.evict(vacuum=False)
+
+    def run_stats(self) -> tuple[int, int]:
+        """
+        (reused, computed) entry counts for the current generation.
+        """
+        with self.conn:
+            self._flush_touched()
+        reused, computed = self.conn.execute(
+            "SELECT"
+            " COALESCE(SUM(created < ?), 0),"
+            " COALESCE(SUM(created = ?), 0)"
+            " FROM usage WHERE last_used = ?",
+            (self.generation, self.generation, self.generation),
+        ).fetchone()
+        return reused, computed
+
+    def size_bytes(self) -> int:
+        return self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM usage").fetchone()[0]
+
+    def evict(self, vacuum: bool = True) -> int:
+        """
+        Drop least recently used entries until the cache fits in max_bytes,
+        and with vacuum, give the freed pages back to the file system.
+
+        Returns the number of entries removed.
+        """
+        with self.conn:
+            self._flush_touched()
+        self._size = self.size_bytes()
+        excess = self._size - self.max_bytes
+        doomed = []
+        if excess > 0:
+            cursor = self.conn.execute("SELECT key, size FROM usage ORDER BY last_used")
+            for key, size in cursor:
+                doomed.append((key,))
+                excess -= size
+                self._size -= size
+                if excess <= 0:
+                    break
+            cursor.close()
+            with self.conn:
+                self.conn.executemany("DELETE FROM results WHERE key = ?", doomed)
+                self.conn.executemany("DELETE FROM usage WHERE key = ?", doomed)
+
+        if vacuum:
+            # execute() only steps the pragma once, freeing a single page;
+            # executescript() runs it to completion.
+            self.conn.executescript("PRAGMA incremental_vacuum;")
+            self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        return len(doomed)
+
+    def close(self) -> None:
+        with self.conn:
+            self._flush_touched()
+        self.conn.close()
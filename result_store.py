@@ -0,0 +1,233 @@
+"""
+Columnar, memory-mapped store for cohort results.
+
+Instead of a dozen Python objects per member, results live in contiguous
+arrays inside one binary file:
+
+    header      64 bytes, see HEADER below
+    schedules   float64 [scenario][member][month]  (3 x capacity x 12)
+    float cols  float64 [member], one per FLOAT_COLUMNS entry
+    int cols    uint8 [member], one per INT_COLUMNS entry
+    ids         fixed-width bytes [member]
+
+The file is opened with numpy.memmap, so downstream jobs can read a
+full-book projection without loading or copying it, and the slicing helpers
+(member, month, scenario, column) return views, not lists.
+
+Space is reserved for `capacity` members up front; n_members in the header
+says how many are filled in. Written by cohort.py --store.
+"""
+
+import struct
+import warnings
+
+import numpy as np
+
+import logic
+from logic import MONTHS_IN_YEAR
+
+MAGIC = b"PDCAPRS1"
+
+# magic, format version, n_members, capacity, n_scenarios, months,
+# id width, model fingerprint
+HEADER = struct.Struct("<8sIQQIII16s")
+HEADER_SIZE = 64
+FORMAT_VERSION = 1
+
+SCENARIOS = ("no_cap", "cap_no_smooth", "cap_smooth")
+
+FLOAT_COLUMNS = (
+    "annual_oop",
+    "total_no_cap",
+    "total_cap",
+    "total_cap_smooth",
+    "max_no_cap",
+    "max_cap_no_smooth",
+    "max_cap_smooth",
+    "avoided",
+)
+
+INT_COLUMNS = (
+    "start_month",
+    "month_no_cap",
+    "month_cap_no_smooth",
+    "month_cap_smooth",
+)
+
+DEFAULT_ID_WIDTH = 32
+
+
+class ResultStore:
+    """
+    Memory-mapped columnar results. Use create() or open(), not the constructor.
+    """
+
+    def __init__(self, path: str, mode: str, n_members: int, capacity: int, id_width: int, fingerprint: str):
+        self.path = path
+        self.mode = mode
+        self.n_members = n_members
+        self.capacity = capacity
+        self.id_width = id_width
+        self.fingerprint = fingerprint
+
+        offset = HEADER_SIZE
+        self._schedules = np.memmap(
+            path, dtype="<f8", mode=mode, offset=offset,
+            shape=(len(SCENARIOS), capacity, MONTHS_IN_YEAR),
+        )
+        offset += self._schedules.nbytes
+
+        self._columns = {}
+        for name in FLOAT_COLUMNS:
+            self._columns[name] = np.memmap(path, dtype="<f8", mode=mode, offset=offset, shape=(capacity,))
+            offset += 8 * capacity
+        for name in INT_COLUMNS:
+            self._columns[name] = np.memmap(path, dtype="u1", mode=mode, offset=offset, shape=(capacity,))
+            offset += capacity
+        self._ids = np.memmap(path, dtype=f"S{id_width}", mode=mode, offset=offset, shape=(capacity,))
+
+    @staticmethod
+    def file_size(capacity: int, id_width: int = DEFAULT_ID_WIDTH) -> int:
+        per_member = (
+            8 * len(SCENARIOS) * MONTHS_IN_YEAR
+            + 8 * len(FLOAT_COLUMNS)
+            + len(INT_COLUMNS)
+            + id_width
+        )
+        return HEADER_SIZE + per_member * capacity
+
+    @classmethod
+    def create(cls, path: str, capacity: int, id_width: int = DEFAULT_ID_WIDTH) -> "ResultStore":
+        """
+        Create (or overwrite) a store with room for `capacity` members.
+        """
+        capacity = max(capacity, 1)
+        with open(path, "wb") as f:
+            f.truncate(cls.file_size(capacity, id_width))
+        store = cls(path, "r+", 0, capacity, id_width, logic.model_fingerprint())
+        store._write_header()
+        return store
+
+    @classmethod
+    def open(cls, path: str, writable: bool = False) -> "ResultStore":
+        """
+        Map an existing store. Read-only unless writable is True.
+
+        The store's model fingerprint is compared with the current
+        logic.model_fingerprint(). A mismatch is an error when writable
+        (appending would mix results from two models) and a warning
+        otherwise, so old stores can still be read.
+        """
+        with open(path, "rb") as f:
+            raw = f.read(HEADER_SIZE)
+        if len(raw) < HEADER.size:
+            raise ValueError(f"{path}: not a result store (file too short)")
+
+        magic, version, n_members, capacity, n_scenarios, months, id_width, fingerprint = HEADER.unpack_from(raw)
+        if magic != MAGIC:
+            raise ValueError(f"{path}: not a result store")
+        if version != FORMAT_VERSION or n_scenarios != len(SCENARIOS) or months != MONTHS_IN_YEAR:
+            raise ValueError(f"{path}: unsupported result store layout (version {version})")
+
+        fingerprint = fingerprint.decode("ascii")
+        current = logic.model_fingerprint()
+        if fingerprint != current:
+            message = f"{path}: written with a different model (fingerprint {fingerprint}, current {current})"
+            if writable:
+                raise ValueError(message)
+            warnings.warn(message, stacklevel=2)
+
+        return cls(path, "r+" if writable else "r", n_members, capacity, id_width, fingerprint)
+
+    def _write_header(self) -> None:
+        header = HEADER.pack(
+            MAGIC, FORMAT_VERSION, self.n_members, self.capacity,
+            len(SCENARIOS), MONTHS_IN_YEAR, self.id_width, self.fingerprint.encode("ascii"),
+        )
+        with open(self.path, "r+b") as f:
+            f.write(header)
+
+    def append(self, members, results: dict) -> None:
+        """
+        Append one chunk of cohort results (as produced by cohort.compute_chunk).
+
+        members are (id, annual_oop, start_month, persona) tuples. Nothing
+        is written if the chunk does not fit or an id is too long.
+        """
+        n = len(members)
+        start, end = self.n_members, self.n_members + n
+        if end > self.capacity:
+            raise ValueError(f"result store is full ({self.capacity} members)")
+
+        ids = [m[0].encode("utf-8") for m in members]
+        for member_id in ids:
+            if len(member_id) > self.id_width:
+                raise ValueError(f"member id longer than {self.id_width} bytes: {member_id.decode('utf-8')!r}")
+
+        for s, name in enumerate(SCENARIOS):
+            self._schedules[s, start:end] = results[name]
+        for name in FLOAT_COLUMNS:
+            if name == "annual_oop":
+                self._columns[name][start:end] = [m[1] for m in members]
+            else:
+                self._columns[name][start:end] = results[name]
+        for name in INT_COLUMNS:
+            if name == "start_month":
+                self._columns[name][start:end] = [m[2] for m in members]
+            else:
+                self._columns[name][start:end] = results[name]
+
+        self._ids[start:end] = ids
+
+        self.n_members = end
+
+    def flush(self) -> None:
+        """
+        Write mapped pages and the member count to disk.
+        """
+        self._schedules.flush()
+        for column in self._columns.values():
+            column.flush()
+        self._ids.flush()
+        self._write_header()
+
+    # Views. None of these copy data.
+
+    @property
+    def schedules(self) -> np.ndarray:
+        """
+        (scenario, member, month) array of monthly payments.
+        """
+        return self._schedules[:, : self.n_members]
+
+    def scenario(self, name: str) -> np.ndarray:
+        """
+        (member, month) payments for one scenario.
+        """
+        return self._schedules[SCENARIOS.index(name), : self.n_members]
+
+    def member(self, index: int) -> np.ndarray:
+        """
+        (scenario, month) payments for one member.
+        """
+        if not 0 <= index < self.n_members:
+            raise IndexError(index)
+        return self._schedules[:, index]
+
+    def month(self, month: int) -> np.ndarray:
+        """
+        (scenario, member) payments in one month (1-12).
+        """
+        if not 1 <= month <= MONTHS_IN_YEAR:
+            raise IndexError(month)
+        return self._schedules[:, : self.n_members, month - 1]
+
+    def column(self, name: str) -> np.ndarray:
+        """
+        One summary column, e.g. column("max_cap_smooth").
+        """
+        return self._columns[name][: self.n_members]
+
+    @property
+    def ids(self) -> np.ndarray:
+        return self._ids[: self.n_members]
@@ -1,5 +1,4 @@
 from logic import compute_monthly_without_smoothing, compute_monthly_with_smoothing
-import matplotlib.pyplot as plt
 
 
 def get_float(prompt: str) -> float:
@@ -56,7 +55,10 @@ def main():
         "it spreads payments over remaining months."
     )
 
-    # Plot the two monthly paths
+    # Plot the two monthly paths. matplotlib is imported here, not at the top,
+    # because importing it costs far more than the calculation itself.
+    import matplotlib.pyplot as plt
+
     plt.figure()
     plt.plot(months, no_smooth, marker="o", label="Without smoothing")
     plt.plot(months, smooth, marker="o", linestyle="--", label="With smoothing")
@@ -0,0 +1,72 @@
+"""
+Headless scenario runner shared by the GUI and the command line.
+
+run_scenario lives here rather than in gui_app.py so that callers that only
+need the numbers and the explanation text do not import tkinter.
+"""
+
+from logic import MONTH_NAMES, PERSONAS, compute_scenarios
+
+
+def run_scenario(annual_oop_estimate: float, start_month: int, persona_name: str | None):
+    """
+    Compute the three scenarios and return:
+    - months list
+    - dict of label -> values
+    - explanation string
+    """
+    if start_month < 1:
+        start_month = 1
+    elif start_month > 12:
+        start_month = 12
+
+    months = list(range(1, 13))
+
+    # Three scenarios and their summary numbers
+    summary, (no_cap, cap_no_smooth, cap_smooth) = compute_scenarios(annual_oop_estimate, start_month)
+
+    total_no_cap = summary.total_no_cap
+    total_cap = summary.total_cap
+
+    # Key monthly peaks
+    max_no_cap = summary.max_no_cap
+    max_cap_no_smooth = summary.max_cap_no_smooth
+    max_cap_smooth = summary.max_cap_smooth
+
+    month_no_cap = MONTH_NAMES[summary.month_no_cap - 1]
+    month_cap_no_smooth = MONTH_NAMES[summary.month_cap_no_smooth - 1]
+    month_cap_smooth = MONTH_NAMES[summary.month_cap_smooth - 1]
+
+    avoided = summary.avoided
+
+    if persona_name and persona_name in PERSONAS and PERSONAS[persona_name]:
+        persona_label = persona_name
+    else:
+        persona_label = "This example"
+
+    explanation = (
+        f"{persona_label} with an annual out of pocket estimate of "
+        f"${annual_oop_estimate:,.0f}:\n\n"
+        f"- Without any cap, total yearly out of pocket would be about "
+        f"${total_no_cap:,.0f}.\n"
+        f"- Under the 2025 $2,000 cap, yearly out of pocket is limited to "
+        f"${total_cap:,.0f}, avoiding about ${avoided:,.0f} in spending.\n"
+        f"- The highest monthly payment without a cap is about "
+        f"${max_no_cap:,.0f} in {month_no_cap}.\n"
+        f"- With the cap but no monthly payment plan, the highest monthly "
+        f"payment is about ${max_cap_no_smooth:,.0f} in {month_cap_no_smooth}.\n"
+        f"- After enrolling in the monthly payment plan in month {start_month}, "
+        f"the highest monthly payment falls to about "
+        f"${max_cap_smooth:,.0f} in {month_cap_smooth}.\n\n"
+        f"The total amount owed under the cap is the same with or without "
+        f"the monthly payment plan. The plan mainly changes the timing and "
+        f"reduces the worst single month bill."
+    )
+
+    series_dict = {
+        "No cap": no_cap,
+        "Cap only": cap_no_smooth,
+        "Cap + smoothing": cap_smooth,
+    }
+
+    return months, series_dict, explanation
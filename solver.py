@@ -0,0 +1,150 @@
+"""
+Best enrollment month for the monthly payment plan, for a whole cohort.
+
+With the cap applied, the smoothing schedule for start month s is the capped
+total times row s of logic.profile_table(). So the worst monthly bill for
+every possible start month is the capped total times the row maxima: one
+(N, 12) outer product, no per-member loop and no per-month recomputation.
+
+For each member we report:
+- best_month / best_peak: the start month with the lowest worst monthly
+  bill (the earliest one on ties) and that bill
+- current_peak: the worst monthly bill for the start month in the input
+- latest_affordable_month: with --threshold, the latest start month that
+  keeps every bill at or under the threshold (0 if none does), i.e. the
+  enrollment deadline outreach has to hit
+
+Under this model the best month is always January (a flat schedule has the
+lowest possible peak for a fixed total), but the per-member gap to the
+current start month and the affordability deadline are what outreach uses.
+
+Example:
+    python solver.py members.csv -o best.csv --threshold 150
+"""
+
+import argparse
+import csv
+import sys
+
+import numpy as np
+
+import logic
+from cohort import DEFAULT_CHUNK_SIZE, guess_format, iter_member_chunks
+
+OUTPUT_FIELDS = [
+    "id",
+    "annual_oop",
+    "start_month",
+    "current_peak",
+    "best_month",
+    "best_peak",
+    "latest_affordable_month",
+]
+
+
+def peak_by_start_month(annual_oop_estimates) -> np.ndarray:
+    """
+    Worst monthly bill with smoothing for every start month.
+
+    Returns an (N, 12) matrix; column s-1 is the peak for start month s.
+    Agrees with max(compute_monthly_with_smoothing(a, s)) up to float rounding.
+    """
+    annual = np.atleast_1d(np.asarray(annual_oop_estimates, dtype=float))
+    totals = np.minimum(np.maximum(annual, 0.0), logic.CAP)
+    row_peaks = np.asarray(logic.profile_table()).max(axis=1)
+    return totals[:, None] * row_peaks[None, :]
+
+
+def solve_start_months(annual_oop_estimates, threshold: float | None = None) -> dict:
+    """
+    Pick the best enrollment month for every member.
+
+    Returns a dict of arrays: best_month, best_peak and, when a threshold is
+    given, latest_affordable_month (0 where no start month fits).
+    """
+    return _solve(peak_by_start_month(annual_oop_estimates), threshold)
+
+
+def _solve(peaks: np.ndarray, threshold: float | None) -> dict:
+    best_index = peaks.argmin(axis=1)
+
+    result = {
+        "best_month": best_index + 1,
+        "best_peak": peaks[np.arange(peaks.shape[0]), best_index],
+    }
+
+    if threshold is not None:
+        affordable = peaks <= threshold
+        # Latest True column: flip the month axis and take the first True.
+        last_from_end = affordable[:, ::-1].argmax(axis=1)
+        result["latest_affordable_month"] = np.where(
+            affordable.any(axis=1), logic.MONTHS_IN_YEAR - last_from_end, 0
+        )
+    return result
+
+
+def solve_file(in_path: str, out, in_fmt: str, threshold: float | None, chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+    """
+    Stream a cohort file through solve_start_months and write a CSV.
+
+    Returns the number of members processed.
+    """
+    writer = csv.writer(out, lineterminator="\n")
+    writer.writerow(OUTPUT_FIELDS)
+
+    count = 0
+    for members in iter_member_chunks(in_path, in_fmt, chunk_size):
+        annual = np.fromiter((m[1] for m in members), dtype=float, count=len(members))
+        start = np.fromiter((m[2] for m in members), dtype=np.int64, count=len(members))
+
+        peaks = peak_by_start_month(annual)
+        result = _solve(peaks, threshold)
+        current_peak = peaks[np.arange(len(members)), start - 1]
+        latest = result.get("latest_affordable_month", np.zeros(len(members), dtype=np.int64))
+
+        for row in zip(
+            (m[0] for m in members),
+            annual.tolist(),
+            start.tolist(),
+            current_peak.tolist(),
+            result["best_month"].tolist(),
+            result["best_peak"].tolist(),
+            latest.tolist() if threshold is not None else [""] * len(members),
+        ):
+            writer.writerow(row)
+        count += len(members)
+    return count
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Find the payment plan start month that minimizes each member's worst monthly bill."
+    )
+    parser.add_argument("input", help="CSV or JSONL cohort file (same format as cohort.py)")
+    parser.add_argument("-o", "--output", default="-", help="output CSV (default: stdout)")
+    parser.add_argument("--input-format", choices=("csv", "jsonl"), help="default: from the file name")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        help="affordability threshold; also report the latest start month keeping every bill under it",
+    )
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    args = parser.parse_args(argv)
+
+    in_fmt = args.input_format or guess_format(args.input)
+    try:
+        if args.output == "-":
+            count = solve_file(args.input, sys.stdout, in_fmt, args.threshold, args.chunk_size)
+        else:
+            with open(args.output, "w", newline="", encoding="utf-8") as out:
+                count = solve_file(args.input, out, in_fmt, args.threshold, args.chunk_size)
+    except (OSError, ValueError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+
+    print(f"Solved {count:,} members.", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
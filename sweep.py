@@ -0,0 +1,171 @@
+"""
+Parameter sweep over annual estimates x start months.
+
+Evaluates a dense grid (by default $0 to $20,000 in $1 steps, times the
+twelve start months) in bulk and stores these surfaces:
+
+- peak_payment (annual x month): worst monthly bill on the payment plan
+  when enrolling in that month
+- peak_reduction (annual x month): how much lower that is than the worst
+  monthly bill with the cap only
+- months_at_cap (annual): months from the month the cap is reached through
+  December (0 when the cap is never reached)
+- avoided (annual): yearly spending avoided because of the cap
+
+Every scenario output is piecewise linear in the annual estimate, so the
+places where the behaviour changes are known in closed form: the estimate
+crossing CAP, and for each month m the estimate CAP / (share of the yearly
+spend paid by the end of month m) above which the cap is reached by month m.
+Those breakpoints are reported without scanning the grid.
+
+The surfaces are saved to a .npz file together with the model parameters,
+so the GUI or a report can look a point up instead of recomputing it.
+
+Example:
+    python sweep.py --max 20000 --step 1 -o surface.npz
+"""
+
+import argparse
+import json
+import sys
+
+import numpy as np
+
+import logic
+from batch import cumulative_shares, normalized_weights
+from logic import MONTH_NAMES, MONTHS_IN_YEAR
+from solver import peak_by_start_month
+
+SURFACES = ("peak_payment", "peak_reduction", "months_at_cap", "avoided")
+
+
+def find_breakpoints() -> list[dict]:
+    """
+    Annual estimates where the scenario outputs change behaviour, ascending.
+
+    Events that happen at the same estimate share one entry, e.g. the cap
+    itself and "cap reached by Dec" (December's cumulative share is 1.0).
+    Estimates are compared to a millionth of a dollar so float noise in
+    the shares does not split them.
+    """
+    events = {float(logic.CAP): ["estimate reaches the cap; capped totals and peaks stop growing"]}
+    for month, share in enumerate(cumulative_shares(), start=1):
+        if share > 0:
+            events.setdefault(round(float(logic.CAP / share), 6), []).append(f"cap reached by {MONTH_NAMES[month - 1]}")
+    return [{"annual_oop": annual, "event": "; ".join(events[annual])} for annual in sorted(events)]
+
+
+def compute_surfaces(annual_grid) -> dict:
+    """
+    Evaluate every surface over the given annual grid and all start months.
+    """
+    annual = np.asarray(annual_grid, dtype=float)
+    capped_total = np.minimum(np.maximum(annual, 0.0), logic.CAP)
+
+    peak_payment = peak_by_start_month(annual)
+
+    peak_cap_only = capped_total * max(normalized_weights())
+
+    reached = annual[:, None] * cumulative_shares()[None, :] >= logic.CAP
+    months_at_cap = reached.sum(axis=1)
+
+    return {
+        "peak_payment": peak_payment,
+        "peak_reduction": peak_cap_only[:, None] - peak_payment,
+        "months_at_cap": months_at_cap,
+        "avoided": np.maximum(annual, 0.0) - capped_total,
+    }
+
+
+class SweepSurface:
+    """
+    Precomputed sweep surfaces with point lookup.
+    """
+
+    def __init__(self, annual: np.ndarray, surfaces: dict, model: dict, breakpoints: list[dict]):
+        self.annual = annual
+        self.surfaces = surfaces
+        self.model = model
+        self.breakpoints = breakpoints
+
+    @classmethod
+    def build(cls, max_annual: float = 20_000.0, step: float = 1.0, min_annual: float = 0.0) -> "SweepSurface":
+        if step <= 0 or max_annual < min_annual:
+            raise ValueError("step must be positive and max_annual at least min_annual")
+        count = int(round((max_annual - min_annual) / step)) + 1
+        annual = min_annual + step * np.arange(count)
+        return cls(annual, compute_surfaces(annual), _model_info(), find_breakpoints())
+
+    def save(self, path: str) -> None:
+        header = json.dumps({"model": self.model, "breakpoints": self.breakpoints})
+        np.savez_compressed(path, annual=self.annual, header=np.array(header), **self.surfaces)
+
+    @classmethod
+    def load(cls, path: str, check_model: bool = True) -> "SweepSurface":
+        """
+        Load a saved sweep. Raises ValueError if it was built with a
+        different CAP or SPENDING_WEIGHTS than the ones in logic.py now.
+        """
+        with np.load(path) as data:
+            header = json.loads(str(data["header"]))
+            surfaces = {name: data[name] for name in SURFACES}
+            annual = data["annual"]
+
+        if check_model and header["model"] != _model_info():
+            raise ValueError(f"{path} was built with different model parameters; rebuild it")
+        return cls(annual, surfaces, header["model"], header["breakpoints"])
+
+    def lookup(self, annual_oop_estimate: float, start_month: int) -> dict:
+        """
+        Read every surface at one point.
+
+        Money surfaces are piecewise linear in the estimate, so linear
+        interpolation between grid points is exact except within one step of
+        a breakpoint. months_at_cap is taken from the grid point at or below
+        the estimate.
+        """
+        if not self.annual[0] <= annual_oop_estimate <= self.annual[-1]:
+            raise ValueError(
+                f"annual estimate {annual_oop_estimate} is outside the sweep "
+                f"range {self.annual[0]:g}-{self.annual[-1]:g}"
+            )
+        month = min(max(start_month, 1), 12)
+        below = max(int(np.searchsorted(self.annual, annual_oop_estimate, side="right")) - 1, 0)
+
+        return {
+            "peak_payment": float(np.interp(annual_oop_estimate, self.annual, self.surfaces["peak_payment"][:, month - 1])),
+            "peak_reduction": float(np.interp(annual_oop_estimate, self.annual, self.surfaces["peak_reduction"][:, month - 1])),
+            "months_at_cap": int(self.surfaces["months_at_cap"][below]),
+            "avoided": float(np.interp(annual_oop_estimate, self.annual, self.surfaces["avoided"])),
+        }
+
+
+def _model_info() -> dict:
+    return {"cap": logic.CAP, "weights": list(logic.SPENDING_WEIGHTS), "months": MONTHS_IN_YEAR}
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Sweep annual estimates x start months and save the surfaces.")
+    parser.add_argument("--min", type=float, default=0.0, dest="min_annual", help="lowest estimate (default: 0)")
+    parser.add_argument("--max", type=float, default=20_000.0, dest="max_annual", help="highest estimate (default: 20000)")
+    parser.add_argument("--step", type=float, default=1.0, help="grid step in dollars (default: 1)")
+    parser.add_argument("-o", "--output", default="surface.npz", help="output .npz file (default: surface.npz)")
+    args = parser.parse_args(argv)
+
+    try:
+        sweep = SweepSurface.build(args.max_annual, args.step, args.min_annual)
+        sweep.save(args.output)
+    except (OSError, ValueError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+
+    cells = sweep.annual.size * MONTHS_IN_YEAR
+    print(f"Saved {cells:,} grid points to {args.output}")
+    print("Breakpoints:")
+    for b in sweep.breakpoints:
+        print(f"  ${b['annual_oop']:>10,.2f}  {b['event']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
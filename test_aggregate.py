@@ -0,0 +1,56 @@
+import json
+
+import numpy as np
+import pytest
+
+import cohort
+from aggregate import CashFlowAggregate, aggregate_file
+
+
+def _write_members(path, n):
+    with open(path, "w") as f:
+        f.write("id,annual_oop,start_month,persona,plan\n")
+        for i in range(n):
+            f.write(f"m{i},{300 + 97.13 * i:.2f},{1 + i % 12},,{'AB'[i % 2]}\n")
+
+
+def test_totals_match_member_schedules(tmp_path):
+    path = str(tmp_path / "members.csv")
+    _write_members(path, 500)
+    result = aggregate_file(path, "csv", "plan", workers=1)
+    merged = aggregate_file(path, "csv", "plan", workers=2, chunk_size=64)
+    assert result.report() == merged.report()
+
+    members = [m for chunk in cohort.iter_member_chunks(path, "csv", 1000) for m in chunk]
+    computed = cohort.compute_chunk(members)
+    groups = result.groups
+    total_cents = sum(g.monthly for g in groups.values())
+    for s, name in enumerate(cohort.SCENARIOS):
+        expected = np.round(np.asarray(computed[name]) * 100).astype(np.int64).sum(axis=0)
+        assert np.abs(total_cents[s] - expected).max() <= len(members)
+
+
+@pytest.mark.parametrize("bin_width, bins", [(0.0, 10), (0.004, 10), (-1.0, 10), (50.0, 0)])
+def test_rejects_empty_bins(bin_width, bins):
+    with pytest.raises(ValueError):
+        CashFlowAggregate(bin_width=bin_width, bins=bins)
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_unknown_group_by_field_is_an_error(tmp_path, workers):
+    path = tmp_path / "members.jsonl"
+    path.write_text("".join(
+        json.dumps({"id": f"m{i}", "annual_oop": 500 + i, "plan": "AB"[i % 2] if i % 3 else None}) + "\n"
+        for i in range(200)
+    ))
+    with pytest.raises(ValueError, match="no record has a field named 'pln'"):
+        aggregate_file(str(path), "jsonl", "pln", workers=workers, chunk_size=32)
+
+    # A field that is present (even if null on some records) groups as usual.
+    result = aggregate_file(str(path), "jsonl", "plan", workers=workers, chunk_size=32)
+    assert sorted(result.groups) == ["(none)", "A", "B"]
+
+    csv_path = tmp_path / "members.csv"
+    _write_members(csv_path, 10)
+    with pytest.raises(ValueError, match="no column named 'pln'"):
+        aggregate_file(str(csv_path), "csv", "pln")
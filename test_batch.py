@@ -0,0 +1,104 @@
+import math
+import random
+import sys
+import types
+
+import numpy as np
+import pytest
+
+import batch
+import logic
+
+
+def _estimates(n=3000, seed=11):
+    rng = random.Random(seed)
+    values = [rng.uniform(0, 9000) for _ in range(n)]
+    values += [round(v, 2) for v in values[:500]]
+    values += [0.0, -10.0, 1e-9, 0.01, logic.CAP, logic.CAP - 1e-9, logic.CAP + 1e-9, 1e12]
+    return values
+
+
+def _start_months(n, seed=12):
+    rng = random.Random(seed)
+    return [rng.randint(-1, 14) for _ in range(n)]
+
+
+def test_no_cap_and_cap_only_match_scalar_bit_for_bit():
+    annual = _estimates()
+    assert np.array_equal(batch.batch_no_cap(annual), [logic.compute_monthly_no_cap(a) for a in annual])
+    assert np.array_equal(
+        batch.batch_without_smoothing(annual), [logic.compute_monthly_without_smoothing(a) for a in annual]
+    )
+
+
+def test_smoothing_matches_scalar_bit_for_bit():
+    annual = _estimates()
+    months = _start_months(len(annual))
+    expected = [logic.compute_monthly_with_smoothing(a, m) for a, m in zip(annual, months)]
+    assert np.array_equal(batch.batch_with_smoothing(annual, months), expected)
+
+
+def test_compute_scenarios_matches_scalar():
+    annual = _estimates(500)
+    months = _start_months(len(annual))
+    summary, series = batch.batch_compute_scenarios(annual, months)
+    for i, (a, m) in enumerate(zip(annual, months)):
+        scalar_summary, scalar_series = logic.compute_scenarios(a, m)
+        for name, value in scalar_summary._asdict().items():
+            assert summary[name][i] == value, (name, a, m)
+        for matrix, values in zip(series, scalar_series):
+            assert list(matrix[i]) == values
+
+
+def test_per_member_weights_match_scalar():
+    annual = _estimates(500)
+    months = _start_months(len(annual))
+    rng = np.random.default_rng(4)
+    profiles = rng.uniform(0.1, 2.0, (3, 12))
+    profiles /= profiles.sum(axis=1, keepdims=True)
+    weights = profiles[np.arange(len(annual)) % 3]
+
+    summary, series = batch.batch_compute_scenarios(annual, months, weights)
+    for i, (a, m) in enumerate(zip(annual, months)):
+        row = weights[i].tolist()
+        scalar_summary, scalar_series = logic.compute_scenarios(a, m, row)
+        assert logic.summarize_scenarios(a, m, row) == scalar_summary
+        for name, value in scalar_summary._asdict().items():
+            assert summary[name][i] == value, (name, a, m)
+        for matrix, values in zip(series, scalar_series):
+            assert list(matrix[i]) == values
+    assert np.array_equal(batch.batch_with_smoothing(annual, months, weights), series[2])
+    with pytest.raises(ValueError, match="12 columns"):
+        batch.batch_no_cap(annual, weights[:, :11])
+
+
+def _reference_sum(values, compensated):
+    """
+    CPython's float sum(): left to right from 0, with Neumaier compensation
+    from 3.12 on.
+    """
+    total = 0.0
+    comp = 0.0
+    for x in values:
+        t = total + x
+        if compensated:
+            comp += (total - t) + x if abs(total) >= abs(x) else (x - t) + total
+        total = t
+    if compensated and comp and math.isfinite(comp):
+        total += comp
+    return total
+
+
+@pytest.mark.parametrize("version", [(3, 11, 0), (3, 12, 0)])
+def test_builtin_sum_both_branches(monkeypatch, version):
+    monkeypatch.setattr(batch, "sys", types.SimpleNamespace(version_info=version))
+    rng = np.random.default_rng(3)
+    matrix = np.concatenate([
+        rng.uniform(0, 5000, (2000, 12)),
+        rng.uniform(-1, 1, (200, 12)) * 10.0 ** rng.integers(-8, 16, (200, 12)),
+        np.array([[1e16, 1.0, -1e16] + [0.1] * 9]),
+    ])
+    expected = [_reference_sum(row, version >= (3, 12)) for row in matrix.tolist()]
+    assert np.array_equal(batch._builtin_sum(matrix), expected)
+    if (sys.version_info >= (3, 12)) == (version >= (3, 12)):
+        assert np.array_equal(batch._builtin_sum(matrix), [sum(row) for row in matrix.tolist()])
@@ -0,0 +1,85 @@
+import math
+import random
+
+import numpy as np
+import pytest
+
+import batch
+import cents
+import logic
+from logic import MONTHS_IN_YEAR
+
+
+def _estimates(n=2000, seed=5):
+    rng = random.Random(seed)
+    values = [round(rng.uniform(0, 8000), 2) for _ in range(n)]
+    return values + [0.0, -5.0, 0.01, 0.005, 0.015, logic.CAP, logic.CAP - 0.01, logic.CAP + 0.01, 1e9 + 0.37]
+
+
+def test_schedules_sum_exactly():
+    cap_cents = cents.to_cents(logic.CAP)
+    for annual in _estimates():
+        total = max(cents.to_cents(annual), 0)
+        assert sum(cents.compute_monthly_no_cap_cents(annual)) == total
+        assert sum(cents.compute_monthly_without_smoothing_cents(annual)) == min(total, cap_cents)
+        for start in (1, 6, 12):
+            payments = cents.compute_monthly_with_smoothing_cents(annual, start)
+            assert len(payments) == MONTHS_IN_YEAR
+            assert sum(payments) == min(total, cap_cents)
+            assert all(p >= 0 for p in payments)
+
+
+def test_cached_allocation_matches_direct():
+    plan = cents.allocation_plan()
+    for total in list(range(1, 2000)) + [123_456_789, 10**15 + 7, (1 << 62) + 3]:
+        assert plan.allocate(total) == plan.allocate_direct(total)
+
+
+def test_scalar_matches_batch():
+    annual = _estimates()
+    months = [1 + i % 12 for i in range(len(annual))]
+    assert np.array_equal(batch.batch_no_cap_cents(annual), [cents.compute_monthly_no_cap_cents(a) for a in annual])
+    assert np.array_equal(
+        batch.batch_with_smoothing_cents(annual, months),
+        [cents.compute_monthly_with_smoothing_cents(a, m) for a, m in zip(annual, months)],
+    )
+
+
+def test_plan_follows_weight_changes(monkeypatch):
+    before = cents.allocate_cents(10_000)
+    monkeypatch.setattr(logic, "SPENDING_WEIGHTS", [1 / 12] * 12)
+    after = cents.allocate_cents(10_000)
+    assert after != before
+    assert sum(after) == 10_000
+
+
+@pytest.mark.parametrize("amount", [math.nan, math.inf, -math.inf, 1e307])
+def test_non_finite_amounts_are_rejected(amount):
+    with pytest.raises(ValueError, match="finite"):
+        cents.to_cents(amount)
+    with pytest.raises(ValueError, match="estimate 1 must be a finite"):
+        batch.batch_no_cap_cents([100.0, amount])
+
+
+def test_large_totals_do_not_overflow_int64():
+    annual = [1e12, 1e13 + 0.37, 9e16, 250.0]
+    rows = batch.batch_no_cap_cents(annual)
+    assert rows.tolist() == [cents.compute_monthly_no_cap_cents(a) for a in annual]
+    assert rows.sum(axis=1).tolist() == [cents.to_cents(a) for a in annual]
+    with pytest.raises(ValueError, match="estimate 1 is too large"):
+        batch.batch_no_cap_cents([100.0, 1e17])
+
+
+def test_fitted_profile_allocations_are_cached(monkeypatch):
+    rng = random.Random(8)
+    raw = [rng.uniform(0.5, 2.0) for _ in range(MONTHS_IN_YEAR)]
+    monkeypatch.setattr(logic, "SPENDING_WEIGHTS", [w / sum(raw) for w in raw])
+    plan = cents.allocation_plan()
+    assert 100 < plan.period <= cents.MAX_CACHED_PERIOD
+
+    totals = [rng.randrange(0, 10**9) for _ in range(plan.period + 500)] + [plan.period * 7 + 3, 10**15 + 1]
+    expected = [plan.allocate_direct(t) for t in totals]
+    assert [plan.allocate(t) for t in totals] == expected
+    # Long batches go through the residue table, short ones allocate directly.
+    assert batch.allocate_cents_matrix(np.array(totals)).tolist() == expected
+    assert batch.allocate_cents_matrix(np.array(totals[:50])).tolist() == expected[:50]
@@ -0,0 +1,107 @@
+import json
+
+import pytest
+
+import cohort
+import logic
+
+
+def _write(path, text):
+    path.write_text(text)
+    return str(path)
+
+
+@pytest.mark.parametrize(
+    "row, message",
+    [
+        (",3000,1,", "missing id"),
+        ("m1,,1,", "missing annual_oop for member m1"),
+        ("m1,lots,1,", "must be a number"),
+        ("m1,3000,March,", "start_month an integer"),
+        ("m1,nan,1,", "must be finite"),
+        ("m1,inf,1,", "must be finite"),
+    ],
+)
+def test_csv_parse_errors_name_the_record(tmp_path, row, message):
+    path = _write(tmp_path / "m.csv", f"id,annual_oop,start_month,persona\nok,100,1,\n{row}\n")
+    with pytest.raises(ValueError, match=message) as info:
+        list(cohort.iter_member_chunks(path, "csv"))
+    assert f"{path} @ byte " in str(info.value)
+
+
+@pytest.mark.parametrize(
+    "line, message",
+    [
+        ("{not json", "invalid JSON"),
+        ("[1, 2]", "expected a JSON object"),
+        ('{"id": "m1", "annual_oop": "x"}', "must be a number"),
+        ('{"id": "m1", "annual_oop": 1e999}', "must be finite"),
+    ],
+)
+def test_jsonl_parse_errors_name_the_record(tmp_path, line, message):
+    good = json.dumps({"id": "ok", "annual_oop": 100})
+    path = _write(tmp_path / "m.jsonl", f"{good}\n{line}\n")
+    with pytest.raises(ValueError, match=message) as info:
+        list(cohort.iter_member_chunks(path, "jsonl"))
+    assert "@ byte " + str(len(good) + 1) in str(info.value)
+
+
+def test_persona_defaults_and_clamped_start_month(tmp_path):
+    path = _write(
+        tmp_path / "m.csv",
+        "id,annual_oop,start_month,persona\na,,,High cost oncology patient\nb,500,15,\n",
+    )
+    [members] = cohort.iter_member_chunks(path, "csv")
+    assert members[0][1] == 5000.0
+    assert members[1][1:3] == (500.0, 12)
+
+
+def test_main_reports_parse_errors(tmp_path, capsys):
+    path = _write(tmp_path / "m.csv", "id,annual_oop\nm1,abc\n")
+    assert cohort.main([path, "-o", str(tmp_path / "out.csv")]) == 1
+    assert capsys.readouterr().err.startswith("error: ")
+
+
+def test_workers_give_byte_identical_output(tmp_path):
+    lines = ["id,annual_oop,start_month,persona"]
+    lines += [f"m{i},{250 + 61.7 * i:.2f},{1 + i % 12}," for i in range(700)]
+    path = _write(tmp_path / "m.csv", "\n".join(lines) + "\n")
+    for fmt in ("csv", "jsonl"):
+        serial, parallel = tmp_path / f"serial.{fmt}", tmp_path / f"parallel.{fmt}"
+        assert cohort.main([path, "-o", str(serial), "--workers", "1", "--chunk-size", "64"]) == 0
+        assert cohort.main([path, "-o", str(parallel), "--workers", "3", "--chunk-size", "64"]) == 0
+        assert serial.read_bytes() == parallel.read_bytes()
+        assert len(serial.read_text().splitlines()) == (701 if fmt == "csv" else 700)
+
+
+def test_weights_by_picks_each_members_profile(tmp_path, monkeypatch):
+    monkeypatch.setattr(logic, "WEIGHT_PROFILES", dict(logic.WEIGHT_PROFILES))
+    profiles = {"insulin": [0.3] + [0.7 / 11] * 11, "oncology": [1 / 12] * 12}
+    weights_file = _write(tmp_path / "w.json", json.dumps({"profiles": {k: {"weights": v} for k, v in profiles.items()}}))
+    lines = ["id,annual_oop,start_month,drug_class"]
+    classes = ["insulin", "oncology", "", "unknown"]
+    lines += [f"m{i},{400 + 97.3 * i:.2f},{1 + i % 12},{classes[i % 4]}" for i in range(200)]
+    path = _write(tmp_path / "m.csv", "\n".join(lines) + "\n")
+
+    out = tmp_path / "out.jsonl"
+    args = [path, "-o", str(out), "--weights-file", weights_file, "--weights-by", "drug_class", "--chunk-size", "32"]
+    assert cohort.main(args) == 0
+    for i, line in enumerate(out.read_text().splitlines()):
+        row = json.loads(line)
+        weights = logic.WEIGHT_PROFILES.get(classes[i % 4])
+        summary, series = logic.compute_scenarios(row["annual_oop"], row["start_month"], weights)
+        assert row["cap_smooth"] == series[2]
+        assert row["total_cap_smooth"] == summary.total_cap_smooth
+
+    for extra in (["--workers", "2"], ["--cache", str(tmp_path / "c.sqlite")], ["--cache", str(tmp_path / "c.sqlite")]):
+        again = tmp_path / "again.jsonl"
+        assert cohort.main([*args[:2], str(again), *args[3:], *extra]) == 0
+        assert again.read_bytes() == out.read_bytes()
+
+
+def test_weights_by_needs_the_column(tmp_path, capsys):
+    path = _write(tmp_path / "m.csv", "id,annual_oop\nm1,100\n")
+    weights_file = _write(tmp_path / "w.json", json.dumps({"profiles": {}}))
+    assert cohort.main([path, "--weights-by", "drug_class"]) == 2
+    assert cohort.main([path, "--weights-file", weights_file, "--weights-by", "drug_class"]) == 1
+    assert "no 'drug_class' column" in capsys.readouterr().err
@@ -0,0 +1,61 @@
+import pytest
+
+import logic
+from fit_weights import OVERALL, fit_files, iter_claims, main
+
+
+def _write_claims(path, rows):
+    with open(path, "w") as f:
+        f.write("id,month,amount,drug_class\n")
+        for i, (month, amount, group) in enumerate(rows):
+            f.write(f"c{i},{month},{amount},{group}\n")
+
+
+def test_profiles_are_month_shares(tmp_path):
+    path = str(tmp_path / "claims.csv")
+    _write_claims(path, [(1, "30.00", "a"), (2, "10.00", "a"), (2, "60.00", "b")])
+    fit, _, read = fit_files([path], group_by="drug_class")
+    assert read == [path]
+    profiles, skipped = fit.profiles(min_claims=1)
+    assert skipped == []
+    assert profiles["a"]["weights"][:2] == [0.75, 0.25]
+    assert profiles[OVERALL]["weights"][:2] == [0.3, 0.7]
+    assert profiles[OVERALL]["total_oop"] == 100.0
+
+
+def test_reserved_group_names_are_renamed(tmp_path):
+    path = str(tmp_path / "claims.csv")
+    _write_claims(path, [(1, "5", "all"), (3, "5", "default"), (6, "5", "x")])
+    fit, _, _ = fit_files([path], group_by="drug_class")
+    profiles, _ = fit.profiles(min_claims=1)
+    assert sorted(profiles) == ["all", "drug_class:all", "drug_class:default", "x"]
+    assert profiles["all"]["claims"] == 3
+
+
+def test_builtin_profile_cannot_be_replaced():
+    with pytest.raises(ValueError, match="built in"):
+        logic.register_weight_profile(logic.DEFAULT_WEIGHT_PROFILE, [1] * 12)
+
+
+def test_bad_claim_names_the_position(tmp_path):
+    path = str(tmp_path / "claims.csv")
+    _write_claims(path, [(1, "5", "a"), (13, "5", "a")])
+    with pytest.raises(ValueError, match="claims.csv @ byte"):
+        list(iter_claims(path, "csv", "drug_class"))
+
+
+def test_second_run_reads_nothing(tmp_path):
+    path = str(tmp_path / "claims.csv")
+    out = str(tmp_path / "profiles.json")
+    _write_claims(path, [(m, "12.5", "a") for m in range(1, 13)])
+    assert main([path, "--group-by", "drug_class", "--min-claims", "1", "-o", out]) == 0
+    _, _, read = fit_files([path], group_by="drug_class", cache_path=out)
+    assert read == []
+
+
+@pytest.mark.parametrize("amount", ["inf", "nan", "1e308"])
+def test_non_finite_amount_names_the_position(tmp_path, amount):
+    path = str(tmp_path / "claims.csv")
+    _write_claims(path, [(1, "5", "a"), (2, amount, "a")])
+    with pytest.raises(ValueError, match=r"claims.csv @ byte \d+: amount must be a finite"):
+        list(iter_claims(path, "csv", "drug_class"))
@@ -0,0 +1,64 @@
+import queue
+import threading
+
+import gui_app
+
+
+def _messages(results):
+    out = []
+    while not results.empty():
+        out.append(results.get_nowait())
+    return out
+
+
+def _write_members(path, n):
+    with open(path, "w") as f:
+        f.write("id,annual_oop,start_month\n")
+        for i in range(n):
+            f.write(f"m{i},{500 + 40 * i},{1 + i % 12}\n")
+
+
+def test_cohort_job_counts_every_member(tmp_path):
+    path = str(tmp_path / "members.csv")
+    _write_members(path, 250)
+    results = queue.Queue()
+    gui_app.run_cohort_job(path, results, threading.Event(), chunk_size=100)
+    messages = _messages(results)
+    assert messages[0] == ("total", 252)
+    assert sum(m[1] for m in messages if m[0] == "chunk") == 250
+    assert messages[-1][:2] == ("done", 250)
+
+
+def test_cohort_job_cancelled_before_counting(tmp_path):
+    path = str(tmp_path / "members.csv")
+    _write_members(path, 10)
+    results = queue.Queue()
+    cancel = threading.Event()
+    cancel.set()
+    gui_app.run_cohort_job(path, results, cancel)
+    assert _messages(results) == [("cancelled", 0)]
+
+
+class _FakeWindow:
+    def __init__(self):
+        self.cancelled = []
+
+    def after_cancel(self, after_id):
+        self.cancelled.append(after_id)
+
+
+def test_stop_cohort_job_cancels_poll_and_waits_for_worker(tmp_path):
+    path = str(tmp_path / "members.csv")
+    _write_members(path, 5000)
+    results = queue.Queue()
+    cancel = threading.Event()
+    thread = threading.Thread(target=gui_app.run_cohort_job, args=(path, results, cancel, 100), daemon=True)
+    thread.start()
+    window = _FakeWindow()
+    job = {"thread": thread, "cancel": cancel, "queue": results, "after": "after#1"}
+
+    gui_app._stop_cohort_job(window, job)
+    assert window.cancelled == ["after#1"]
+    assert not thread.is_alive()
+    assert job["thread"] is None and job["after"] is None
+    assert _messages(results)[-1][0] in ("cancelled", "done")
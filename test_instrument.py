@@ -0,0 +1,36 @@
+import subprocess
+import sys
+import types
+
+import instrument
+import logic
+
+
+def test_enable_times_project_bindings_only(monkeypatch):
+    original = logic.compute_scenarios
+    outside = types.ModuleType("outside")
+    outside.__file__ = "/somewhere/else/outside.py"
+    outside.compute_scenarios = original
+    monkeypatch.setitem(sys.modules, "outside", outside)
+
+    instrument.reset()
+    instrument.enable()
+    try:
+        assert logic.compute_scenarios is not original
+        assert outside.compute_scenarios is original
+        logic.compute_scenarios(3000.0, 1)
+        assert instrument.snapshot()["metrics"]["logic.compute_scenarios"]["calls"] == 1
+    finally:
+        instrument.disable()
+    assert logic.compute_scenarios is original
+
+
+def test_stage_is_free_while_disabled():
+    assert not instrument.is_enabled()
+    assert instrument.stage("a") is instrument.stage("b")
+
+
+def test_logic_imports_without_instrument():
+    code = "import sys; sys.modules['instrument'] = None; import logic; print(logic.compute_scenarios(3000.0, 1)[0].total_cap)"
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+    assert float(out) == logic.compute_scenarios(3000.0, 1)[0].total_cap
@@ -0,0 +1,58 @@
+import pytest
+
+from ledger import BeneficiaryLedger, _read_claims_csv, main, replay_claims
+
+
+def test_replay_one_ledger_per_member():
+    claims = [("a", 1, 500.0), ("a", 3, 2500.0), ("b", 2, 100.0)]
+    ledgers = list(replay_claims(claims, {"a": 1}))
+    assert [ledger.member_id for ledger in ledgers] == ["a", "b"]
+    assert ledgers[0].total_oop == 2000.0  # capped
+    assert ledgers[0].cap_month == 3
+    assert ledgers[0].total_paid == pytest.approx(2000.0)
+    assert ledgers[1].total_paid == pytest.approx(100.0)
+
+
+def test_non_contiguous_member_is_an_error():
+    claims = [("a", 1, 10.0), ("b", 1, 10.0), ("a", 2, 10.0)]
+    with pytest.raises(ValueError, match="'a' are not contiguous"):
+        list(replay_claims(claims))
+
+
+def test_bad_start_month_reports_line(tmp_path, capsys):
+    path = tmp_path / "claims.csv"
+    path.write_text("id,month,amount,start_month\na,1,10,\nb,1,10,soon\n")
+    with pytest.raises(ValueError, match=r"claims.csv:3: start_month"):
+        list(_read_claims_csv(str(path), {}))
+    assert main([str(path)]) == 1
+    assert "claims.csv:3" in capsys.readouterr().err
+
+
+def test_unsorted_ids_are_an_error():
+    claims = [("b", 1, 10.0), ("a", 1, 10.0)]
+    with pytest.raises(ValueError, match="'a' are not contiguous or not sorted"):
+        list(replay_claims(claims))
+
+
+@pytest.mark.parametrize("amount", [float("nan"), float("inf"), float("-inf")])
+def test_non_finite_claim_amount_is_an_error(amount):
+    ledger = BeneficiaryLedger("a")
+    with pytest.raises(ValueError, match="member a: claim amount must be finite"):
+        ledger.add_claim(1, amount)
+    assert ledger.total_oop == 0.0
+
+
+def test_non_finite_amount_in_csv_reports_line(tmp_path):
+    path = tmp_path / "claims.csv"
+    path.write_text("id,month,amount\na,1,10\na,2,nan\n")
+    with pytest.raises(ValueError, match=r"claims.csv:3: amount must be finite, got 'nan'"):
+        list(_read_claims_csv(str(path), {}))
+
+
+def test_start_month_only_on_first_row(tmp_path):
+    path = tmp_path / "claims.csv"
+    path.write_text("id,month,amount,start_month\na,1,10,4\na,2,10,\na,3,10,4\nb,1,10,\nb,2,10,6\n")
+    start_months = {}
+    with pytest.raises(ValueError, match=r"claims.csv:6: start_month 6 for member 'b' differs"):
+        list(_read_claims_csv(str(path), start_months))
+    assert start_months == {"a": 4}
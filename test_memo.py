@@ -0,0 +1,76 @@
+import pytest
+
+import logic
+from memo import ScenarioMemo
+from scenario import run_scenario
+
+
+def test_lru_eviction_and_counters():
+    memo = ScenarioMemo(maxsize=2)
+    memo.compute_monthly_no_cap(100.0)
+    memo.compute_monthly_no_cap(200.0)
+    memo.compute_monthly_no_cap(100.0)  # hit; 200 is now least recently used
+    memo.compute_monthly_no_cap(300.0)  # evicts 200
+    assert memo.stats() == {
+        "hits": 1, "misses": 3, "evictions": 1, "invalidations": 0, "size": 2, "maxsize": 2,
+    }
+    memo.compute_monthly_no_cap(100.0)
+    memo.compute_monthly_no_cap(200.0)
+    assert (memo.hits, memo.misses, memo.evictions) == (2, 4, 2)
+
+    with pytest.raises(ValueError, match="maxsize"):
+        ScenarioMemo(maxsize=0)
+
+
+def test_results_match_and_equivalent_inputs_share_entries():
+    memo = ScenarioMemo()
+    assert memo.compute_monthly_with_smoothing(3000.0, 7) == tuple(logic.compute_monthly_with_smoothing(3000.0, 7))
+    assert memo.compute_monthly_without_smoothing(3000.0) == tuple(logic.compute_monthly_without_smoothing(3000.0))
+    assert memo.summarize_scenarios(2500.0, 4) == logic.summarize_scenarios(2500.0, 4)
+    misses = memo.misses
+    memo.compute_monthly_with_smoothing(3000.0, 15)
+    memo.compute_monthly_with_smoothing(3000.0, 12)
+    memo.compute_monthly_no_cap(-5.0)
+    memo.compute_monthly_no_cap(0.0)
+    assert memo.misses == misses + 2
+    assert memo.hits == 2
+
+
+def test_returned_results_cannot_be_changed():
+    memo = ScenarioMemo()
+    schedule = memo.compute_monthly_no_cap(1200.0)
+    assert isinstance(schedule, tuple)
+
+    months, series, explanation = memo.run_scenario(3000.0, 5, None)
+    with pytest.raises(TypeError):
+        series["No cap"] = ()
+    with pytest.raises(TypeError):
+        series["No cap"][0] = 0.0
+    _, fresh, fresh_explanation = run_scenario(3000.0, 5, None)
+    again = memo.run_scenario(3000.0, 5, None)
+    assert again[1] is series and again[2] == fresh_explanation
+    assert {label: list(values) for label, values in again[1].items()} == fresh
+    assert months == tuple(range(1, 13))
+
+
+def test_model_changes_drop_the_cache(monkeypatch):
+    memo = ScenarioMemo()
+    before = memo.compute_monthly_without_smoothing(3000.0)
+
+    monkeypatch.setattr(logic, "CAP", 2500.0)
+    assert memo.compute_monthly_without_smoothing(3000.0) == tuple(logic.compute_monthly_without_smoothing(3000.0))
+    assert sum(memo.compute_monthly_without_smoothing(3000.0)) == pytest.approx(2500.0)
+    assert memo.invalidations == 1
+    monkeypatch.undo()
+    assert memo.compute_monthly_without_smoothing(3000.0) == before
+    assert memo.invalidations == 2
+
+    # SPENDING_WEIGHTS changed in place, as use_weight_profile does.
+    monkeypatch.setattr(logic, "WEIGHT_PROFILES", dict(logic.WEIGHT_PROFILES))
+    monkeypatch.setattr(logic, "SPENDING_WEIGHTS", list(logic.SPENDING_WEIGHTS))
+    logic.register_weight_profile("flat", [1] * 12)
+    logic.use_weight_profile("flat")
+    flat = memo.compute_monthly_without_smoothing(3000.0)
+    assert memo.invalidations == 3
+    assert flat == tuple(logic.compute_monthly_without_smoothing(3000.0))
+    assert flat != before
@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+import logic
+import montecarlo
+
+
+def test_same_results_with_and_without_pool():
+    serial = montecarlo.simulate_personas(3000, seed=7, batch_size=1000)
+    pooled = montecarlo.simulate_personas(3000, seed=7, workers=2, batch_size=1000)
+    assert serial == pooled
+
+
+def test_pool_workers_use_parent_weights(monkeypatch):
+    weights = [1.0] * 11 + [40.0]  # almost everything in December
+    monkeypatch.setattr(logic, "SPENDING_WEIGHTS", weights)
+    serial = montecarlo.simulate_personas(2000, seed=3, batch_size=500)
+    pooled = montecarlo.simulate_personas(2000, seed=3, workers=2, batch_size=500)
+    assert serial == pooled
+
+
+@pytest.mark.parametrize("draws, batch_size", [(0, 100), (-5, 100), (10, 0)])
+def test_rejects_empty_runs(draws, batch_size):
+    with pytest.raises(ValueError):
+        montecarlo.simulate_persona(3000.0, 1, draws, np.random.SeedSequence(1), batch_size=batch_size)
+
+
+@pytest.mark.parametrize("concentration", [0.0, 50.0])
+def test_batch_matches_scalar_scenarios(concentration):
+    rng = np.random.default_rng(11)
+    annual = np.concatenate([montecarlo.sample_annual(rng, 2500.0, 0.6, 200, "lognormal"), [0.0, logic.CAP]])
+    weights = montecarlo.sample_weights(rng, concentration, annual.size)
+    for start_month in (1, 7):
+        peak_cap_only, peak_smoothing, cap_hit_month = montecarlo.simulate_batch(annual, weights, start_month)
+        for i, a in enumerate(annual):
+            row = list(weights[i])
+            _, (no_cap, cap_no_smooth, cap_smooth) = logic.compute_scenarios(a, start_month, weights=row)
+            assert peak_cap_only[i] == max(cap_no_smooth)
+            assert peak_smoothing[i] == max(cap_smooth)
+            hit = next((m for m, total in enumerate(np.cumsum(no_cap), 1) if total >= logic.CAP), 0)
+            assert cap_hit_month[i] == hit
+
+
+def test_pool_workers_use_parent_cap(monkeypatch):
+    monkeypatch.setattr(logic, "CAP", 900.0)
+    serial = montecarlo.simulate_personas(2000, seed=5, batch_size=500)
+    pooled = montecarlo.simulate_personas(2000, seed=5, workers=2, batch_size=500)
+    assert serial == pooled
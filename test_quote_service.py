@@ -0,0 +1,106 @@
+import asyncio
+import json
+from http import HTTPStatus
+
+import pytest
+
+from logic import compute_scenarios
+from quote_service import MicroBatcher, Overloaded, QuoteService
+
+
+def _route(service, body, method="POST", path="/quote"):
+    return asyncio.run(service._route(method, path, body))
+
+
+def _service(**batcher_args):
+    return QuoteService(MicroBatcher(**batcher_args), max_members=10)
+
+
+def test_quote_matches_compute_scenarios():
+    status, payload, _ = _route(_service(), json.dumps({"annual_oop": 3000, "start_month": 5}).encode())
+    assert status == HTTPStatus.OK
+    summary, series = compute_scenarios(3000.0, 5)
+    assert payload["monthly"]["cap_smooth"] == series[2]
+    assert payload["summary"] == summary._asdict()
+
+
+@pytest.mark.parametrize(
+    "body",
+    [
+        b"not json",
+        b'{"annual_oop": "\xff"}',  # not UTF-8
+        b'{"annual_oop": NaN}',
+        b'{"annual_oop": Infinity}',
+        b'{"annual_oop": 1' + b"0" * 400 + b"}",  # overflows float()
+        b'{"annual_oop": "3000"}',
+        b'{"annual_oop": 3000, "start_month": 2.5}',
+        b'{"members": []}',
+        b'{"members": [' + b",".join([b'{"annual_oop": 1}'] * 11) + b"]}",
+        b"[1, 2]",
+    ],
+)
+def test_bad_requests_get_400(body):
+    status, payload, _ = _route(_service(), body)
+    assert status == HTTPStatus.BAD_REQUEST
+    json.dumps(payload, allow_nan=False)
+
+
+def test_unknown_path_and_method():
+    service = _service()
+    assert _route(service, b"", "GET", "/nope")[0] == HTTPStatus.NOT_FOUND
+    assert _route(service, b"", "GET", "/quote")[0] == HTTPStatus.METHOD_NOT_ALLOWED
+
+
+def test_flood_gets_503_and_frees_capacity():
+    service = _service(window_ms=50, max_pending=20)
+    body = json.dumps({"annual_oop": 3000, "start_month": 5}).encode()
+
+    async def flood():
+        return await asyncio.gather(*(service._route("POST", "/quote", body) for _ in range(100)))
+
+    statuses = [status for status, _, _ in asyncio.run(flood())]
+    assert statuses.count(HTTPStatus.OK) == 20
+    assert statuses.count(HTTPStatus.SERVICE_UNAVAILABLE) == 80
+    assert service.batcher.stats()["in_flight"] == 0
+    assert _route(service, body)[0] == HTTPStatus.OK
+
+
+def test_batcher_counts_members_until_released():
+    async def run():
+        batcher = MicroBatcher(window_ms=1, max_batch=4, max_pending=6)
+        first = batcher.submit([1000.0] * 4, [1] * 4)  # a full batch, computed at once
+        await first
+        with pytest.raises(Overloaded):
+            batcher.submit([1000.0] * 3, [1] * 3)
+        batcher.release(4)
+        await batcher.submit([1000.0] * 3, [1] * 3)
+
+    asyncio.run(run())
+
+
+def test_big_flush_is_computed_in_slices():
+    async def run():
+        batcher = MicroBatcher(window_ms=1, max_batch=4, max_pending=100)
+        annual = [500.0 + 250 * i for i in range(10)]
+        start = [1 + i % 12 for i in range(10)]
+        seen = []
+
+        async def ticker():
+            while True:
+                seen.append(batcher.batches)
+                await asyncio.sleep(0)
+
+        background = asyncio.create_task(ticker())
+        small = batcher.submit([3000.0], [5])
+        summary, series = await batcher.submit(annual, start)
+        background.cancel()
+        return batcher.stats(), seen, summary, series, await small
+
+    stats, seen, summary, series, small = asyncio.run(run())
+    assert stats["batches"] == 3  # 11 members, at most 4 per kernel call
+    assert {1, 2} <= set(seen)  # other tasks ran between the slices
+    for i, a in enumerate([500.0 + 250 * i for i in range(10)]):
+        expected_summary, expected_series = compute_scenarios(a, 1 + i % 12)
+        assert summary["total_cap_smooth"][i] == expected_summary.total_cap_smooth
+        assert list(series[2][i]) == expected_series[2]
+    assert small[0]["total_cap"].tolist() == [2000.0]
@@ -0,0 +1,20 @@
+import os
+
+from render import MemberRenderer
+
+
+def test_member_paths_do_not_collide(tmp_path):
+    renderer = MemberRenderer(str(tmp_path), ["txt"])
+    ids = ["a/b", "a_b", "a b", "A_B", "..", "."]
+    paths = [renderer.member_path(member_id) for member_id in ids]
+    assert len(set(p.lower() for p in paths)) == len(ids)
+    for path in paths:
+        assert os.path.dirname(os.path.dirname(path)) == str(tmp_path)
+
+
+def test_render_writes_one_file_per_member(tmp_path):
+    renderer = MemberRenderer(str(tmp_path), ["txt", "svg"])
+    renderer.render("a/b", 3000.0, 1, "")
+    renderer.render("a_b", 5000.0, 1, "")
+    written = sorted(name for _, _, files in os.walk(tmp_path) for name in files)
+    assert len(written) == 4
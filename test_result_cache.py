@@ -0,0 +1,75 @@
+import numpy as np
+
+import cohort
+import logic
+from result_cache import ResultCache
+
+
+def _members(n, offset=0.0):
+    return [(f"m{i}", 500.0 + 37.5 * i + offset, 1 + i % 12, "") for i in range(n)]
+
+
+def _assert_same(a, b):
+    assert a.keys() == b.keys()
+    for name in a:
+        assert np.array_equal(a[name], b[name])
+
+
+def test_only_new_or_changed_members_are_computed(tmp_path):
+    path = str(tmp_path / "c.sqlite")
+    members = _members(200)
+    with ResultCache(path) as cache:
+        _assert_same(cohort.compute_chunk(members), cohort.compute_chunk_cached(members, cache))
+        assert cache.run_stats() == (0, 200)
+
+    changed = list(members)
+    changed[10] = ("m10", 99_999.0, 3, "")
+    changed.insert(0, ("new", 1234.5, 7, ""))
+    with ResultCache(path) as cache:
+        # Different chunk boundaries than the first run.
+        results = [cohort.compute_chunk_cached(changed[i:i + 64], cache) for i in range(0, len(changed), 64)]
+        assert cache.run_stats() == (199, 2)
+    for i, part in enumerate(results):
+        _assert_same(cohort.compute_chunk(changed[i * 64:(i + 1) * 64]), part)
+
+
+def test_equivalent_inputs_share_an_entry(tmp_path):
+    members = [("a", -5.0, 0, ""), ("b", 0.0, 1, ""), ("c", -0.0, 1, ""), ("d", 800.0, 14, ""), ("e", 800.0, 12, "")]
+    with ResultCache(str(tmp_path / "c.sqlite")) as cache:
+        _assert_same(cohort.compute_chunk(members), cohort.compute_chunk_cached(members, cache))
+        assert cache.run_stats() == (0, 2)
+        _assert_same(cohort.compute_chunk(members), cohort.compute_chunk_cached(members, cache))
+
+
+def test_budget_enforced_while_inserting(tmp_path):
+    payload = b"x" * 1000
+    with ResultCache(str(tmp_path / "c.sqlite"), max_bytes=3500) as cache:
+        for i in range(10):
+            cache.put_many([(f"k{i}".encode(), payload)])
+            assert cache.size_bytes() <= 3500
+        assert cache.evicted == 7
+        assert cache.get_many([b"k9", b"k0"]) == {b"k9": payload}
+
+
+def test_evict_reclaims_pages(tmp_path):
+    path = tmp_path / "c.sqlite"
+    with ResultCache(str(path)) as cache:
+        cache.put_many((f"k{i}".encode(), bytes(100_000)) for i in range(50))
+        cache.evict()
+        before = path.stat().st_size
+        cache.max_bytes = 0
+        assert cache.evict() == 50
+    assert path.stat().st_size < before / 10
+
+
+def test_model_change_drops_entries(tmp_path, monkeypatch):
+    path = str(tmp_path / "c.sqlite")
+    members = _members(5)
+    with ResultCache(path) as cache:
+        cohort.compute_chunk_cached(members, cache)
+        old_keys = cache.keys(np.array([m[1] for m in members]), np.array([m[2] for m in members]))
+    monkeypatch.setattr(logic, "CAP", logic.CAP + 100)
+    with ResultCache(path) as cache:
+        assert cache.size_bytes() == 0
+        assert cache.get_many(old_keys) == {}
+        _assert_same(cohort.compute_chunk(members), cohort.compute_chunk_cached(members, cache))
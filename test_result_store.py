@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+import cohort
+import logic
+from result_store import ResultStore
+
+
+def _members(n, prefix="m"):
+    return [(f"{prefix}{i}", 400.0 + 123.25 * i, 1 + i % 12, "") for i in range(n)]
+
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path / "r.store")
+    chunks = [_members(30), _members(20, prefix="x")]
+    store = ResultStore.create(path, 50)
+    for members in chunks:
+        store.append(members, cohort.compute_chunk(members))
+    store.flush()
+
+    reopened = ResultStore.open(path)
+    assert reopened.n_members == 50
+    members = chunks[0] + chunks[1]
+    expected = cohort.compute_chunk(members)
+    assert [i.decode() for i in reopened.ids] == [m[0] for m in members]
+    for name in ("no_cap", "cap_no_smooth", "cap_smooth"):
+        assert np.array_equal(reopened.scenario(name), expected[name])
+    assert np.array_equal(reopened.column("max_cap_smooth"), expected["max_cap_smooth"])
+    assert np.array_equal(reopened.column("start_month"), [m[2] for m in members])
+    assert np.array_equal(reopened.member(3), reopened.schedules[:, 3])
+
+
+def test_bad_ids_leave_store_untouched(tmp_path):
+    store = ResultStore.create(str(tmp_path / "r.store"), 10, id_width=4)
+    good = _members(2)
+    store.append(good, cohort.compute_chunk(good))
+    before = store.schedules.copy()
+
+    bad = [("ok", 1000.0, 1, ""), ("much-too-long", 5000.0, 1, "")]
+    with pytest.raises(ValueError, match="longer than 4 bytes"):
+        store.append(bad, cohort.compute_chunk(bad))
+    assert store.n_members == 2
+    assert np.array_equal(store._schedules[:, :4], np.pad(before, ((0, 0), (0, 2), (0, 0))))
+
+    with pytest.raises(ValueError, match="full"):
+        store.append(_members(9), cohort.compute_chunk(_members(9)))
+
+
+def test_open_checks_model_fingerprint(tmp_path, monkeypatch):
+    path = str(tmp_path / "r.store")
+    ResultStore.create(path, 1).flush()
+    monkeypatch.setattr(logic, "CAP", logic.CAP + 100)
+    with pytest.warns(UserWarning, match="different model"):
+        ResultStore.open(path)
+    with pytest.raises(ValueError, match="different model"):
+        ResultStore.open(path, writable=True)
+
+
+def test_open_rejects_other_files(tmp_path):
+    path = tmp_path / "r.store"
+    path.write_bytes(b"x" * 100)
+    with pytest.raises(ValueError, match="not a result store"):
+        ResultStore.open(str(path))
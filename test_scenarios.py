@@ -0,0 +1,85 @@
+import math
+import random
+
+import pytest
+
+import logic
+from scenario import run_scenario
+
+
+def _cases(n=4000, seed=5):
+    rng = random.Random(seed)
+    cases = [
+        (a, m)
+        for a in [0.0, -0.0, -25.0, 1e-9, 0.01, 1.0, 123.456, logic.CAP - 1e-9, logic.CAP, logic.CAP + 1e-9, 1e6, 1e300]
+        for m in range(-1, 15)
+    ]
+    cases += [(rng.uniform(0, 6000), rng.randint(1, 12)) for _ in range(n)]
+    cases += [(round(rng.lognormvariate(6, 2), 2), rng.randint(1, 12)) for _ in range(n)]
+    return cases
+
+
+def _stats(values):
+    # logic.sum is the compensated sum while the 3.12 case runs.
+    peak = max(values)
+    return getattr(logic, "sum", sum)(values), peak, (values.index(peak) + 1 if peak > 0 else 1)
+
+
+def _expected(annual, start_month):
+    no_cap = logic.compute_monthly_no_cap(annual)
+    cap_only = logic.compute_monthly_without_smoothing(annual)
+    smooth = logic.compute_monthly_with_smoothing(annual, start_month)
+    (t1, p1, m1), (t2, p2, m2), (t3, p3, m3) = _stats(no_cap), _stats(cap_only), _stats(smooth)
+    return logic.ScenarioSummary(t1, t2, t3, p1, p2, p3, m1, m2, m3, max(t1 - t2, 0.0))
+
+
+def _compensated_sum(values, start=0):
+    # CPython 3.12+ float sum(): Neumaier compensation, applied at the end.
+    total = float(start)
+    comp = 0.0
+    for x in values:
+        t = total + x
+        comp += (total - t) + x if abs(total) >= abs(x) else (x - t) + total
+        total = t
+    if comp and math.isfinite(comp):
+        total += comp
+    return total
+
+
+@pytest.mark.parametrize("compensated", [False, True])
+def test_summary_matches_monthly_functions(monkeypatch, compensated):
+    # Both sum() behaviours, whichever Python runs the tests: logic's own
+    # sum() calls are pointed at the compensated one for the 3.12 case.
+    monkeypatch.setattr(logic, "_COMPENSATED_SUM", compensated)
+    monkeypatch.setattr(logic, "_capped_summaries", {})
+    if compensated:
+        monkeypatch.setattr(logic, "sum", _compensated_sum, raising=False)
+
+    for annual, start_month in _cases():
+        expected = _expected(annual, start_month)
+        assert logic.summarize_scenarios(annual, start_month) == expected, (annual, start_month)
+        assert logic.compute_scenarios(annual, start_month)[0] == expected, (annual, start_month)
+
+
+def test_summary_matches_run_scenario():
+    for annual, start_month in _cases(n=300):
+        summary = logic.summarize_scenarios(annual, start_month)
+        _, series, _ = run_scenario(annual, start_month, None)
+        (t1, p1, m1), (t2, p2, m2), (t3, p3, m3) = (_stats(values) for values in series.values())
+        assert summary == (t1, t2, t3, p1, p2, p3, m1, m2, m3, max(t1 - t2, 0.0)), (annual, start_month)
+
+
+def test_summary_follows_model_changes(monkeypatch):
+    before = logic.summarize_scenarios(5000.0, 4)
+    monkeypatch.setattr(logic, "CAP", 3000.0)
+    assert logic.summarize_scenarios(5000.0, 4) == _expected(5000.0, 4)
+    assert logic.summarize_scenarios(5000.0, 4).total_cap == 3000.0
+    monkeypatch.setattr(logic, "SPENDING_WEIGHTS", list(reversed(logic.SPENDING_WEIGHTS)))
+    assert logic.summarize_scenarios(5000.0, 4) == _expected(5000.0, 4)
+    monkeypatch.undo()
+    assert logic.summarize_scenarios(5000.0, 4) == before
+
+
+def test_summary_of_non_finite_estimates_matches_compute_scenarios():
+    for annual in (float("inf"), float("nan")):
+        assert repr(logic.summarize_scenarios(annual, 3)) == repr(logic.compute_scenarios(annual, 3)[0])
@@ -0,0 +1,79 @@
+import csv
+import random
+
+import pytest
+
+import logic
+from solver import main, peak_by_start_month, solve_start_months
+
+MONTHS = range(1, logic.MONTHS_IN_YEAR + 1)
+
+
+def _estimates():
+    rng = random.Random(9)
+    values = [0.0, -10.0, 0.01, 1.0, 150.0, logic.CAP - 0.01, logic.CAP, logic.CAP + 0.01, 5000.0, 1e6]
+    return values + [round(rng.uniform(0, 6000), 2) for _ in range(200)]
+
+
+def _brute_peaks(annual):
+    # Worst monthly bill for every start month, straight from the scalar rules.
+    return [max(logic.compute_monthly_with_smoothing(annual, s)) for s in MONTHS]
+
+
+def _close(a, b):
+    return a == pytest.approx(b, rel=1e-12, abs=1e-9)
+
+
+def test_peaks_match_brute_force():
+    annual = _estimates()
+    peaks = peak_by_start_month(annual)
+    for i, a in enumerate(annual):
+        assert peaks[i].tolist() == pytest.approx(_brute_peaks(a), rel=1e-12, abs=1e-12), a
+
+
+@pytest.mark.parametrize("threshold", [-1.0, 0.0, 50.0, 150.0, 180.0, 400.0, 1e9])
+def test_best_and_latest_affordable_month_match_brute_force(threshold):
+    annual = _estimates()
+    result = solve_start_months(annual, threshold)
+    for i, a in enumerate(annual):
+        brute = _brute_peaks(a)
+        best = int(result["best_month"][i])
+        # The best month's peak is the lowest; no earlier month is as low.
+        assert _close(result["best_peak"][i], min(brute)), a
+        assert _close(brute[best - 1], min(brute)), a
+        assert all(not _close(brute[s - 1], min(brute)) for s in range(1, best)), a
+
+        latest = int(result["latest_affordable_month"][i])
+        later = range(latest + 1, logic.MONTHS_IN_YEAR + 1)
+        if latest:
+            assert brute[latest - 1] <= threshold or _close(brute[latest - 1], threshold), (a, threshold)
+        assert all(brute[s - 1] > threshold or _close(brute[s - 1], threshold) for s in later), (a, threshold)
+
+
+def test_zero_and_over_cap_estimates():
+    result = solve_start_months([0.0, -5.0, 1e6, logic.CAP], threshold=0.0)
+    assert result["best_month"].tolist() == [1, 1, 1, 1]
+    assert result["best_peak"].tolist()[:2] == [0.0, 0.0]
+    assert result["best_peak"][2] == result["best_peak"][3] == pytest.approx(logic.CAP / 12)
+    assert result["latest_affordable_month"].tolist() == [12, 12, 0, 0]
+
+
+def test_file_reports_current_peak(tmp_path):
+    annual = _estimates()[:60]
+    starts = [(i % 14) - 1 for i in range(len(annual))]
+    path = tmp_path / "m.csv"
+    path.write_text("id,annual_oop,start_month\n" + "".join(
+        f"m{i},{a},{s}\n" for i, (a, s) in enumerate(zip(annual, starts))
+    ))
+    out = tmp_path / "best.csv"
+    assert main([str(path), "-o", str(out), "--threshold", "150"]) == 0
+    rows = list(csv.DictReader(out.open()))
+    assert len(rows) == len(annual)
+    for row, a, s in zip(rows, annual, starts):
+        brute = _brute_peaks(a)
+        month = min(max(s, 1), 12)
+        assert int(row["start_month"]) == month
+        assert _close(float(row["current_peak"]), brute[month - 1])
+        assert _close(float(row["best_peak"]), min(brute))
+        latest = int(row["latest_affordable_month"])
+        assert latest == max([m for m in MONTHS if brute[m - 1] <= 150 + 1e-9] or [0])
@@ -0,0 +1,26 @@
+import numpy as np
+
+import logic
+import sweep
+
+
+def test_breakpoints_are_unique_and_sorted():
+    breakpoints = sweep.find_breakpoints()
+    annual = [b["annual_oop"] for b in breakpoints]
+    assert annual == sorted(set(annual))
+    assert annual[0] == logic.CAP
+    assert "reaches the cap" in breakpoints[0]["event"]
+    assert "cap reached by Dec" in breakpoints[0]["event"]
+
+
+def test_zero_weight_months_share_a_breakpoint(monkeypatch):
+    monkeypatch.setattr(logic, "SPENDING_WEIGHTS", [0.2] * 5 + [0.0] * 7)
+    events = [b["event"] for b in sweep.find_breakpoints()]
+    assert len(events) == 5
+    assert events[0].count("cap reached by") == 8  # May through Dec
+
+
+def test_cumulative_shares_end_at_one():
+    shares = sweep.cumulative_shares()
+    assert shares[-1] == 1.0
+    assert np.all(np.diff(shares) >= 0)